@@ -4,14 +4,182 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 from pathlib import Path
 from datetime import datetime
 import threading
-from pub_v1 import * 
-from compare_v2 import *
-from final_result_v1 import *
+from profiles_v1 import available_profiles
+from main_v1 import DocumentRevisionTool, configure_logging
+from result_cache_v1 import DEFAULT_CACHE_DIR
+from adaptive_plan_v1 import DEFAULT_STATS_FILE
+from home_cache_v1 import HomeCache
+
+
+class ResultGrid:
+    """Virtualized grid of the last result (a result_view_v1.ResultView).
+    
+    The Treeview only holds one item per line that fits on screen; scrolling
+    moves an offset into the filtered row positions and refills those items,
+    so a result of 200k rows costs no more Tk items than one of 30. The
+    vertical scrollbar is driven by that offset instead of by the Treeview.
+    """
+    
+    ROW_HEIGHT = 20
+    COLORS = {'FFCCCC': '#FFCCCC', 'FFFF99': '#FFFF99'}
+    
+    def __init__(self, parent, bg_color):
+        self.view = None
+        self.categories = []
+        self.positions = []
+        self.offset = 0
+        self.items = []
+        self.search_job = None
+        
+        parent.grid_rowconfigure(1, weight=1)
+        parent.grid_columnconfigure(0, weight=1)
+        
+        # Filter by Result category and search box
+        controls = tk.Frame(parent, bg=bg_color)
+        controls.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        
+        tk.Label(controls, text="Show:", font=("Arial", 9), bg=bg_color).pack(side=tk.LEFT)
+        self.category_input = ttk.Combobox(controls, font=("Arial", 9), state="disabled", width=22)
+        self.category_input.pack(side=tk.LEFT, padx=(5, 15))
+        self.category_input.bind("<<ComboboxSelected>>", lambda e: self.apply_filter())
+        
+        tk.Label(controls, text="Search:", font=("Arial", 9), bg=bg_color).pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+        self.search_input = tk.Entry(controls, font=("Arial", 9), textvariable=self.search_var,
+                                     state="disabled", width=30)
+        self.search_input.pack(side=tk.LEFT, padx=5)
+        
+        self.count_label = tk.Label(controls, text="No results yet", font=("Arial", 9),
+                                    bg=bg_color, fg="#666666")
+        self.count_label.pack(side=tk.RIGHT)
+        
+        style = ttk.Style()
+        style.configure("Results.Treeview", rowheight=self.ROW_HEIGHT)
+        self.tree = ttk.Treeview(parent, show="headings", selectmode="browse",
+                                 style="Results.Treeview")
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        for tag, color in self.COLORS.items():
+            self.tree.tag_configure(tag, background=color)
+        
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+        x_scrollbar = ttk.Scrollbar(parent, orient=tk.HORIZONTAL, command=self.tree.xview)
+        x_scrollbar.grid(row=2, column=0, sticky="ew")
+        self.tree.configure(xscrollcommand=x_scrollbar.set)
+        
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-len(self.items)))
+        self.tree.bind("<Next>", lambda e: self.scroll(len(self.items)))
+        self.tree.bind("<Home>", lambda e: self.scroll(-len(self.positions)))
+        self.tree.bind("<End>", lambda e: self.scroll(len(self.positions)))
+    
+    def show(self, view):
+        """Show a ResultView (all rows, no search)."""
+        self.view = view
+        columns = [f"c{number}" for number in range(len(view.columns))]
+        self.tree.configure(columns=columns)
+        for column_id, heading in zip(columns, view.columns):
+            self.tree.heading(column_id, text=heading, anchor="w")
+            self.tree.column(column_id, width=140, minwidth=60, stretch=False)
+        
+        counts = view.category_counts()
+        self.categories = list(counts)
+        self.category_input.configure(
+            values=[f"{category} ({count})" for category, count in counts.items()],
+            state="readonly"
+        )
+        self.category_input.current(0)
+        self.search_input.configure(state="normal")
+        self.search_var.set("")
+        self.apply_filter()
+    
+    def clear(self):
+        """Remove the shown result."""
+        self.view = None
+        self.positions = []
+        self.category_input.set("")
+        self.category_input.configure(values=[], state="disabled")
+        self.search_var.set("")
+        self.search_input.configure(state="disabled")
+        self.tree.configure(columns=[])
+        self.count_label.config(text="No results yet")
+        self.render()
+    
+    def schedule_search(self):
+        """Filter shortly after typing stops, not on every key."""
+        if self.search_job is not None:
+            self.tree.after_cancel(self.search_job)
+        self.search_job = self.tree.after(250, self.apply_filter)
+    
+    def apply_filter(self):
+        """Refresh the rows for the selected category and search text."""
+        self.search_job = None
+        if self.view is None:
+            return
+        selected = self.category_input.current()
+        category = self.categories[selected] if selected >= 0 else 'All'
+        self.positions = self.view.filter(category, self.search_var.get())
+        self.offset = 0
+        self.count_label.config(text=f"{len(self.positions)} of {self.view.size} rows")
+        self.render()
+    
+    def on_resize(self, event):
+        """Keep one Treeview item per visible line."""
+        lines = max(1, (event.height - self.ROW_HEIGHT - 5) // self.ROW_HEIGHT)
+        while len(self.items) < lines:
+            self.items.append(self.tree.insert("", tk.END, values=()))
+        while len(self.items) > lines:
+            self.tree.delete(self.items.pop())
+        self.render()
+    
+    def render(self):
+        """Fill the visible items from the rows at the current offset."""
+        total = len(self.positions)
+        self.offset = max(0, min(self.offset, total - len(self.items)))
+        for line, item in enumerate(self.items):
+            number = self.offset + line
+            if self.view is not None and number < total:
+                pos = int(self.positions[number])
+                color = self.view.row_color(pos)
+                self.tree.item(item, values=self.view.row(pos), tags=(color,) if color else ())
+            else:
+                self.tree.item(item, values=(), tags=())
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + len(self.items)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def scroll(self, lines):
+        """Move the shown rows by lines (negative: up)."""
+        self.offset += lines
+        self.render()
+        return "break"
+    
+    def on_scrollbar(self, action, amount, unit=None):
+        """Scrollbar command: 'moveto FRACTION' or 'scroll N units|pages'."""
+        if action == 'moveto':
+            self.offset = int(float(amount) * len(self.positions))
+            self.render()
+        elif action == 'scroll':
+            step = len(self.items) if unit == 'pages' else 1
+            self.scroll(int(amount) * step)
+    
+    def on_mouse_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        units = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll(-3 * units)
 
 
 class DocumentRevisionGUI:
     """Main GUI window for Document Revision Tool using tkinter."""
     
+    # Default memory cap of the session home cache
+    HOME_CACHE_MB = 1024
+    
     def __init__(self, root):
         self.root = root
         self.client_file = ""
@@ -19,6 +187,9 @@ class DocumentRevisionGUI:
         self.output_file = ""
         self.output_path = ""
         self.is_running = False
+        # Loaded, deduplicated and indexed home files, reused by later runs
+        # of this session against the same (unchanged) home file
+        self.home_cache = HomeCache(max_mb=self.HOME_CACHE_MB)
         
         # Color scheme - Professional blue
         self.button_color = "#4A90E2"
@@ -27,11 +198,22 @@ class DocumentRevisionGUI:
         self.bg_color = "#f5f5f5"
         
         self.init_ui()
+        
+        # The window is shown first; the pipeline modules (pandas, numpy,
+        # openpyxl) are loaded in the background once it has painted
+        self.root.after(100, self.preload_pipeline)
+    
+    def preload_pipeline(self):
+        """Import the comparison modules in a background thread."""
+        def load():
+            import pub_v1, compare_v2, final_result_v1, home_store_v1
+        
+        threading.Thread(target=load, daemon=True).start()
     
     def init_ui(self):
         """Initialize the user interface."""
         self.root.title("Document Revision Comparison Tool")
-        self.root.geometry("850x700")
+        self.root.geometry("900x800")
         self.root.configure(bg=self.bg_color)
         
         # Make window resizable
@@ -148,6 +330,25 @@ class DocumentRevisionGUI:
         )
         home_btn.grid(row=1, column=2, pady=5)
         self.bind_button_hover(home_btn)
+        
+        # Operator rule profile
+        tk.Label(
+            input_frame,
+            text="Profile:",
+            font=("Arial", 10),
+            bg=self.bg_color,
+            width=12,
+            anchor="w"
+        ).grid(row=2, column=0, sticky="w", pady=5)
+        
+        self.profile_input = ttk.Combobox(
+            input_frame,
+            font=("Arial", 9),
+            state="readonly",
+            values=available_profiles()
+        )
+        self.profile_input.set("default")
+        self.profile_input.grid(row=2, column=1, sticky="w", padx=5, pady=5)
     
     def create_output_section(self):
         """Create output configuration section."""
@@ -222,6 +423,62 @@ class DocumentRevisionGUI:
             fg="#666666"
         )
         help_label.grid(row=2, column=0, columnspan=3, sticky="w", pady=(0, 5))
+        
+        # Resume an interrupted run from its checkpoint
+        self.resume_var = tk.BooleanVar(value=False)
+        resume_check = tk.Checkbutton(
+            output_frame,
+            text="Resume from last checkpoint (if the input files are unchanged)",
+            variable=self.resume_var,
+            font=("Arial", 9),
+            bg=self.bg_color,
+            activebackground=self.bg_color
+        )
+        resume_check.grid(row=3, column=0, columnspan=3, sticky="w")
+        
+        # Profile the run (cProfile); the profile can be shared instead of the data
+        self.profile_run_var = tk.BooleanVar(value=False)
+        profile_check = tk.Checkbutton(
+            output_frame,
+            text="Profile this run (saves OUTPUT.pstats and call counters, no data)",
+            variable=self.profile_run_var,
+            font=("Arial", 9),
+            bg=self.bg_color,
+            activebackground=self.bg_color
+        )
+        profile_check.grid(row=4, column=0, columnspan=3, sticky="w")
+        
+        # Identical re-runs are served from the result cache unless forced
+        self.force_var = tk.BooleanVar(value=False)
+        force_check = tk.Checkbutton(
+            output_frame,
+            text="Force recompute (ignore cached results of identical inputs)",
+            variable=self.force_var,
+            font=("Arial", 9),
+            bg=self.bg_color,
+            activebackground=self.bg_color
+        )
+        force_check.grid(row=5, column=0, columnspan=3, sticky="w")
+        
+        # Memory cap of the session home cache (0 disables it)
+        cache_frame = tk.Frame(output_frame, bg=self.bg_color)
+        cache_frame.grid(row=6, column=0, columnspan=3, sticky="w", pady=(5, 0))
+        tk.Label(
+            cache_frame,
+            text="Keep home data between runs, up to (MB, 0 = off):",
+            font=("Arial", 9),
+            bg=self.bg_color
+        ).pack(side=tk.LEFT)
+        self.home_cache_var = tk.StringVar(value=str(self.HOME_CACHE_MB))
+        tk.Spinbox(
+            cache_frame,
+            from_=0,
+            to=65536,
+            increment=256,
+            textvariable=self.home_cache_var,
+            font=("Arial", 9),
+            width=8
+        ).pack(side=tk.LEFT, padx=5)
     
     def create_button_section(self):
         """Create action buttons section."""
@@ -261,17 +518,12 @@ class DocumentRevisionGUI:
         self.bind_button_hover(self.reset_btn)
     
     def create_console_section(self):
-        """Create console output section."""
-        console_frame = tk.LabelFrame(
-            self.root,
-            text="Console Output",
-            font=("Arial", 10, "bold"),
-            bg=self.bg_color,
-            fg="#333333",
-            padx=10,
-            pady=10
-        )
-        console_frame.grid(row=4, column=0, sticky="nsew", padx=20, pady=10)
+        """Create the console output and result tabs."""
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.grid(row=4, column=0, sticky="nsew", padx=20, pady=10)
+        
+        console_frame = tk.Frame(self.notebook, bg=self.bg_color, padx=10, pady=10)
+        self.notebook.add(console_frame, text="Console Output")
         console_frame.grid_rowconfigure(0, weight=1)
         console_frame.grid_columnconfigure(0, weight=1)
         
@@ -290,6 +542,12 @@ class DocumentRevisionGUI:
         self.console.tag_config("error", foreground="red")
         self.console.tag_config("success", foreground="green")
         self.console.tag_config("info", foreground="blue")
+        
+        # Result grid of the last run, so red/yellow rows can be scanned
+        # without opening the workbook in Excel
+        self.results_frame = tk.Frame(self.notebook, bg=self.bg_color, padx=10, pady=10)
+        self.notebook.add(self.results_frame, text="Results")
+        self.result_grid = ResultGrid(self.results_frame, self.bg_color)
     
     def create_status_bar(self):
         """Create status bar at the bottom."""
@@ -439,7 +697,16 @@ class DocumentRevisionGUI:
         self.log_message("Starting comparison process...", "info")
         self.log_message(f"Client file: {self.client_file}")
         self.log_message(f"Home file: {self.home_file}")
-        self.log_message(f"Output file: {self.output_file}\n")
+        self.log_message(f"Output file: {self.output_file}")
+        self.log_message(f"Profile: {self.profile_input.get()}")
+        self.log_message(f"Resume: {'yes' if self.resume_var.get() else 'no'}\n")
+        
+        try:
+            cache_mb = max(0.0, float(self.home_cache_var.get()))
+        except ValueError:
+            cache_mb = self.HOME_CACHE_MB
+            self.home_cache_var.set(str(self.HOME_CACHE_MB))
+        self.home_cache.resize(cache_mb)
         
         # Disable buttons during execution
         self.is_running = True
@@ -454,61 +721,70 @@ class DocumentRevisionGUI:
     def run_comparison(self):
         """Run the comparison process in a separate thread."""
         try:
-           
-            
-            self.log_message("="*50)
-            self.log_message("Document Revision Comparison Tool")
-            self.log_message("="*50 + "\n")
-            
-            # Step 1: Load data
-            self.log_message("Step 1: Loading data files...")
-            loader = DataLoader(self.client_file, self.home_file)
-            client_df, home_df = loader.load_files()
-            
-            # Step 2: Format client file
-            self.log_message("Step 2: Formatting client file...")
-            formatter = ClientFormatter(client_df)
-            client_df = formatter.process()
-            formatter.save_formatted_file('client_formatted.csv')
-            
-            # Step 3: Process home file
-            self.log_message("Step 3: Processing home file...")
-            home_processor = HomeProcessor(home_df)
-            home_df = home_processor.remove_duplicates()
-            
-            # Step 4: Compare documents
-            self.log_message("Step 4: Comparing documents...")
-            comparator = RevisionComparator(client_df, home_df)
-            result_df = comparator.process_comparisons()
-            
-            # Step 5: Save results
-            self.log_message("Step 5: Saving results...")
-            result_gen = ResultGenerator(result_df, self.output_file)
-            result_gen.save_results()
-            
-            # Step 6: Apply formatting
-            self.log_message("Step 6: Applying cell colors...")
-            excel_formatter = ExcelFormatter(self.output_file)
-            excel_formatter.apply_colors()
-            
-            # Step 7: Generate summary
-            self.log_message("Step 7: Generating summary...")
-            result_gen.generate_summary()
+            # Same workflow as the command line tool (concurrent loading,
+            # streamed output, checkpoints), logging into the console
+            tool = DocumentRevisionTool(
+                self.client_file, self.home_file, self.output_file,
+                profile=self.profile_input.get() or 'default',
+                resume=self.resume_var.get(),
+                force_recompute=self.force_var.get(),
+                cache_dir=DEFAULT_CACHE_DIR,
+                stats_file=DEFAULT_STATS_FILE,
+                home_cache=self.home_cache if self.home_cache.max_bytes else None,
+                log=self.log_message
+            )
+            if self.profile_run_var.get():
+                result_df = tool.run_profiled('cprofile')
+            else:
+                result_df = tool.run()
             
             self.log_message("\n✓ Process completed successfully!", "success")
-            self.root.after(0, self.on_success)
+            view = self.load_result_view(result_df)
+            self.root.after(0, lambda: self.on_success(view))
             
         except Exception as e:
+            # Input and write errors are raised by the pipeline; the GUI stays open
             error_msg = f"Error during execution: {str(e)}"
             self.log_message(f"\n❌ {error_msg}", "error")
             self.root.after(0, lambda: self.on_error(error_msg))
     
-    def on_success(self):
+    def load_result_view(self, result_df):
+        """ResultView of the run for the result grid (worker thread).
+        
+        A result served from the result cache has no frame and is read back
+        from the output file. Returns None when it cannot be shown.
+        """
+        try:
+            from result_view_v1 import ResultView
+            if result_df is not None:
+                return ResultView(result_df)
+            if Path(self.output_file).exists():
+                return ResultView.from_file(self.output_file)
+        except Exception as e:
+            self.log_message(f"Results could not be shown in the grid: {e}", "error")
+        return None
+    
+    def build_search_index(self, view):
+        """Build the grid's search index in the background (searches scan until then)."""
+        view.build_search_index()
+        
+        def ready():
+            if self.result_grid.view is view and not self.is_running:
+                self.update_status(f"Process completed successfully - {view.size} result rows, "
+                                   f"search index ready - {self.home_cache.status()}")
+        
+        self.root.after(0, ready)
+    
+    def on_success(self, view=None):
         """Handle successful completion."""
         self.is_running = False
         self.execute_btn.config(state="normal", bg=self.button_color, cursor="hand2")
         self.reset_btn.config(state="normal", bg=self.button_color, cursor="hand2")
-        self.update_status("Process completed successfully")
+        self.update_status(f"Process completed successfully - {self.home_cache.status()}")
+        if view is not None:
+            self.result_grid.show(view)
+            self.notebook.select(self.results_frame)
+            threading.Thread(target=self.build_search_index, args=(view,), daemon=True).start()
         
         messagebox.showinfo(
             "Success",
@@ -520,7 +796,7 @@ class DocumentRevisionGUI:
         self.is_running = False
         self.execute_btn.config(state="normal", bg=self.button_color, cursor="hand2")
         self.reset_btn.config(state="normal", bg=self.button_color, cursor="hand2")
-        self.update_status("Error occurred")
+        self.update_status(f"Error occurred - {self.home_cache.status()}")
         
         messagebox.showerror("Execution Error", error_msg)
     
@@ -575,9 +851,17 @@ class DocumentRevisionGUI:
             self.output_name_input.delete(0, tk.END)
             self.output_name_input.insert(0, "result_one.xlsx")
             
+            self.profile_input.set("default")
+            self.resume_var.set(False)
+            self.profile_run_var.set(False)
+            self.force_var.set(False)
+            self.home_cache_var.set(str(self.HOME_CACHE_MB))
+            
             self.console.config(state="normal")
             self.console.delete(1.0, tk.END)
             self.console.config(state="disabled")
+            self.result_grid.clear()
+            self.notebook.select(0)
             
             self.update_status("Ready")
             self.log_message("Form reset successfully", "info")
@@ -585,6 +869,7 @@ class DocumentRevisionGUI:
 
 def main():
     """Main entry point for GUI application."""
+    configure_logging()
     root = tk.Tk()
     app = DocumentRevisionGUI(root)
     root.mainloop()
@@ -0,0 +1,150 @@
+import json
+import logging
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Per-profile strategy statistics of earlier runs, kept by the command line
+# tool and the GUI; the library and api_v1 only keep them when given a file
+DEFAULT_STATS_FILE = 'strategy_stats.json'
+
+# Strategies measured by the plan, in the order RevisionComparator.compare_row
+# tries them. 'prefilter' is fallbacks_hopeless; a hit means it proved that
+# the Title / Revision Description fallbacks cannot match.
+STRATEGIES = ['document_number', 'prefilter', 'title', 'revision_description']
+
+
+class StrategyStatsFile:
+    """JSON file with the strategy statistics of earlier runs, one entry per profile."""
+
+    # Weight of the stored statistics when a run's statistics are merged in,
+    # so that old runs fade out
+    DECAY = 0.5
+
+    def __init__(self, stats_file=DEFAULT_STATS_FILE):
+        self.stats_file = Path(stats_file)
+
+    def _read(self):
+        if not self.stats_file.exists():
+            return {}
+        try:
+            with open(self.stats_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Warning: could not read strategy statistics ({e}), starting fresh")
+            return {}
+
+    def load(self, profile_name):
+        """Stored {strategy: {calls, hits, seconds}} of a profile (empty if none)."""
+        return self._read().get(profile_name, {})
+
+    def save(self, profile_name, stats):
+        """Merge a run's statistics into the stored ones of the profile."""
+        data = self._read()
+        stored = data.get(profile_name, {})
+        merged = {}
+        for strategy in STRATEGIES:
+            old = stored.get(strategy, {})
+            new = stats.get(strategy, {})
+            merged[strategy] = {
+                key: old.get(key, 0) * self.DECAY + new.get(key, 0)
+                for key in ('calls', 'hits', 'seconds')
+            }
+        data[profile_name] = merged
+        try:
+            with open(self.stats_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            logger.warning(f"Warning: could not save strategy statistics ({e})")
+
+
+class AdaptivePlan:
+    """Statistics-driven plan for the match strategies of RevisionComparator.
+
+    The order Document Number -> Title -> Revision Description decides the
+    result (an earlier strategy's match wins), so it is never changed. What
+    is adapted is the trigram prefilter (fallbacks_hopeless) before the
+    Title search: it only saves time, by proving that the fallbacks cannot
+    match. When most rows that reach it do match by Title, it costs more than
+    it saves and is skipped; every probe_every-th row still runs it so that
+    its hit rate stays measured. The plan is re-evaluated every
+    replan_every rows from this run's statistics plus the stored ones of
+    earlier runs with the same profile.
+    """
+
+    def __init__(self, stored_stats=None, replan_every=200, probe_every=10, min_calls=50):
+        self.stored = stored_stats or {}
+        self.stats = {strategy: {'calls': 0, 'hits': 0, 'seconds': 0.0} for strategy in STRATEGIES}
+        self.replan_every = replan_every
+        self.probe_every = probe_every
+        self.min_calls = min_calls
+        self.rows = 0
+        self.skipped_prefilter = 0
+        self.use_prefilter = True
+        self.replan()
+
+    def record(self, strategy, start, hit):
+        """Count one call of a strategy started at start (time.perf_counter())."""
+        entry = self.stats[strategy]
+        entry['calls'] += 1
+        entry['seconds'] += time.perf_counter() - start
+        if hit:
+            entry['hits'] += 1
+
+    def _combined(self, strategy):
+        """Calls, hits and seconds of this run plus the stored ones."""
+        stored = self.stored.get(strategy, {})
+        current = self.stats[strategy]
+        return tuple(current[key] + stored.get(key, 0) for key in ('calls', 'hits', 'seconds'))
+
+    def prefilter_value(self):
+        """Expected seconds saved per row by running the prefilter (None if unknown).
+
+        A proof saves the Title and Revision Description lookups; every call
+        costs the prefilter itself.
+        """
+        calls, hits, seconds = self._combined('prefilter')
+        fallback_calls, _, fallback_seconds = self._combined('title')
+        _, _, rev_desc_seconds = self._combined('revision_description')
+        if calls < self.min_calls or fallback_calls == 0:
+            return None
+        fallback_cost = (fallback_seconds + rev_desc_seconds) / fallback_calls
+        return hits / calls * fallback_cost - seconds / calls
+
+    def replan(self):
+        """Decide whether the prefilter runs before the Title search."""
+        value = self.prefilter_value()
+        self.use_prefilter = value is None or value > 0
+
+    def start_row(self):
+        """Called once per client row; re-plans periodically."""
+        self.rows += 1
+        if self.rows % self.replan_every == 0:
+            self.replan()
+
+    def run_prefilter(self):
+        """True if the prefilter should run for the current row."""
+        if self.use_prefilter or self.rows % self.probe_every == 0:
+            return True
+        self.skipped_prefilter += 1
+        return False
+
+    def saved_seconds(self):
+        """Estimated seconds saved against always running the prefilter."""
+        value = self.prefilter_value()
+        if value is None or not self.skipped_prefilter:
+            return 0.0
+        return -value * self.skipped_prefilter
+
+    def report(self):
+        """Text summary of the strategy statistics and the plan."""
+        lines = ["Strategy statistics (calls / hits / avg ms):"]
+        for strategy in STRATEGIES:
+            entry = self.stats[strategy]
+            average = entry['seconds'] / entry['calls'] * 1000 if entry['calls'] else 0.0
+            lines.append(f"  {strategy}: {entry['calls']} / {entry['hits']} / {average:.3f}")
+        lines.append(f"Adaptive plan: prefilter {'on' if self.use_prefilter else 'off'}, "
+                     f"skipped on {self.skipped_prefilter} rows, "
+                     f"estimated {self.saved_seconds():.2f}s saved")
+        return '\n'.join(lines)
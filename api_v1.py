@@ -0,0 +1,61 @@
+import logging
+from profiles_v1 import load_profile
+
+logger = logging.getLogger(__name__)
+
+
+def compare_documents(client, home, profile='default', output_file=None,
+                      formatted_client_file=None, suggestions=3, duplicates_file=None):
+    """Compare a client document list against the home file, in memory.
+
+    client, home: DataFrames, CSV file paths or file-like objects (text or
+    binary). The inputs are not modified.
+    profile: rule profile name, JSON path or a loaded profile (profiles_v1).
+    output_file: optional result file (.xlsx / .csv / .jsonl), written while
+    comparing; nothing is written to disk unless it is given.
+    formatted_client_file: optional CSV of the formatted client rows.
+    duplicates_file: optional CSV of the home rows removed as duplicates.
+    suggestions: near-miss suggestions per 'Not found' row (0 disables them).
+
+    Returns (result_df, summary) where summary has the total, verified,
+    needs_check and not_found counts. A missing input file raises
+    FileNotFoundError, an unreadable or malformed input raises ValueError
+    (pub_v1.InputError). Progress goes to the 'pub_v1', 'compare_v2', ...
+    loggers; nothing is printed.
+
+    Example:
+        result_df, summary = compare_documents(client_df, 'home.csv', profile='default')
+    """
+    from pub_v1 import DataLoader, ClientFormatter, HomeProcessor
+    from compare_v2 import HomeIndex, RevisionComparator
+    from final_result_v1 import ResultGenerator, open_result_writer
+
+    if profile is None or isinstance(profile, str):
+        profile = load_profile(profile or 'default')
+
+    # Loading keeps each stage's frame; only changed columns are new arrays
+    loader = DataLoader(client, home, profile=profile)
+    client_df = loader.load_client_file()
+
+    formatter = ClientFormatter(client_df, profile=profile)
+    client_df = formatter.process()
+    if formatted_client_file:
+        formatter.save_formatted_file(formatted_client_file)
+
+    home_df = HomeProcessor(loader.load_home_file(), audit_file=duplicates_file).remove_duplicates()
+    home_index = HomeIndex(home_df)
+
+    comparator = RevisionComparator(client_df, home_df, home_index=home_index,
+                                    profile=profile, suggestions=suggestions)
+    if output_file:
+        with open_result_writer(output_file, comparator.output_columns) as writer:
+            for idx, values in comparator.iter_comparisons():
+                writer.write_row(values)
+        logger.info(f"Results saved to: {output_file}")
+    else:
+        for _ in comparator.iter_comparisons():
+            pass
+
+    result_df = comparator.result_frame()
+    summary = ResultGenerator(result_df, output_file).summary()
+    return result_df, summary
@@ -0,0 +1,51 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Startup benchmark for the command line and GUI entry points.
+# Each case runs in a fresh interpreter, so module imports are not cached.
+#
+#   python bench_startup.py            (5 runs per case)
+#   python bench_startup.py --runs 10
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+CASES = [
+    ('python (empty interpreter)', [sys.executable, '-c', 'pass']),
+    ('main_v1.py --help', [sys.executable, 'main_v1.py', '--help']),
+    ('main_v1.py bad argument', [sys.executable, 'main_v1.py', '--chunksize', 'x']),
+    ('import main_v1', [sys.executable, '-c', 'import main_v1']),
+    ('import UI (before the window)', [sys.executable, '-c', 'import UI']),
+    ('comparison stage imports', [sys.executable, '-c',
+                                  'import pub_v1, compare_v2, final_result_v1, home_store_v1']),
+]
+
+
+def time_command(command, runs):
+    """Wall times in seconds of running command runs times."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_DIR, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    """Run each case and print the median and best time."""
+    parser = argparse.ArgumentParser(description="Measure startup time of the entry points.")
+    parser.add_argument('--runs', type=int, default=5, help="Runs per case (default: 5)")
+    args = parser.parse_args()
+
+    print(f"{'Case':<32}{'median':>10}{'best':>10}")
+    for name, command in CASES:
+        times = time_command(command, args.runs)
+        print(f"{name:<32}{statistics.median(times) * 1000:>8.0f}ms{min(times) * 1000:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(file_path, block_size=1024 * 1024):
+    """SHA-256 of a file's content, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_inputs(client_file, home_file, profile=None):
+    """Fingerprint of a run's inputs: both file contents and the rule profile."""
+    digest = hashlib.sha256()
+    digest.update(file_digest(client_file).encode())
+    digest.update(file_digest(home_file).encode())
+    if profile is not None:
+        digest.update(profile.fingerprint().encode())
+    return digest.hexdigest()
+
+
+def fingerprint_run(input_hash, columns, options=None):
+    """Fingerprint of a run for its checkpoint: the inputs' fingerprint, the
+    output columns and the options that change the result rows."""
+    digest = hashlib.sha256()
+    digest.update(input_hash.encode())
+    digest.update(json.dumps([list(columns), options or {}], sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """Periodic checkpoint of finished result rows, used to resume a run.
+
+    The file is JSON Lines: a header line with the inputs' fingerprint, then
+    one [row position, result column values...] line per finished row.
+    Rows are buffered and appended every interval_rows rows or
+    interval_seconds seconds, whichever comes first, so the overhead stays
+    a small fraction of the comparison time.
+    """
+
+    def __init__(self, checkpoint_path, input_hash, interval_rows=1000, interval_seconds=30):
+        self.checkpoint_path = Path(checkpoint_path)
+        self.input_hash = input_hash
+        self.interval_rows = interval_rows
+        self.interval_seconds = interval_seconds
+        self.pending = []
+        self.file = None
+        self.last_flush = time.monotonic()
+
+    def load(self):
+        """Return the checkpointed rows {position: [result column values]}.
+
+        Empty if there is no checkpoint or it was written for other inputs.
+        Only the leading run of consecutive positions is returned, because
+        rows are compared in order.
+        """
+        if not self.checkpoint_path.exists():
+            return {}
+
+        rows = {}
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            try:
+                header = json.loads(f.readline())
+            except json.JSONDecodeError:
+                return {}
+            if header.get('input_hash') != self.input_hash:
+                logger.info("Checkpoint was written for different input files or options, starting from the beginning")
+                return {}
+
+            for line in f:
+                try:
+                    pos, *values = json.loads(line)
+                except (json.JSONDecodeError, ValueError):
+                    # A line cut off by the interruption ends the checkpoint
+                    break
+                rows[pos] = values
+
+        completed = 0
+        while completed in rows:
+            completed += 1
+        return {pos: rows[pos] for pos in range(completed)}
+
+    def start(self, restored_rows=None):
+        """Rewrite the checkpoint with the header and any restored rows."""
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.checkpoint_path, 'w', encoding='utf-8')
+        self.file.write(json.dumps({'input_hash': self.input_hash}) + '\n')
+        for pos, values in sorted((restored_rows or {}).items()):
+            self.file.write(json.dumps([pos, *values], ensure_ascii=False) + '\n')
+        self.flush()
+
+    def record(self, pos, values):
+        """Add a finished row's result values; written out at the next interval."""
+        self.pending.append([pos, *values])
+        if (len(self.pending) >= self.interval_rows
+                or time.monotonic() - self.last_flush >= self.interval_seconds):
+            self.flush()
+
+    def flush(self):
+        """Append the pending rows and sync them to disk."""
+        for row in self.pending:
+            self.file.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+        self.pending = []
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        """Write the pending rows and close the checkpoint file."""
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        """Delete the checkpoint after a completed run."""
+        self.close()
+        if self.checkpoint_path.exists():
+            self.checkpoint_path.unlink()
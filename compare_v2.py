@@ -1,36 +1,455 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import logging
 import re
 import sys
+import time
 from pathlib import Path
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+from functools import lru_cache
+from adaptive_plan_v1 import AdaptivePlan
+from pub_v1 import HOME_COLUMNS
+from profiles_v1 import load_profile, DEFAULT_PROFILE
+
+DEFAULT_DATE_FORMATS = tuple(DEFAULT_PROFILE['date_formats'])
+
+# Progress is logged at INFO, the per-row trace at DEBUG (the command line
+# shows it with --verbose); nothing is printed when used as a library
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=65536)
+def _parse_date_cached(date_str, date_formats):
+    """Parse a stripped date string; results are cached because the same
+    dates repeat across thousands of rows."""
+    for date_format in date_formats:
+        try:
+            parsed_date = datetime.strptime(date_str, date_format)
+            if parsed_date.year < 100:
+                if parsed_date.year < 50:
+                    parsed_date = parsed_date.replace(year=parsed_date.year + 2000)
+                else:
+                    parsed_date = parsed_date.replace(year=parsed_date.year + 1900)
+            return parsed_date
+        except ValueError:
+            continue
+    
+    return None
+
+_DOC_KEY_SEGMENT = re.compile(r'[A-Z]+|[0-9]+')
+
+
+@lru_cache(maxsize=65536)
+def canonical_doc_key(doc_number):
+    """Spelling-insensitive key of a document number.
+    
+    Upper case, split into letter and digit segments (punctuation and
+    whitespace only separate segments), leading zeros removed from digit
+    segments: 'AMM-0413', 'amm 413' and 'AMM413' all give 'AMM.413'.
+    Non-ASCII letters are dropped. Returns '' when nothing is left.
+    """
+    segments = _DOC_KEY_SEGMENT.findall(str(doc_number).upper())
+    return '.'.join(
+        (segment.lstrip('0') or '0') if segment.isdigit() else segment
+        for segment in segments
+    )
+
+
+class NgramPrefilter:
+    """Trigram key-set over a text column.
+    
+    Maps every character trigram to the sorted positions of the rows whose
+    text contains it. A string can only be a substring of a row's text if all
+    of its trigrams are posted for that row, so an empty intersection proves
+    that no row matches without scanning the column.
+    """
+    
+    N = 3
+    
+    def __init__(self, texts):
+        postings = {}
+        for pos, text in enumerate(texts):
+            if not text:
+                continue
+            for gram in self.ngrams(text):
+                postings.setdefault(gram, []).append(pos)
+        self.postings = {gram: np.array(positions, dtype=np.int32)
+                         for gram, positions in postings.items()}
+    
+    @classmethod
+    def ngrams(cls, text):
+        """Distinct character n-grams of a string."""
+        return {text[i:i + cls.N] for i in range(len(text) - cls.N + 1)}
+    
+    def candidates(self, text):
+        """Sorted positions of rows that may contain text.
+        
+        Returns None when text is too short to be filtered (every row is a candidate).
+        """
+        grams = self.ngrams(text)
+        if not grams:
+            return None
+        
+        # Intersect the rarest postings first and stop as soon as nothing is left
+        postings = []
+        for gram in grams:
+            positions = self.postings.get(gram)
+            if positions is None:
+                return np.empty(0, dtype=np.int32)
+            postings.append(positions)
+        postings.sort(key=len)
+        
+        result = postings[0]
+        for positions in postings[1:]:
+            result = np.intersect1d(result, positions, assume_unique=True)
+            if len(result) == 0:
+                break
+        return result
+    
+    def candidates_all(self, texts):
+        """Sorted positions of rows that may contain every string in texts (None: no filter)."""
+        result = None
+        for text in texts:
+            positions = self.candidates(text)
+            if positions is None:
+                continue
+            result = positions if result is None else np.intersect1d(result, positions, assume_unique=True)
+            if len(result) == 0:
+                break
+        return result
+
+
+class SimilarityIndex:
+    """Trigram similarity search for near-miss suggestions.
+    
+    Scores every home row against a Doc. No. from the trigram postings alone
+    (no per-row string comparison): Dice similarity against the folded
+    Document Number, and the share of the Doc. No. trigrams found in the
+    Title. Used for rows that end as 'Not found', where the usual causes are
+    typos and formatting differences (missing dashes, spaces, O vs 0).
+    """
+    
+    # A Title hit ranks below an equally similar Document Number
+    TITLE_WEIGHT = 0.9
+    
+    def __init__(self, doc_numbers, titles, call_numbers, title_prefilter=None):
+        self.doc_numbers = ['' if pd.isna(doc) else str(doc).strip() for doc in doc_numbers]
+        self.call_numbers = ['' if pd.isna(cn) else str(cn).strip() for cn in call_numbers]
+        self.size = len(self.doc_numbers)
+        
+        folded = [self.fold(doc) for doc in self.doc_numbers]
+        self.doc_prefilter = NgramPrefilter(folded)
+        self.doc_gram_counts = np.array(
+            [len(NgramPrefilter.ngrams(doc)) for doc in folded], dtype=np.int32
+        )
+        # The HomeIndex title prefilter (upper-cased titles) is reused when given
+        if title_prefilter is None:
+            title_prefilter = NgramPrefilter(['' if pd.isna(t) else str(t).upper() for t in titles])
+        self.title_prefilter = title_prefilter
+    
+    @staticmethod
+    def fold(text):
+        """Spelling-insensitive form: upper case, O read as 0, only letters and digits."""
+        return re.sub(r'[^0-9A-Z]', '', str(text).upper().replace('O', '0'))
+    
+    def _overlap(self, prefilter, grams):
+        """Number of the given trigrams posted for each home row."""
+        postings = [prefilter.postings[gram] for gram in grams if gram in prefilter.postings]
+        if not postings:
+            return np.zeros(self.size, dtype=np.int64)
+        return np.bincount(np.concatenate(postings), minlength=self.size)
+    
+    def suggest(self, doc_no, k=3, min_score=0.5):
+        """Top k (position, score) pairs for doc_no, best first."""
+        if pd.isna(doc_no) or self.size == 0:
+            return []
+        doc_no_str = str(doc_no).strip()
+        doc_grams = NgramPrefilter.ngrams(self.fold(doc_no_str))
+        title_grams = NgramPrefilter.ngrams(doc_no_str.upper())
+        if not doc_grams and not title_grams:
+            return []
+        
+        scores = np.zeros(self.size)
+        if doc_grams:
+            overlap = self._overlap(self.doc_prefilter, doc_grams)
+            scores = 2 * overlap / (len(doc_grams) + self.doc_gram_counts)
+        if title_grams:
+            overlap = self._overlap(self.title_prefilter, title_grams)
+            scores = np.maximum(scores, self.TITLE_WEIGHT * overlap / len(title_grams))
+        
+        k = min(k, self.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        # Best score first, file order among equal scores
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(int(pos), float(scores[pos])) for pos in top if scores[pos] >= min_score]
+    
+    def suggestion_text(self, doc_no, k=3, min_score=0.5):
+        """Suggestions as 'Document Number (Call Number) score%; ...'."""
+        suggestions = []
+        for pos, score in self.suggest(doc_no, k, min_score):
+            call_number = f" ({self.call_numbers[pos]})" if self.call_numbers[pos] else ''
+            suggestions.append(f"{self.doc_numbers[pos]}{call_number} {score:.0%}")
+        return '; '.join(suggestions)
+
+
+class HomeIndex:
+    """Lookup indexes over the deduplicated home file.
+    
+    Built once per run (it can be built in a worker thread while the client
+    file is being formatted) and shared by all RevisionComparator searches.
+    Rows are referred to by their position in home_df.
+    """
+    
+    def __init__(self, home_df):
+        self.size = len(home_df)
+        
+        # Document Number (stripped) -> positions, in file order
+        self.doc_number_positions = {}
+        if 'Document Number' in home_df.columns:
+            for pos, doc_number in enumerate(home_df['Document Number']):
+                if pd.isna(doc_number):
+                    continue
+                self.doc_number_positions.setdefault(str(doc_number).strip(), []).append(pos)
+        
+        # Canonical key (canonical_doc_key) -> positions, for variant spellings
+        self.doc_key_positions = {}
+        for doc_number, positions in self.doc_number_positions.items():
+            key = canonical_doc_key(doc_number)
+            if key:
+                self.doc_key_positions.setdefault(key, []).extend(positions)
+        for positions in self.doc_key_positions.values():
+            positions.sort()
+        
+        # Title as searched by find_by_title_keywords (str() of the raw value)
+        if 'Title' in home_df.columns:
+            self.titles = [str(title) for title in home_df['Title']]
+        else:
+            self.titles = [''] * self.size
+        
+        # Upper-cased Revision Description for case-insensitive containment (None if missing)
+        if 'Revision Description' in home_df.columns:
+            self.rev_desc_upper = [
+                None if pd.isna(desc) else str(desc).upper()
+                for desc in home_df['Revision Description']
+            ]
+        else:
+            self.rev_desc_upper = [None] * self.size
+        
+        # Columnar copy of the home values; candidate rows are passed around
+        # as positions into these lists instead of dict records
+        nan = float('nan')
+        self.columns = {
+            column: home_df[column].tolist() if column in home_df.columns else [nan] * self.size
+            for column in HOME_COLUMNS
+        }
+        
+        # Trigram prefilters for the Title and Revision Description fallbacks
+        self.title_prefilter = NgramPrefilter([title.upper() for title in self.titles])
+        self.rev_desc_prefilter = NgramPrefilter(self.rev_desc_upper)
+        
+        self._similarity_index = None
+        
+        logger.info(f"Home index built: {self.size} rows, "
+                    f"{len(self.doc_number_positions)} distinct document numbers "
+                    f"({len(self.doc_key_positions)} canonical keys), "
+                    f"{len(self.title_prefilter.postings)} title trigrams, "
+                    f"{len(self.rev_desc_prefilter.postings)} revision description trigrams")
+    
+    @property
+    def similarity_index(self):
+        """SimilarityIndex for near-miss suggestions, built on first use."""
+        if self._similarity_index is None:
+            self._similarity_index = SimilarityIndex(
+                self.columns['Document Number'], self.titles, self.columns['Call Number'],
+                title_prefilter=self.title_prefilter
+            )
+        return self._similarity_index
+    
+    @property
+    def has_similarity_index(self):
+        """True once the SimilarityIndex has been built."""
+        return self._similarity_index is not None
+    
+    def document_number_positions(self, doc_no_str):
+        """Positions of rows whose stripped Document Number equals doc_no_str."""
+        return self.doc_number_positions.get(doc_no_str, [])
+    
+    def document_key_positions(self, doc_key):
+        """Positions of rows whose canonical Document Number key equals doc_key."""
+        return self.doc_key_positions.get(doc_key, [])
+    
+    def title_candidate_positions(self, doc_no_str, words):
+        """Positions of rows whose Title may contain doc_no_str, or all of words.
+        
+        A superset of the find_by_title_keywords matches, in file order.
+        """
+        substring_positions = self.title_prefilter.candidates(doc_no_str.upper())
+        if substring_positions is None:
+            return range(self.size)
+        
+        if words:
+            keyword_positions = self.title_prefilter.candidates_all(
+                [word.upper() for word in words]
+            )
+            if keyword_positions is None:
+                return range(self.size)
+            substring_positions = np.union1d(substring_positions, keyword_positions)
+        
+        return substring_positions.tolist()
+    
+    def revision_description_candidate_positions(self, doc_no_str):
+        """Positions of rows whose Revision Description may contain doc_no_str."""
+        positions = self.rev_desc_prefilter.candidates(doc_no_str.upper())
+        return range(self.size) if positions is None else positions.tolist()
+    
+    def revision_description_positions(self, doc_no_str):
+        """Positions of rows whose Revision Description contains doc_no_str (case-insensitive)."""
+        doc_no_upper = doc_no_str.upper()
+        return [
+            pos for pos in self.revision_description_candidate_positions(doc_no_str)
+            if self.rev_desc_upper[pos] is not None and doc_no_upper in self.rev_desc_upper[pos]
+        ]
+
 
 class RevisionComparator:
     """Handles the comparison logic between client and home files."""
     
-    def __init__(self, client_df, home_df):
-        self.client_df = client_df.copy()
-        self.home_df = home_df.copy()
+    RESULT_COLUMNS = ['Result', 'Doc Call Number', 'Note', 'Suggestions']
+    
+    def __init__(self, client_df, home_df=None, home_store=None, home_index=None, profile=None,
+                 store_cache_rows=None, suggestions=3, strategy_stats=None, history_store=None):
+        # Shallow copy: result columns are assigned once in result_frame,
+        # so the caller's frame is unchanged without copying its data
+        self.client_df = client_df.copy(deep=False)
+        # Rule profile (profiles_v1): BASIC values, date formats, TR keyword
+        self.profile = profile or load_profile()
+        self.basic_values = self.profile.basic_values
+        self.date_formats = self.profile.date_formats
+        # home_df is only read, so it is not copied
+        self.home_df = home_df
+        # Optional HomeStore (home_store_v1); when set, lookups query SQLite
+        # instead of scanning home_df
+        self.home_store = home_store
+        # HomeIndex over home_df, built here unless a prebuilt one is passed in
+        if home_index is None and self.home_df is not None:
+            home_index = HomeIndex(self.home_df)
+        self.home_index = home_index
         
-        # Initialize result columns
-        if 'Result' not in self.client_df.columns:
-            self.client_df['Result'] = ''
-        if 'Doc Call Number' not in self.client_df.columns:
-            self.client_df['Doc Call Number'] = ''
-        if 'Note' not in self.client_df.columns:
-            self.client_df['Note'] = ''
+        # Home values by column; candidates are positions into these lists.
+        # With a home store, fetched rows are appended as they are first seen.
+        # store_cache_rows bounds that cache (out-of-core mode); it is cleared
+        # between client rows once it grows past the limit.
+        self.store_cache_rows = store_cache_rows
+        if self.home_store is not None:
+            self.clear_store_cache()
+        else:
+            self.home_columns = self.home_index.columns
+        
+        # Result buffers indexed by client row position, attached to
+        # client_df once at the end of process_comparisons
+        total_rows = len(self.client_df)
+        self.results = self._initial_buffer('Result', total_rows)
+        self.call_numbers = self._initial_buffer('Doc Call Number', total_rows)
+        self.notes = self._initial_buffer('Note', total_rows)
+        self.suggestions = self._initial_buffer('Suggestions', total_rows)
+        # Optional HomeStore with the snapshot history of the home exports
+        # (home_store_v1): mismatched rows get a 'Home Changed' note with the
+        # snapshot where the matched documents' revision values last changed
+        self.history_store = history_store
+        self.result_columns = list(self.RESULT_COLUMNS)
+        if self.history_store is not None:
+            self.result_columns.append('Home Changed')
+            self.home_changes = self._initial_buffer('Home Changed', total_rows)
+            # (Call Number, Document Number) of the home rows found per
+            # client row of the window, and the notes looked up per document
+            self.history_keys = {}
+            self.history_notes = {}
+        # Rows with a Formatted value waiting for evaluate_formatted_batch,
+        # and the values it prepares once per home row / distinct client value
+        self.formatted_batch = []
+        if self.home_store is None:
+            self.formatted_home_values = {}
+        self.client_tr_memo = {}
+        self.client_date_memo = {}
+        
+        # Home rows returned by any match strategy for any client row, for the
+        # reverse coverage report (positions in memory, rowids in the store)
+        if self.home_store is None:
+            self.matched_home = np.zeros(self.home_index.size, dtype=bool)
+        else:
+            self.matched_rowids = set()
+        
+        # Per-strategy hit/cost statistics and the adaptive prefilter plan;
+        # strategy_stats are the stored statistics of earlier runs
+        self.plan = AdaptivePlan(strategy_stats)
+        
+        # Canonical Doc. No. keys, computed once per client row
+        doc_numbers = self.client_df['Doc. No.'] if 'Doc. No.' in self.client_df.columns \
+            else [float('nan')] * total_rows
+        self.client_doc_keys = [
+            '' if pd.isna(doc_no) else canonical_doc_key(str(doc_no).strip())
+            for doc_no in doc_numbers
+        ]
+        
+        # Near-miss suggestions for 'Not found' rows: the closest home
+        # Document Numbers / Titles (0 disables them)
+        self.suggestion_count = suggestions
+        self.similarity_index = None
+        if suggestions:
+            if self.home_index is not None:
+                self.similarity_index = self.home_index.similarity_index
+            else:
+                self.similarity_index = self.home_store.similarity_index()
+        
+        # Columns of the rows yielded by iter_comparisons (client columns, then
+        # the result columns that are not in the client file yet)
+        self.output_columns = list(self.client_df.columns) + [
+            column for column in self.result_columns if column not in self.client_df.columns
+        ]
+    
+    def result_buffers(self):
+        """The result buffers, in result_columns order."""
+        buffers = [self.results, self.call_numbers, self.notes, self.suggestions]
+        if self.history_store is not None:
+            buffers.append(self.home_changes)
+        return buffers
+    
+    def _initial_buffer(self, column, total_rows):
+        """Existing values of a result column, or empty strings."""
+        if column in self.client_df.columns:
+            return self.client_df[column].tolist()
+        return [''] * total_rows
+    
+    def clear_store_cache(self):
+        """Drop the home rows cached from the store."""
+        self.home_columns = {column: [] for column in HOME_COLUMNS}
+        self.store_positions = {}
+        self.position_rowids = []
+        self.formatted_home_values = {}
+    
+    def _positions_from_store(self, store_rows):
+        """Cache (rowid, record) pairs from the home store as columnar positions."""
+        positions = []
+        for rowid, record in store_rows:
+            pos = self.store_positions.get(rowid)
+            if pos is None:
+                pos = len(self.store_positions)
+                self.store_positions[rowid] = pos
+                self.position_rowids.append(rowid)
+                for column in HOME_COLUMNS:
+                    self.home_columns[column].append(record[column])
+            positions.append(pos)
+        return positions
     
     @staticmethod
-    def normalize_basic_revision(rev_str):
-        """Convert BASIC or BAS to 0."""
+    def normalize_basic_revision(rev_str, basic_values=('BASIC', 'BAS')):
+        """Convert BASIC or BAS (or the profile's basic values) to 0."""
         if pd.isna(rev_str):
             return ''
         
         rev_str = str(rev_str).strip().upper()
         
-        if rev_str in ['BASIC', 'BAS']:
+        if rev_str in basic_values:
             return '0'
         
         return rev_str
@@ -46,37 +465,18 @@ class RevisionComparator:
         return str(tr_str).strip().replace(' ', '').upper()
     
     @staticmethod
-    def parse_date(date_str):
-        """Parse date strings in multiple formats."""
+    def parse_date(date_str, date_formats=DEFAULT_DATE_FORMATS):
+        """Parse date strings in multiple formats (tried in order)."""
         if pd.isna(date_str) or str(date_str).strip() == '':
             return None
         
-        date_str = str(date_str).strip()
-        
-        date_formats = [
-            '%m/%d/%Y', '%d-%b-%y', '%d-%b-%Y', '%m/%d/%y',
-            '%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d-%m-%y'
-        ]
-        
-        for date_format in date_formats:
-            try:
-                parsed_date = datetime.strptime(date_str, date_format)
-                if parsed_date.year < 100:
-                    if parsed_date.year < 50:
-                        parsed_date = parsed_date.replace(year=parsed_date.year + 2000)
-                    else:
-                        parsed_date = parsed_date.replace(year=parsed_date.year + 1900)
-                return parsed_date
-            except ValueError:
-                continue
-        
-        return None
+        return _parse_date_cached(str(date_str).strip(), tuple(date_formats))
     
     @staticmethod
-    def compare_dates(date1_str, date2_str):
+    def compare_dates(date1_str, date2_str, date_formats=DEFAULT_DATE_FORMATS):
         """Compare two date strings."""
-        date1 = RevisionComparator.parse_date(date1_str)
-        date2 = RevisionComparator.parse_date(date2_str)
+        date1 = RevisionComparator.parse_date(date1_str, date_formats)
+        date2 = RevisionComparator.parse_date(date2_str, date_formats)
         
         if date1 is None and date2 is None:
             return True
@@ -85,63 +485,93 @@ class RevisionComparator:
         
         return date1.date() == date2.date()
     
-    def find_by_document_number(self, doc_no):
-        """Find matching rows in home file by Document Number."""
+    def find_by_document_number(self, doc_no, doc_key=None):
+        """Find matching rows in home file by Document Number.
+        Returns positions into self.home_columns.
+        
+        The exact (stripped) Document Number is tried first; without an exact
+        match, rows whose canonical key (canonical_doc_key) equals doc_key
+        match, so variant spellings such as 'AMM 0413' / 'AMM-413' are found
+        here instead of by the Title search."""
         if pd.isna(doc_no):
             return []
         
         doc_no_str = str(doc_no).strip()
+        if doc_key is None:
+            doc_key = canonical_doc_key(doc_no_str)
         
-        matching_rows = self.home_df[
-            self.home_df['Document Number'].astype(str).str.strip() == doc_no_str
-        ]
+        if self.home_store is not None:
+            store_rows = self.home_store.find_by_document_number(doc_no_str)
+            if not store_rows and doc_key:
+                store_rows = self.home_store.find_by_document_key(doc_key)
+                if store_rows:
+                    logger.debug(f"  Matched by canonical Doc. No. key: {doc_key}")
+            matching_rows = self._positions_from_store(store_rows)
+            logger.debug(f"  Document Number matches: {len(matching_rows)}")
+            return matching_rows
+        
+        matching_rows = self.home_index.document_number_positions(doc_no_str)
+        if not matching_rows and doc_key:
+            matching_rows = self.home_index.document_key_positions(doc_key)
+            if matching_rows:
+                logger.debug(f"  Matched by canonical Doc. No. key: {doc_key}")
 
-        print("This is in find_by_document_number\n")
-        print("matching rows: ", matching_rows)
+        logger.debug(f"  Document Number matches: {len(matching_rows)}")
         
-        return matching_rows.to_dict('records') if len(matching_rows) > 0 else []
+        return matching_rows
     
     def find_by_revision_description(self, doc_no):
-        """Find matching rows by checking Doc. No. in Revision Description."""
+        """Find matching rows by checking Doc. No. in Revision Description.
+        Returns positions into self.home_columns."""
         if pd.isna(doc_no):
             return []
         
         doc_no_str = str(doc_no).strip()
         
-        matching_rows = self.home_df[
-            self.home_df['Revision Description'].astype(str).str.contains(
-                doc_no_str, case=False, na=False, regex=False
-            )
-        ]
-
-        print("This is in find_by_revision_description to find doc-no")
-        print(doc_no_str," :: ", matching_rows)   
+        if self.home_store is not None:
+            # FTS candidates are a superset, keep the exact case-insensitive check
+            doc_no_upper = doc_no_str.upper()
+            matching_rows = self._positions_from_store([
+                (rowid, match) for rowid, match
+                in self.home_store.find_revision_description_candidates(doc_no_str)
+                if doc_no_upper in str(match.get('Revision Description')).upper()
+            ])
+            logger.debug(f"  Revision Description matches for {doc_no_str}: {len(matching_rows)}")
+            return matching_rows
+        
+        matching_rows = self.home_index.revision_description_positions(doc_no_str)
+        logger.debug(f"  Revision Description matches for {doc_no_str}: {len(matching_rows)}")
 
-        return matching_rows.to_dict('records') if len(matching_rows) > 0 else []
+        return matching_rows
     
     #this one is working so far
-    def compare_revision_and_date(self, idx, row, matching_rows):
-        """Compare Revision No./Date with Revision Num/Date from home file."""
+    def compare_revision_and_date(self, pos, row, matching_rows):
+        """Compare Revision No./Date with Revision Num/Date from home file.
+        pos is the client row position, matching_rows are home positions."""
         client_rev_no = row.get('Revision No.')
         client_rev_date = row.get('Rev. Date')
         
         # Normalize BASIC/BAS
-        client_rev_normalized = self.normalize_basic_revision(client_rev_no)
+        client_rev_normalized = self.normalize_basic_revision(client_rev_no, self.basic_values)
         
         results = []
         call_numbers = []
         notes = []
         
-        for match in matching_rows:
-            home_rev_num = match.get('Revision Num')
-            home_rev_date = match.get('Revision Date')
-            call_number = match.get('Call Number', '')
+        home_rev_nums = self.home_columns['Revision Num']
+        home_rev_dates = self.home_columns['Revision Date']
+        home_call_numbers = self.home_columns['Call Number']
+        
+        for home_pos in matching_rows:
+            home_rev_num = home_rev_nums[home_pos]
+            home_rev_date = home_rev_dates[home_pos]
+            call_number = home_call_numbers[home_pos]
             
             # Normalize home revision
-            home_rev_normalized = self.normalize_basic_revision(home_rev_num)
+            home_rev_normalized = self.normalize_basic_revision(home_rev_num, self.basic_values)
             
-            print(f"\n  Comparing revisions:")
-            print(f"  Client: '{client_rev_normalized}' vs Home: '{home_rev_normalized}'")
+            logger.debug(f"\n  Comparing revisions:")
+            logger.debug(f"  Client: '{client_rev_normalized}' vs Home: '{home_rev_normalized}'")
             
             # Compare revision numbers
             rev_match = self.compare_revisions(client_rev_normalized, home_rev_normalized)
@@ -152,7 +582,7 @@ class RevisionComparator:
                 notes.append('No Revision Date is given')
                 date_match = False
             else:
-                date_match = self.compare_dates(client_rev_date, home_rev_date)
+                date_match = self.compare_dates(client_rev_date, home_rev_date, self.date_formats)
             
             if rev_match and date_match:
                 results.append('Verified')
@@ -177,25 +607,23 @@ class RevisionComparator:
         # Handle results
         if len(results) > 1:
             # Multiple matches - mark as duplicated
-            self.client_df.at[idx, 'Note'] = 'duplicated'
-            # self.client_df.at[idx, 'Doc Call Number'] = ', '.join(call_numbers)
-            # self.client_df.at[idx, 'Result'] = results[0]  # Use first result
+            self.notes[pos] = 'duplicated'
+            # self.call_numbers[pos] = ', '.join(call_numbers)
+            # self.results[pos] = results[0]  # Use first result
              # Filter out empty call numbers and join
             valid_call_numbers = [cn for cn in call_numbers if cn]
-            self.client_df.at[idx, 'Doc Call Number'] = ', '.join(valid_call_numbers) if valid_call_numbers else ''
-            self.client_df.at[idx, 'Result'] = results[0]
+            self.call_numbers[pos] = ', '.join(valid_call_numbers) if valid_call_numbers else ''
+            self.results[pos] = results[0]
         elif len(results) == 1:
-            self.client_df.at[idx, 'Doc Call Number'] = call_numbers[0]
-            self.client_df.at[idx, 'Result'] = results[0]
+            self.call_numbers[pos] = call_numbers[0]
+            self.results[pos] = results[0]
             if notes:
-                self.client_df.at[idx, 'Note'] = notes[0]
+                self.notes[pos] = notes[0]
         
         return len(results) > 0
 
     @staticmethod
     def compare_revisions(rev1, rev2):
-
-        print("1111111111This is compare_revisions")
         """Compare two revision strings, handling numeric and TR formats.
         Examples:
         - "2" == "02" -> True (numeric comparison)
@@ -216,7 +644,6 @@ class RevisionComparator:
         rev2_upper = rev2_str.upper()
         
         if rev1_upper.startswith('TR') and rev2_upper.startswith('TR'):
-            print("11111111111this is if cell starts with TR")
             # Extract the numeric part after TR
             # Remove 'TR' prefix and any spaces
             rev1_num_part = re.sub(r'^TR\s*', '', rev1_upper, flags=re.IGNORECASE).strip()
@@ -227,12 +654,12 @@ class RevisionComparator:
                 num1 = int(float(rev1_num_part))
                 num2 = int(float(rev2_num_part))
                 result = (num1 == num2)
-                print(f"  TR numeric comparison: TR{num1} == TR{num2} -> {result}")
+                logger.debug(f"  TR numeric comparison: TR{num1} == TR{num2} -> {result}")
                 return result
             except (ValueError, TypeError):
                 # If numeric conversion fails, fall back to string comparison
                 result = (rev1_num_part == rev2_num_part)
-                print(f"  TR string comparison: TR{rev1_num_part} == TR{rev2_num_part} -> {result}")
+                logger.debug(f"  TR string comparison: TR{rev1_num_part} == TR{rev2_num_part} -> {result}")
                 return result
         
         # Try numeric comparison for non-TR revisions
@@ -240,91 +667,337 @@ class RevisionComparator:
             client_num = int(float(rev1_str))
             home_num = int(float(rev2_str))
             result = (client_num == home_num)
-            print(f"  Numeric comparison: {client_num} == {home_num} -> {result}")
+            logger.debug(f"  Numeric comparison: {client_num} == {home_num} -> {result}")
             return result
         except (ValueError, TypeError):
             # Fall back to string comparison for non-numeric values
             result = (rev1_str == rev2_str)
-            print(f"  String comparison: '{rev1_str}' == '{rev2_str}' -> {result}")
+            logger.debug(f"  String comparison: '{rev1_str}' == '{rev2_str}' -> {result}")
             return result
                       
-    def process_comparisons(self):
-        """Main processing logic for comparisons."""
-        total_rows = len(self.client_df)
+    def compare_row(self, idx, row):
+        """Run the match strategies for one client row and fill its result buffers."""
+        doc_no = row.get('Doc. No.')
+        publi_type = row.get('Publi. Type')
+        formatted = row.get('Formatted', '')
+        revision_no = row.get('Revision No.')
+        
+        logger.debug(f"\n{'='*60}")
+        logger.debug(f"Processing Client Row {idx + 1}:")
+        logger.debug(f"  Doc. No.: {doc_no}")
+        logger.debug(f"  Revision No.: {revision_no}")
+        logger.debug(f"  Formatted: '{formatted}'")
+        logger.debug(f"{'='*60}")
         
-        for idx, row in self.client_df.iterrows():
-            if (idx + 1) % 100 == 0:
-                print(f"Processing row {idx + 1}/{total_rows}...")
+        plan = self.plan
+        plan.start_row()
+        
+        # Step 1: Try to find by Document Number (exact, then canonical key)
+        start = time.perf_counter()
+        matching_rows = self.find_by_document_number(doc_no, self.client_doc_keys[idx])
+        plan.record('document_number', start, matching_rows)
+        self.mark_matched(idx, matching_rows)
+        
+        if matching_rows:
+            # Check if Formatted column has a value
+            if not pd.isna(formatted) and str(formatted).strip() != '':
+                # Use formatted comparison (handles TR and other values),
+                # decided with the other Formatted rows of the window
+                self.queue_formatted(idx, row, matching_rows)
+                return
             
-            doc_no = row.get('Doc. No.')
-            publi_type = row.get('Publi. Type')
-            formatted = row.get('Formatted', '')
-            revision_no = row.get('Revision No.')
+            # Use standard revision/date comparison
+            if self.compare_revision_and_date(idx, row, matching_rows):
+                return
+        
+        # Prefilter: when no Title and no Revision Description can contain
+        # the Doc. No., the fallback searches below cannot match. The plan
+        # skips it when it rarely proves anything (same results either way)
+        if plan.run_prefilter():
+            start = time.perf_counter()
+            hopeless = self.fallbacks_hopeless(doc_no, formatted)
+            plan.record('prefilter', start, hopeless)
+            if hopeless:
+                logger.debug("  Prefilter: Doc. No. not in any Title / Revision Description")
+                self.mark_not_found(idx, doc_no)
+                return
+        
+        # # Step 2: Try Title matching (with TR logic if applicable)
+        # formatted_str = str(formatted).strip().upper() if not pd.isna(formatted) else ''
+        
+        # if 'TR' in formatted_str:
+        #     # Use TR-aware title matching
+        #     matching_rows = self.find_by_title_keywords(doc_no, revision_no, formatted_str)
+        # else:
+        #     # Regular title matching (Formatted is empty or other value)
+        #     matching_rows = self.find_by_title_keywords(doc_no)
+        
+        # Step 2: Try Title matching
+        start = time.perf_counter()
+        matching_rows = self.find_by_title_keywords(doc_no)
+        plan.record('title', start, matching_rows)
+        self.mark_matched(idx, matching_rows)
+
+        if matching_rows:
+
+            # Set Doc Call Number first when it is found in title
+            # call_numbers = [str(match.get('Call Number', '')) for match in matching_rows if match.get('Call Number')]
+            # self.client_df.at[idx, 'Doc Call Number'] = ', '.join(call_numbers) if call_numbers else ''
             
-            print(f"\n{'='*60}")
-            print(f"Processing Client Row {idx + 1}:")
-            print(f"  Doc. No.: {doc_no}")
-            print(f"  Revision No.: {revision_no}")
-            print(f"  Formatted: '{formatted}'")
-            print(f"{'='*60}")
+            # Check if Formatted has a value
+            if not pd.isna(formatted) and str(formatted).strip() != '':
+                self.queue_formatted(idx, row, matching_rows)
+                return
             
-            # Step 1: Try to find by Document Number
-            matching_rows = self.find_by_document_number(doc_no)
+            # Standard comparison
+            if self.compare_revision_and_date(idx, row, matching_rows):
+                return
+        
+        # Step 3: Try Revision Description matching (only if Formatted is empty)
+        if pd.isna(formatted) or str(formatted).strip() == '':
+            start = time.perf_counter()
+            matching_rows = self.find_by_revision_description(doc_no)
+            plan.record('revision_description', start, matching_rows)
+            self.mark_matched(idx, matching_rows)
             
             if matching_rows:
-                # Check if Formatted column has a value
-                if not pd.isna(formatted) and str(formatted).strip() != '':
-                    # Use formatted comparison (handles TR and other values)
-                    if self.compare_with_formatted(idx, row, matching_rows):
-                        continue
-                
-                # Use standard revision/date comparison
                 if self.compare_revision_and_date(idx, row, matching_rows):
-                    continue
-            
-            # # Step 2: Try Title matching (with TR logic if applicable)
-            # formatted_str = str(formatted).strip().upper() if not pd.isna(formatted) else ''
-            
-            # if 'TR' in formatted_str:
-            #     # Use TR-aware title matching
-            #     matching_rows = self.find_by_title_keywords(doc_no, revision_no, formatted_str)
-            # else:
-            #     # Regular title matching (Formatted is empty or other value)
-            #     matching_rows = self.find_by_title_keywords(doc_no)
+                    return
+        
+        # No match found
+        self.mark_not_found(idx, doc_no)
+    
+    def mark_matched(self, idx, matching_rows):
+        """Record home rows found by a match strategy for client row idx
+        (see unmatched_home_rows and annotate_history)."""
+        if not matching_rows:
+            return
+        if self.home_store is None:
+            self.matched_home[matching_rows] = True
+        else:
+            self.matched_rowids.update(self.position_rowids[pos] for pos in matching_rows)
+        if self.history_store is not None:
+            # Keys, not positions: the store cache may be cleared before
+            # the window is annotated. A later strategy replaces the keys
+            call_numbers = self.home_columns['Call Number']
+            doc_numbers = self.home_columns['Document Number']
+            self.history_keys[idx] = {
+                (self._key_text(call_numbers[pos]), self._key_text(doc_numbers[pos], strip=True))
+                for pos in matching_rows
+            }
+    
+    @staticmethod
+    def _key_text(value, strip=False):
+        """Key part as stored in the home_versions table ('' when missing).
+        
+        HomeStore keeps the Call Number as imported and strips the Document
+        Number (its doc_key), so only the latter is stripped here.
+        """
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return ''
+        return str(value).strip() if strip else str(value)
+    
+    def history_note(self, call_number, doc_key):
+        """(snapshot id, note) on the last revision change of a home document,
+        or None when the history has no entry for it."""
+        key = (call_number, doc_key)
+        if key in self.history_notes:
+            return self.history_notes[key]
+        
+        entries = self.history_store.revision_history(call_number, doc_key, limit=2)
+        note = None
+        if entries:
+            latest = entries[0]
+            label = f"{call_number} {doc_key}".strip()
+            snapshot = (f"snapshot {latest['import_id']} "
+                        f"({Path(latest['source']).name}, {latest['imported_at']})")
+            if latest['revision_nums'] is None:
+                text = f"{label}: removed in {snapshot}"
+            elif len(entries) == 1:
+                text = f"{label}: unchanged since {snapshot}"
+            elif entries[1]['revision_nums'] is None:
+                text = f"{label}: added again in {snapshot}"
+            else:
+                previous = entries[1]
+                changes = [
+                    f"{name} {previous[field] or '-'} -> {latest[field] or '-'}"
+                    for name, field in [('Rev. Num', 'revision_nums'), ('Rev. Date', 'revision_dates')]
+                    if previous[field] != latest[field]
+                ]
+                text = f"{label}: changed in {snapshot}: {', '.join(changes)}"
+            note = (latest['import_id'], text)
+        self.history_notes[key] = note
+        return note
+    
+    def annotate_history(self, start, end):
+        """Set 'Home Changed' for the mismatched rows of a window: the most
+        recent revision change among the home documents the row was matched to."""
+        for idx in range(start, end):
+            keys = self.history_keys.pop(idx, None)
+            if not keys or self.results[idx] in ('', 'Verified'):
+                continue
+            notes = [self.history_note(*key) for key in sorted(keys)]
+            notes = [note for note in notes if note is not None]
+            if notes:
+                self.home_changes[idx] = max(notes, key=lambda note: note[0])[1]
+    
+    def unmatched_home_rows(self):
+        """Yield the HOME_COLUMNS values of home rows that no strategy found
+        for any compared client row, in file order.
+        
+        The rows found are recorded during the comparison, so this is one
+        pass over the home rows instead of another client x home search.
+        """
+        if self.home_store is None:
+            columns = [self.home_index.columns[column] for column in HOME_COLUMNS]
+            for pos in np.flatnonzero(~self.matched_home).tolist():
+                yield [values[pos] for values in columns]
+            return
+        for rowid, record in self.home_store.iter_rows():
+            if rowid not in self.matched_rowids:
+                yield [record[column] for column in HOME_COLUMNS]
+    
+    def mark_not_found(self, idx, doc_no):
+        """Set 'Not found' and the near-miss suggestions for a client row."""
+        self.results[idx] = 'Not found'
+        if self.similarity_index is not None:
+            self.suggestions[idx] = self.similarity_index.suggestion_text(
+                doc_no, k=self.suggestion_count
+            )
+    
+    def iter_comparisons(self, window_size=1000, start=0):
+        """Compare client rows in order and yield (row position, output values)
+        for each finished row.
+        
+        Rows are compared in windows of window_size rows; the rows of a window
+        are yielded as soon as the window is done, so a writer can consume
+        them while the next window is compared. The values follow
+        self.output_columns. start skips the rows before that position.
+        """
+        total_rows = len(self.client_df)
+        
+        # Client values by column; each row is a small dict of the compared fields
+        client_columns = {
+            column: self.client_df[column].tolist()
+            for column in ['Doc. No.', 'Publi. Type', 'Formatted', 'Revision No.', 'Rev. Date']
+            if column in self.client_df.columns
+        }
+        
+        for window_start in range(start, total_rows, window_size):
+            window_end = min(window_start + window_size, total_rows)
             
-            # Step 2: Try Title matching
-            matching_rows = self.find_by_title_keywords(doc_no)
-
-            if matching_rows:
-
-                # Set Doc Call Number first when it is found in title
-                # call_numbers = [str(match.get('Call Number', '')) for match in matching_rows if match.get('Call Number')]
-                # self.client_df.at[idx, 'Doc Call Number'] = ', '.join(call_numbers) if call_numbers else ''
+            for idx in range(window_start, window_end):
+                row = {column: values[idx] for column, values in client_columns.items()}
                 
-                # Check if Formatted has a value
-                if not pd.isna(formatted) and str(formatted).strip() != '':
-                    if self.compare_with_formatted(idx, row, matching_rows):
-                        continue
+                # Candidate positions only live for one client row, so the store
+                # cache can be dropped here without invalidating anything
+                if (self.home_store is not None and self.store_cache_rows
+                        and len(self.store_positions) > self.store_cache_rows):
+                    # Queued rows still refer to cached positions
+                    self.evaluate_formatted_batch()
+                    self.clear_store_cache()
                 
-                # Standard comparison
-                if self.compare_revision_and_date(idx, row, matching_rows):
-                    continue
-            
-            # Step 3: Try Revision Description matching (only if Formatted is empty)
-            if pd.isna(formatted) or str(formatted).strip() == '':
-                matching_rows = self.find_by_revision_description(doc_no)
+                if (idx + 1) % 100 == 0:
+                    logger.info(f"Processing row {idx + 1}/{total_rows}...")
                 
-                if matching_rows:
-                    if self.compare_revision_and_date(idx, row, matching_rows):
-                        continue
+                self.compare_row(idx, row)
             
-            # No match found
-            self.client_df.at[idx, 'Result'] = 'Not found'
+            # Rows with a Formatted value are decided together
+            self.evaluate_formatted_batch()
+            if self.history_store is not None:
+                self.annotate_history(window_start, window_end)
+            yield from self.iter_output_rows(window_start, window_end)
+    
+    def iter_output_rows(self, start, end):
+        """Yield (row position, output values) for rows whose results are set."""
+        result_buffers = [
+            (self.output_columns.index(column), buffer)
+            for column, buffer in zip(self.result_columns, self.result_buffers())
+        ]
+        extra_columns = len(self.output_columns) - len(self.client_df.columns)
         
-        print("\n" + "="*50)
-        print("Comparison completed successfully!")
-        print("="*50)
+        window = self.client_df.iloc[start:end]
+        for idx, values in enumerate(window.itertuples(index=False, name=None), start):
+            values = list(values) + [''] * extra_columns
+            for column_pos, buffer in result_buffers:
+                values[column_pos] = buffer[idx]
+            yield idx, values
+    
+    def result_values(self, idx):
+        """Result column values of one row, in result_columns order."""
+        return [buffer[idx] for buffer in self.result_buffers()]
+    
+    def restore_results(self, rows):
+        """Fill the result buffers from checkpointed rows {position: [result column values]}."""
+        buffers = self.result_buffers()
+        for idx, values in rows.items():
+            for buffer, value in zip(buffers, values):
+                buffer[idx] = value
+    
+    def result_frame(self):
+        """Attach the result buffers to client_df in one step and return it."""
+        self.client_df['Result'] = self.results
+        self.client_df['Doc Call Number'] = self.call_numbers
+        self.client_df['Note'] = self.notes
+        self.client_df['Suggestions'] = self.suggestions
+        if self.history_store is not None:
+            self.client_df['Home Changed'] = self.home_changes
         return self.client_df
+    
+    def process_comparisons(self):
+        """Main processing logic for comparisons."""
+        for _ in self.iter_comparisons():
+            pass
+        
+        result_df = self.result_frame()
+        
+        logger.info("\n" + "="*50)
+        logger.info("Comparison completed successfully!")
+        logger.info("="*50)
+        return result_df
+
+    @staticmethod
+    def title_keywords(doc_no_str):
+        """Words used by the keyword strategy of find_by_title_keywords.
+        Only complex doc numbers (with spaces or letters) of more than one word use it."""
+        if ' ' in doc_no_str or re.search(r'[A-Za-z]', doc_no_str):
+            words = re.findall(r'[A-Za-z0-9]+', doc_no_str)
+            if len(words) > 1:
+                return words
+        return []
+    
+    @staticmethod
+    def title_contains_doc_no(doc_no_str, title):
+        """Check if Doc. No. appears in Title."""
+        # Strategy 1: Check if doc_no appears as a complete substring in title
+        if doc_no_str in title:
+            logger.debug(f"  ✓ Doc No MATCH (substring): '{doc_no_str}' found in '{title}'")
+            return True
+        # Strategy 2: For complex doc numbers with spaces/letters
+        words = RevisionComparator.title_keywords(doc_no_str)
+        if words:
+            all_found = all(word.upper() in title.upper() for word in words)
+            if all_found:
+                logger.debug(f"  ✓ Doc No MATCH (keywords): All words {words} found in '{title}'")
+                return True
+        return False
+
+    def fallbacks_hopeless(self, doc_no, formatted):
+        """Return True if the trigram prefilters prove that neither the Title
+        search nor the Revision Description search can find doc_no."""
+        if self.home_index is None or pd.isna(doc_no):
+            return False
+        
+        doc_no_str = str(doc_no).strip()
+        if self.home_index.title_candidate_positions(doc_no_str, self.title_keywords(doc_no_str)):
+            return False
+        
+        # Revision Description is only searched when Formatted is empty
+        if pd.isna(formatted) or str(formatted).strip() == '':
+            if self.home_index.revision_description_candidate_positions(doc_no_str):
+                return False
+        
+        return True
 
     ##this is to add if doc. no. is found in either title or revision description
     def find_by_title_keywords(self, doc_no, revision_no=None, formatted=None):
@@ -335,34 +1008,28 @@ class RevisionComparator:
         
         doc_no_str = str(doc_no).strip()
         
-        print(f"\n=== DEBUG: find_by_title_keywords ===")
-        print(f"Searching for Doc. No.: '{doc_no_str}'")
+        logger.debug(f"  Searching Titles for Doc. No.: '{doc_no_str}'")
         
         matching_rows = []
         
-        for idx, row in self.home_df.iterrows():
-            title = str(row.get('Title', ''))
-            
-            # Check if Doc. No. appears in Title
-            doc_no_found = False
-            
-            # Strategy 1: Check if doc_no appears as a complete substring in title
-            if doc_no_str in title:
-                print(f"  ✓ Doc No MATCH (substring): '{doc_no_str}' found in '{title}'")
-                doc_no_found = True
-            # Strategy 2: For complex doc numbers with spaces/letters
-            elif ' ' in doc_no_str or re.search(r'[A-Za-z]', doc_no_str):
-                words = re.findall(r'[A-Za-z0-9]+', doc_no_str)
-                if len(words) > 1:
-                    all_found = all(word.upper() in title.upper() for word in words)
-                    if all_found:
-                        print(f"  ✓ Doc No MATCH (keywords): All words {words} found in '{title}'")
-                        doc_no_found = True
-            # print("doc_no_found:", doc_no_found)
-            if doc_no_found:
-                matching_rows.append(row.to_dict())
-        
-        print(f"Total matches found: {len(matching_rows)}\n")
+        if self.home_store is not None:
+            words = self.title_keywords(doc_no_str)
+            matching_rows = self._positions_from_store([
+                (rowid, match) for rowid, match
+                in self.home_store.find_title_candidates(doc_no_str, words)
+                if self.title_contains_doc_no(doc_no_str, str(match.get('Title', '')))
+            ])
+        else:
+            titles = self.home_index.titles
+            candidates = self.home_index.title_candidate_positions(
+                doc_no_str, self.title_keywords(doc_no_str)
+            )
+            matching_rows = [
+                pos for pos in candidates
+                if self.title_contains_doc_no(doc_no_str, titles[pos])
+            ]
+        
+        logger.debug(f"  Title matches: {len(matching_rows)}")
         return matching_rows 
 
     ##this is to add if doc. no. is found in either title or revision description
@@ -476,119 +1143,198 @@ class RevisionComparator:
     #         return True
 
     def compare_with_formatted(self, idx, row, matching_rows):
-        """Compare when Formatted column has a value (TR or other)."""
+        """Compare when Formatted column has a value (TR or other).
+        idx is the client row position, matching_rows are home positions.
+        
+        compare_row queues these rows instead (queue_formatted) and they are
+        evaluated together per window by evaluate_formatted_batch; this is the
+        same evaluation for a single row."""
         formatted = row.get('Formatted', '')
         
         if pd.isna(formatted) or str(formatted).strip() == '':
             return False
         
-        formatted_str = str(formatted).strip().upper()
-        doc_no = str(row.get('Doc. No.', '')).strip()
-        
-        print(f"\n  Comparing in compare_with_formatted:")
-        print(f"  Doc. No.: '{doc_no}'")
-        print(f"  Formatted: '{formatted_str}'")
-        print(f"  Matching rows count: {len(matching_rows)}")
-        
         if not matching_rows:
-            self.client_df.at[idx, 'Result'] = 'Not found'
-            self.client_df.at[idx, 'Note'] = f'Doc. No. {doc_no} not found in Title'
+            doc_no = str(row.get('Doc. No.', '')).strip()
+            self.results[idx] = 'Not found'
+            self.notes[idx] = f'Doc. No. {doc_no} not found in Title'
             return True
         
-        # Doc. No. found - set the Doc Call Number
-        call_numbers = [str(match.get('Call Number', '')) for match in matching_rows if match.get('Call Number')]
-        self.client_df.at[idx, 'Doc Call Number'] = ', '.join(call_numbers) if call_numbers else ''
+        self.evaluate_formatted([(idx, row, matching_rows)])
+        return True
+    
+    def queue_formatted(self, idx, row, matching_rows):
+        """Queue a row with a Formatted value and candidates for evaluate_formatted_batch.
         
-        # Check if Formatted contains 'TR'
-        if 'TR' in formatted_str:
-            # For TR: Compare Revision No. with Revision Description (not Revision Num!)
-            # and Rev. Date with Revision Date
-            rev_no = row.get('Revision No.')
-            client_rev_date = row.get('Rev. Date')
-            
-            print(f"  Checking TR comparison:")
-            print(f"  Client Revision No.: '{rev_no}'")
-            print(f"  Client Rev. Date: '{client_rev_date}'")
-            
-            # Normalize the client revision number for TR comparison
-            client_rev_normalized = self.normalize_tr_string(rev_no)
-            
-            verified = []
-            mismatches = []
-            
-            for match in matching_rows:
-                home_rev_desc = str(match.get('Revision Description', '')).strip()
-                home_rev_num = str(match.get('Revision Num', '')).strip()
-                home_rev_date = match.get('Revision Date')
-                
-                print(f"  Home Revision Description: '{home_rev_desc}'")
-                print(f"  Home Revision Num: '{home_rev_num}'")
-                print(f"  Home Revision Date: '{home_rev_date}'")
-                
-                # Normalize the home revision description for comparison
-                home_rev_desc_normalized = self.normalize_tr_string(home_rev_desc)
-                
-                # Check if client Revision No. matches the TR in Revision Description
-                rev_match = False
-                if home_rev_desc_normalized and client_rev_normalized in home_rev_desc_normalized:
-                    rev_match = True
-                    print(f"  ✓ TR Match: '{client_rev_normalized}' found in '{home_rev_desc_normalized}'")
-                else:
-                    print(f"  ✗ TR No Match: '{client_rev_normalized}' NOT in '{home_rev_desc_normalized}'")
-                
-                # Check if dates match
-                date_match = self.compare_dates(client_rev_date, home_rev_date)
-                
-                print(f"  Revision match: {rev_match}")
-                print(f"  Date match: {date_match}")
-                
-                if rev_match and date_match:
-                    verified.append(match)
-                else:
-                    # Store mismatch information
-                    mismatch_details = []
-                    if home_rev_num:
-                        mismatch_details.append(f"Rev. Num: {home_rev_num}")
-                    if home_rev_date and not pd.isna(home_rev_date):
-                        mismatch_details.append(f"Rev. Date: {str(home_rev_date)}")
-                    
-                    mismatches.append({
-                        'match': match,
-                        'details': '/ '.join(mismatch_details) if mismatch_details else 'Mismatch'
-                    })
+        The outcome only depends on the row and its candidates, so it can be
+        decided later, as long as it is before the row is yielded (and before
+        store cache positions are dropped)."""
+        self.formatted_batch.append((idx, row, matching_rows))
+    
+    def evaluate_formatted_batch(self):
+        """Evaluate all queued Formatted rows (see evaluate_formatted)."""
+        batch, self.formatted_batch = self.formatted_batch, []
+        if batch:
+            self.evaluate_formatted(batch)
+    
+    def evaluate_formatted(self, batch):
+        """Decide the outcome of [(idx, row, matching_rows)] rows with a Formatted value.
+        
+        The (client row, candidate) pairs of the whole batch are
+        laid out as flat arrays, each candidate's home values are prepared
+        once per distinct home row, and the decision table is evaluated with
+        array masks and per-row reductions.
+        - TR: a candidate is verified when the client Revision No. (spaces
+          removed, upper case) is in its Revision Description (same
+          normalization) and the dates are equal. Verified if any candidate
+          is ('duplicated' if several are); otherwise the first candidate's
+          'Rev. Num: .../ Rev. Date: ...' ('duplicated' noted if several).
+        - Other values (e.g. STATEMENT numbers): Verified if the value is in
+          any candidate's Revision Description, else 'X not found in
+          Revision Description'.
+        """
+        home_call_numbers = self.home_columns['Call Number']
+        tr_rows = []
+        statement_rows = []
+        for idx, row, matching_rows in batch:
+            # Doc. No. found - set the Doc Call Number
+            call_numbers = [str(home_call_numbers[pos]) for pos in matching_rows
+                            if home_call_numbers[pos]]
+            self.call_numbers[idx] = ', '.join(call_numbers) if call_numbers else ''
             
-            if verified:
-                self.client_df.at[idx, 'Result'] = 'Verified'
-                if len(verified) > 1:
-                    self.client_df.at[idx, 'Note'] = 'duplicated'
-            elif mismatches:
+            formatted_str = str(row.get('Formatted', '')).strip().upper()
+            if self.profile.is_tr_formatted(formatted_str):
+                tr_rows.append((idx, row, formatted_str, matching_rows))
+            else:
+                statement_rows.append((idx, row, formatted_str, matching_rows))
+        
+        if tr_rows:
+            self._evaluate_tr_rows(tr_rows)
+        if statement_rows:
+            self._evaluate_statement_rows(statement_rows)
+    
+    @staticmethod
+    def _pair_arrays(rows):
+        """Flat (client row, candidate) pairs of rows [(..., matching_rows)].
+        
+        Returns (row number of each pair, distinct home positions, index of
+        each pair's position in them, candidates per row)."""
+        counts = np.fromiter((len(item[-1]) for item in rows), dtype=np.int64, count=len(rows))
+        pair_rows = np.repeat(np.arange(len(rows)), counts)
+        positions = np.fromiter((pos for item in rows for pos in item[-1]), dtype=np.int64,
+                                count=int(counts.sum()))
+        unique_positions, pair_home = np.unique(positions, return_inverse=True)
+        return pair_rows, unique_positions, pair_home, counts
+    
+    def _date_key(self, value):
+        """Day ordinal of a date value, -1 when it does not parse (as compare_dates)."""
+        parsed = self.parse_date(value, self.date_formats)
+        return parsed.toordinal() if parsed is not None else -1
+    
+    @staticmethod
+    def _memoized(memo, function, values):
+        """function(value) for each value, computed once per distinct value."""
+        results = []
+        for value in values:
+            try:
+                result = memo[value]
+            except KeyError:
+                result = memo[value] = function(value)
+            results.append(result)
+        return results
+    
+    def _formatted_home_values(self, positions):
+        """Prepared home values of the Formatted comparison, per home position.
+        
+        Returns (normalized TR Revision Description, upper-case Revision
+        Description, date key, mismatch text) lists. They are computed once
+        per home row and kept until the store cache is cleared."""
+        prepared = self.formatted_home_values
+        home_rev_descs = self.home_columns['Revision Description']
+        home_rev_nums = self.home_columns['Revision Num']
+        home_rev_dates = self.home_columns['Revision Date']
+        for pos in [pos for pos in positions if pos not in prepared]:
+            home_rev_desc = str(home_rev_descs[pos])
+            home_rev_num = str(home_rev_nums[pos]).strip()
+            home_rev_date = home_rev_dates[pos]
+            mismatch_details = []
+            if home_rev_num:
+                mismatch_details.append(f"Rev. Num: {home_rev_num}")
+            if home_rev_date and not pd.isna(home_rev_date):
+                mismatch_details.append(f"Rev. Date: {str(home_rev_date)}")
+            prepared[pos] = (
+                self.normalize_tr_string(home_rev_desc.strip()),
+                home_rev_desc.upper(),
+                self._date_key(home_rev_date),
+                '/ '.join(mismatch_details) if mismatch_details else 'Mismatch',
+            )
+        values = [prepared[pos] for pos in positions]
+        return [list(column) for column in zip(*values)] if values else [[], [], [], []]
+    
+    def _evaluate_tr_rows(self, rows):
+        """TR rows of evaluate_formatted."""
+        pair_rows, unique_positions, pair_home, counts = self._pair_arrays(rows)
+        home_normalized, _, home_dates, home_details = self._formatted_home_values(
+            unique_positions.tolist()
+        )
+        home_normalized = np.array(home_normalized, dtype=str)
+        home_dates = np.array(home_dates, dtype=np.int64)
+        
+        # Per client row: normalized Revision No. and date key
+        client_normalized = np.array(self._memoized(
+            self.client_tr_memo, self.normalize_tr_string, (row.get('Revision No.') for _, row, _, _ in rows)
+        ), dtype=str)
+        client_dates = np.array(self._memoized(
+            self.client_date_memo, self._date_key, (row.get('Rev. Date') for _, row, _, _ in rows)
+        ), dtype=np.int64)
+        
+        # Decision per pair: TR contained in the Revision Description and same date
+        pair_desc = home_normalized[pair_home]
+        rev_match = (pair_desc != '') & (np.char.find(pair_desc, client_normalized[pair_rows]) >= 0)
+        date_match = client_dates[pair_rows] == home_dates[pair_home]
+        verified = rev_match & date_match
+        
+        # Per row: verified count and the first mismatching candidate
+        verified_counts = np.bincount(pair_rows, weights=verified, minlength=len(rows)).astype(np.int64)
+        mismatch_pairs = np.flatnonzero(~verified)
+        mismatch_rows, first_mismatch = np.unique(pair_rows[mismatch_pairs], return_index=True)
+        first_details = dict(zip(mismatch_rows.tolist(),
+                                 pair_home[mismatch_pairs[first_mismatch]].tolist()))
+        
+        for number, (idx, row, formatted_str, matching_rows) in enumerate(rows):
+            verified_count = int(verified_counts[number])
+            mismatch_count = int(counts[number]) - verified_count
+            if verified_count:
+                self.results[idx] = 'Verified'
+                if verified_count > 1:
+                    self.notes[idx] = 'duplicated'
+            elif mismatch_count:
                 # TR found in title but revision/date mismatch
-                self.client_df.at[idx, 'Result'] = mismatches[0]['details']
-                
-                if len(mismatches) > 1:
-                    current_note = self.client_df.at[idx, 'Note']
+                self.results[idx] = home_details[first_details[number]]
+                if mismatch_count > 1:
+                    current_note = self.notes[idx]
                     if pd.isna(current_note) or str(current_note).strip() == '':
-                        self.client_df.at[idx, 'Note'] = 'duplicated'
+                        self.notes[idx] = 'duplicated'
             else:
                 # Doc. No. found but no TR matches at all
-                self.client_df.at[idx, 'Result'] = 'TR not found'
-            
-            return True
+                self.results[idx] = 'TR not found'
+            logger.debug(f"  Row {idx + 1} TR comparison: '{client_normalized[number]}' against "
+                         f"{len(matching_rows)} candidates, {verified_count} verified -> {self.results[idx]}")
+    
+    def _evaluate_statement_rows(self, rows):
+        """Rows of evaluate_formatted whose Formatted value is not TR."""
+        pair_rows, unique_positions, pair_home, counts = self._pair_arrays(rows)
+        _, home_upper, _, _ = self._formatted_home_values(unique_positions.tolist())
+        home_upper = np.array(home_upper, dtype=str)
         
-        else:
-            # Formatted has a specific value (like STATEMENT number)
-            # Compare this value with Revision Description
-            found = False
-            for match in matching_rows:
-                rev_desc = str(match.get('Revision Description', ''))
-                
-                if formatted_str in rev_desc.upper():
-                    found = True
-                    self.client_df.at[idx, 'Result'] = 'Verified'
-                    break
-            
-            if not found:
-                self.client_df.at[idx, 'Result'] = f'{formatted_str} not found in Revision Description'
-            
-            return True
-
+        formatted = np.array([formatted_str for _, _, formatted_str, _ in rows], dtype=str)
+        found = np.char.find(home_upper[pair_home], formatted[pair_rows]) >= 0
+        found_counts = np.bincount(pair_rows, weights=found, minlength=len(rows))
+        
+        for number, (idx, row, formatted_str, matching_rows) in enumerate(rows):
+            if found_counts[number]:
+                self.results[idx] = 'Verified'
+            else:
+                self.results[idx] = f'{formatted_str} not found in Revision Description'
+            logger.debug(f"  Row {idx + 1} Formatted '{formatted_str}' in Revision Description "
+                         f"of {len(matching_rows)} candidates -> {self.results[idx]}")
@@ -0,0 +1,294 @@
+import logging
+import math
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import wraps
+import numpy as np
+
+# Strategy methods of RevisionComparator timed during a dry run
+TIMED_STRATEGIES = [
+    'find_by_document_number',
+    'fallbacks_hopeless',
+    'find_by_title_keywords',
+    'find_by_revision_description',
+    'compare_revision_and_date',
+]
+
+# Result categories reported by the dry run, by ResultGenerator.result_category
+CATEGORIES = {'verified': 'Verified', 'needs_check': 'Mismatch', 'not_found': 'Not found'}
+
+
+@contextmanager
+def quiet_comparison_log():
+    """Hide the comparison's progress and per-row log while sampling."""
+    compare_logger = logging.getLogger('compare_v2')
+    previous_level = compare_logger.level
+    compare_logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        compare_logger.setLevel(previous_level)
+
+
+def result_category(result):
+    """Category of a Result value, counted as in ResultGenerator.summary."""
+    from final_result_v1 import ResultGenerator
+    return CATEGORIES[ResultGenerator.result_category(result)]
+
+
+def formatted_category(formatted, profile):
+    """Category of a Formatted value used for stratification: none, TR or reference."""
+    text = '' if formatted is None or formatted != formatted else str(formatted).strip()
+    if not text:
+        return 'none'
+    return 'TR' if profile.is_tr_formatted(text.upper()) else 'reference'
+
+
+def wilson_interval(p, n, z=1.96):
+    """Wilson score interval for a proportion p observed on n rows."""
+    if n <= 0:
+        return 0.0, 1.0
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def stratified_sample(strata, sample_size, seed=0):
+    """Positions of a stratified random sample (proportional allocation).
+
+    strata is a list with the stratum of each row. Every stratum gets at
+    least one row. Returns (sorted positions, {stratum: (rows, sampled)}).
+    """
+    total = len(strata)
+    groups = {}
+    for pos, stratum in enumerate(strata):
+        groups.setdefault(stratum, []).append(pos)
+
+    rng = np.random.default_rng(seed)
+    positions = []
+    sizes = {}
+    for stratum, members in groups.items():
+        if sample_size >= total:
+            take = len(members)
+        else:
+            take = min(len(members), max(1, round(sample_size * len(members) / total)))
+        chosen = rng.choice(len(members), size=take, replace=False)
+        positions.extend(members[i] for i in chosen)
+        sizes[stratum] = (len(members), take)
+    return sorted(positions), sizes
+
+
+class StrategyTimer:
+    """Times the strategy methods of one RevisionComparator, per stratum.
+
+    The methods are wrapped on the comparator instance only, so the normal
+    comparison path carries no timing code.
+    """
+
+    def __init__(self, comparator, row_strata):
+        self.row_strata = row_strata
+        self.current = None
+        # stratum -> name -> [calls, seconds]
+        self.stats = {}
+
+        for name in TIMED_STRATEGIES + ['compare_row']:
+            setattr(comparator, name, self._wrap(name, getattr(comparator, name)))
+        comparator.evaluate_formatted_batch = self._wrap_batch(
+            comparator, comparator.evaluate_formatted_batch
+        )
+
+    def _wrap(self, name, method):
+        @wraps(method)
+        def timed(*args, **kwargs):
+            if name == 'compare_row':
+                self.current = self.row_strata[args[0]]
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                entry = self.stats.setdefault(self.current, {}).setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += time.perf_counter() - start
+        return timed
+    
+    def _wrap_batch(self, comparator, method):
+        """Rows with a Formatted value are decided together after their
+        window; the batch time is split evenly over the queued rows' strata
+        and added to their compare_row time."""
+        @wraps(method)
+        def timed():
+            queued = [self.row_strata[idx] for idx, _, _ in comparator.formatted_batch]
+            start = time.perf_counter()
+            try:
+                return method()
+            finally:
+                share = (time.perf_counter() - start) / len(queued) if queued else 0.0
+                for stratum in queued:
+                    by_name = self.stats.setdefault(stratum, {})
+                    entry = by_name.setdefault('evaluate_formatted', [0, 0.0])
+                    entry[0] += 1
+                    entry[1] += share
+                    by_name.setdefault('compare_row', [0, 0.0])[1] += share
+        return timed
+
+
+class DryRun:
+    """Runs the comparison on a stratified sample of client rows and
+    extrapolates runtime and result ratios to the whole client file.
+
+    Rows are stratified by Publi. Type and Formatted category (none, TR,
+    reference). Loading, formatting and indexing are run on the full files
+    and measured; comparison and writing costs are measured on the sample
+    and scaled by stratum size.
+    """
+
+    def __init__(self, tool, sample_size=500, seed=0):
+        self.tool = tool
+        self.sample_size = sample_size
+        self.seed = seed
+
+    def run(self):
+        """Run the dry run, print the report and return it as a dict."""
+        from pub_v1 import DataLoader
+        from compare_v2 import RevisionComparator
+        from final_result_v1 import open_result_writer
+
+        tool = self.tool
+        log = tool.log
+        log("=" * 50)
+        log("Dry run: estimating runtime and match rates from a sample")
+        log("=" * 50 + "\n")
+
+        start = time.perf_counter()
+        loader = DataLoader(tool.client_file, tool.home_file, chunksize=tool.chunksize,
+                            profile=tool.profile)
+        client_df, home_df, home_store, home_index, _ = tool.prepare_inputs(
+            loader, save_formatted=False, fingerprint=False, audit=False,
+            history=False
+        )
+        prepare_seconds = time.perf_counter() - start
+
+        try:
+            total_rows = len(client_df)
+            publi_types = client_df['Publi. Type'].tolist() if 'Publi. Type' in client_df.columns \
+                else [''] * total_rows
+            formatted = client_df['Formatted'].tolist() if 'Formatted' in client_df.columns \
+                else [''] * total_rows
+            strata = [
+                ('' if p is None or p != p else str(p).strip(), formatted_category(f, tool.profile))
+                for p, f in zip(publi_types, formatted)
+            ]
+            positions, sizes = stratified_sample(strata, self.sample_size, self.seed)
+            sample_df = client_df.iloc[positions].reset_index(drop=True)
+            sample_strata = [strata[pos] for pos in positions]
+            log(f"\nSample: {len(positions)} of {total_rows} client rows in {len(sizes)} strata")
+
+            comparator = RevisionComparator(sample_df, home_df, home_store=home_store,
+                                            home_index=home_index, profile=tool.profile,
+                                            suggestions=tool.suggestions)
+            timer = StrategyTimer(comparator, sample_strata)
+
+            # The per-row log is not wanted here; the estimate therefore
+            # excludes the cost of printing it to a terminal (--verbose)
+            fd, scratch_file = tempfile.mkstemp(prefix='dry_run_',
+                                                suffix=os.path.splitext(tool.output_file)[1] or '.xlsx')
+            os.close(fd)
+            write_seconds = 0.0
+            try:
+                with quiet_comparison_log(), \
+                        open_result_writer(scratch_file, comparator.output_columns) as writer:
+                    for idx, values in comparator.iter_comparisons():
+                        write_start = time.perf_counter()
+                        writer.write_row(values)
+                        write_seconds += time.perf_counter() - write_start
+                    # Saving the file (when the writer is closed) is part of
+                    # the writing cost
+                    write_start = time.perf_counter()
+                write_seconds += time.perf_counter() - write_start
+            finally:
+                os.remove(scratch_file)
+        finally:
+            tool.close_home(home_store)
+
+        report = self.estimate(total_rows, sizes, sample_strata, comparator.results,
+                               timer.stats, prepare_seconds, write_seconds)
+        self.print_report(report)
+        return report
+
+    def estimate(self, total_rows, sizes, sample_strata, results, stats,
+                 prepare_seconds, write_seconds):
+        """Extrapolate the sample measurements to the full client file."""
+        # Each sampled row stands for N_h / n_h rows of its stratum
+        weights = {stratum: rows / taken for stratum, (rows, taken) in sizes.items()}
+        sampled = len(sample_strata)
+
+        category_weight = {category: 0.0 for category in CATEGORIES.values()}
+        for stratum, result in zip(sample_strata, results):
+            category_weight[result_category(result)] += weights[stratum]
+
+        # Stratified variance of each ratio, turned into an effective sample
+        # size for the Wilson interval (equals the sample size when the
+        # allocation is exactly proportional)
+        ratios = {}
+        for category in CATEGORIES.values():
+            p = category_weight[category] / total_rows if total_rows else 0.0
+            variance = 0.0
+            for stratum, (rows, taken) in sizes.items():
+                hits = sum(1 for s, r in zip(sample_strata, results)
+                           if s == stratum and result_category(r) == category)
+                p_h = hits / taken
+                # A stratum sampled once has no variance estimate; use the
+                # conservative p(1 - p) = 0.25
+                spread = p_h * (1 - p_h) if taken > 1 else 0.25
+                variance += (rows / total_rows) ** 2 * spread / taken * (1 - taken / rows)
+            effective_n = p * (1 - p) / variance if variance > 0 else sampled
+            low, high = wilson_interval(p, min(effective_n, total_rows))
+            if sampled >= total_rows:
+                low = high = p
+            ratios[category] = {'estimate': p, 'low': low, 'high': high,
+                                'rows': round(p * total_rows)}
+
+        strategies = {}
+        for stratum, by_name in stats.items():
+            for name, (calls, seconds) in by_name.items():
+                entry = strategies.setdefault(name, {'calls': 0.0, 'seconds': 0.0})
+                entry['calls'] += calls * weights[stratum]
+                entry['seconds'] += seconds * weights[stratum]
+        compare_seconds = strategies.pop('compare_row', {'seconds': 0.0})['seconds']
+        write_total = write_seconds / sampled * total_rows if sampled else 0.0
+
+        return {
+            'total_rows': total_rows,
+            'sample_rows': sampled,
+            'strata': len(sizes),
+            'prepare_seconds': prepare_seconds,
+            'compare_seconds': compare_seconds,
+            'write_seconds': write_total,
+            'estimated_seconds': prepare_seconds + compare_seconds + write_total,
+            'strategies': strategies,
+            'ratios': ratios,
+        }
+
+    def print_report(self, report):
+        """Print the dry run estimate."""
+        log = self.tool.log
+        log("\n" + "=" * 50)
+        log("DRY RUN ESTIMATE")
+        log("=" * 50)
+        log(f"Client rows: {report['total_rows']} (sampled {report['sample_rows']} "
+            f"in {report['strata']} strata)")
+        log(f"Estimated runtime: {report['estimated_seconds']:.1f}s")
+        log(f"  Loading and indexing (measured): {report['prepare_seconds']:.1f}s")
+        log(f"  Comparison (extrapolated): {report['compare_seconds']:.1f}s")
+        log(f"  Writing results (extrapolated): {report['write_seconds']:.1f}s")
+        log("Estimated time per strategy:")
+        for name, entry in sorted(report['strategies'].items(), key=lambda item: -item[1]['seconds']):
+            log(f"  {name}: {entry['seconds']:.2f}s ({entry['calls']:.0f} calls)")
+        log("Estimated results (95% confidence interval):")
+        for category, ratio in report['ratios'].items():
+            log(f"  {category}: {ratio['estimate']:.1%} "
+                f"[{ratio['low']:.1%} - {ratio['high']:.1%}] (~{ratio['rows']} rows)")
+        log("=" * 50)
@@ -1,11 +1,16 @@
-
 import pandas as pd
 import numpy as np
+import logging
 import re
-import sys
+import csv
+import json
 from pathlib import Path
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+from pub_v1 import ExcelFormatter
+
+# Rows of an Excel sheet, including the header row
+EXCEL_MAX_ROWS = 1048576
+
+logger = logging.getLogger(__name__)
 
 
 class ResultGenerator:
@@ -16,34 +21,251 @@ class ResultGenerator:
         self.output_file_path = output_file_path
     
     def save_results(self):
-        """Save results to Excel file."""
+        """Save results to Excel file (OSError when it cannot be written)."""
         try:
             output_path = Path(self.output_file_path)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             ##comment this to save excel
 
             # self.client_df.to_csv(output_path, index=False)
-            print(f"Formatted client file saved to: {output_path}")
+            logger.info(f"Formatted client file saved to: {output_path}")
             
             self.client_df.to_excel(self.output_file_path, index=False, engine='openpyxl')
             # print(f"Results saved to: {self.output_file_path}")
             
-        except Exception as e:
-            print(f"Error saving results: {e}")
-            sys.exit(1)
+        except OSError as e:
+            logger.error(f"Error saving results: {e}")
+            raise
     
-    def generate_summary(self):
-        """Generate and print summary statistics."""
+    @staticmethod
+    def result_category(result):
+        """Summary category of one Result value: 'verified', 'not_found' when
+        it contains 'Not found', else 'needs_check' (empty results included),
+        as summary() counts them."""
+        if result == 'Verified':
+            return 'verified'
+        if 'Not found' in str(result):
+            return 'not_found'
+        return 'needs_check'
+    
+    def summary(self):
+        """Summary counts of the result frame (see result_category)."""
         total = len(self.client_df)
-        verified = len(self.client_df[self.client_df['Result'] == 'Verified'])
-        not_found = len(self.client_df[self.client_df['Result'].str.contains('Not found', na=False)])
+        results = self.client_df['Result'].astype(object)
+        verified = int((results == 'Verified').sum())
+        not_found = int(results.astype(str).str.contains('Not found', regex=False).sum())
         needs_check = total - verified - not_found
+        return {'total': total, 'verified': verified,
+                'needs_check': needs_check, 'not_found': not_found}
+    
+    def generate_summary(self):
+        """Generate and print summary statistics; returns the summary counts."""
+        summary = self.summary()
+        self.print_summary(summary)
+        return summary
+    
+    @staticmethod
+    def print_summary(summary):
+        """Log summary counts (as returned by summary())."""
+        total = summary['total']
+        verified = summary['verified']
+        needs_check = summary['needs_check']
+        not_found = summary['not_found']
         
-        print("\n" + "="*50)
-        print("COMPARISON SUMMARY")
-        print("="*50)
-        print(f"Total documents processed: {total}")
-        print(f"Verified (matching): {verified} ({verified/total*100:.1f}%)")
-        print(f"Needs checking (different): {needs_check} ({needs_check/total*100:.1f}%)")
-        print(f"Not found: {not_found} ({not_found/total*100:.1f}%)")
-        print("="*50 + "\n")
+        logger.info("\n" + "="*50)
+        logger.info("COMPARISON SUMMARY")
+        logger.info("="*50)
+        logger.info(f"Total documents processed: {total}")
+        logger.info(f"Verified (matching): {verified} ({verified/(total or 1)*100:.1f}%)")
+        logger.info(f"Needs checking (different): {needs_check} ({needs_check/(total or 1)*100:.1f}%)")
+        logger.info(f"Not found: {not_found} ({not_found/(total or 1)*100:.1f}%)")
+        logger.info("="*50 + "\n")
+
+
+class StreamingResultWriter:
+    """Writes result rows one at a time, as RevisionComparator.iter_comparisons yields them.
+    
+    Subclasses write one format; rows are flushed every flush_every rows so
+    finished results are on disk while the comparison is still running.
+    """
+    
+    def __init__(self, output_file_path, columns, flush_every=1000):
+        self.output_file_path = output_file_path
+        self.columns = list(columns)
+        self.flush_every = flush_every
+        self.rows_written = 0
+        Path(output_file_path).parent.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def clean_value(value):
+        """Missing values are written as empty cells (None)."""
+        if value is None:
+            return None
+        try:
+            if pd.isna(value):
+                return None
+        except (TypeError, ValueError):
+            pass
+        return value
+    
+    def write_row(self, values):
+        """Write one result row (values in self.columns order)."""
+        self._write([self.clean_value(v) for v in values])
+        self.rows_written += 1
+        if self.rows_written % self.flush_every == 0:
+            self.flush()
+    
+    def _write(self, values):
+        raise NotImplementedError
+    
+    def flush(self):
+        """Push written rows to disk (no-op for formats that are written at close)."""
+    
+    def add_sheet(self, sheet_name, columns, rows):
+        """Write a table besides the results; returns the number of rows.
+        
+        Formats without sheets write it to OUTPUT.<sheet name>.csv.
+        """
+        slug = re.sub(r'[^a-z0-9]+', '_', sheet_name.lower()).strip('_')
+        sheet_path = f"{self.output_file_path}.{slug}.csv"
+        count = 0
+        with open(sheet_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for values in rows:
+                writer.writerow(['' if v is None else v for v in map(self.clean_value, values)])
+                count += 1
+        logger.info(f"{sheet_name} saved to: {sheet_path}")
+        return count
+    
+    def close(self):
+        raise NotImplementedError
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CsvResultWriter(StreamingResultWriter):
+    """Streams result rows to a CSV file."""
+    
+    def __init__(self, output_file_path, columns, flush_every=1000):
+        super().__init__(output_file_path, columns, flush_every)
+        self.file = open(output_file_path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.columns)
+    
+    def _write(self, values):
+        self.writer.writerow(['' if v is None else v for v in values])
+    
+    def flush(self):
+        self.file.flush()
+    
+    def close(self):
+        self.file.close()
+
+
+class JsonlResultWriter(StreamingResultWriter):
+    """Streams result rows to a JSON Lines file (one object per row)."""
+    
+    def __init__(self, output_file_path, columns, flush_every=1000):
+        super().__init__(output_file_path, columns, flush_every)
+        self.file = open(output_file_path, 'w', encoding='utf-8')
+    
+    def _write(self, values):
+        # numpy scalars -> Python values
+        record = {
+            column: value.item() if hasattr(value, 'item') else value
+            for column, value in zip(self.columns, values)
+        }
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+    
+    def flush(self):
+        self.file.flush()
+    
+    def close(self):
+        self.file.close()
+
+
+class XlsxResultWriter(StreamingResultWriter):
+    """Streams result rows to an xlsx file with openpyxl's write-only mode.
+    
+    The red/yellow highlighting of ExcelFormatter.apply_colors is applied
+    while writing, so the workbook does not need to be loaded again.
+    """
+    
+    def __init__(self, output_file_path, columns, flush_every=1000, sheet_name='Sheet1'):
+        super().__init__(output_file_path, columns, flush_every)
+        # openpyxl is only loaded when an xlsx file is written
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        self.cell_class = WriteOnlyCell
+        self.wb = Workbook(write_only=True)
+        self.fills = {
+            ExcelFormatter.RED: ExcelFormatter.fill(ExcelFormatter.RED),
+            ExcelFormatter.YELLOW: ExcelFormatter.fill(ExcelFormatter.YELLOW),
+        }
+        self.result_pos = self.columns.index('Result') if 'Result' in self.columns else None
+        self.note_pos = self.columns.index('Note') if 'Note' in self.columns else None
+        # sheet_name None: the caller adds the sheets (start_sheet)
+        self.ws = None
+        if sheet_name:
+            self.start_sheet(sheet_name)
+    
+    def start_sheet(self, sheet_name):
+        """Continue writing rows on a new sheet, starting with the header row."""
+        self.ws = self.wb.create_sheet(sheet_name)
+        self.ws.append(self.columns)
+    
+    def _write(self, values):
+        row = list(values)
+        for pos, color_of in ((self.result_pos, ExcelFormatter.result_color),
+                              (self.note_pos, ExcelFormatter.note_color)):
+            if pos is None:
+                continue
+            color = color_of(row[pos])
+            if color:
+                cell = self.cell_class(self.ws, value=row[pos])
+                cell.fill = self.fills[color]
+                row[pos] = cell
+        self.ws.append(row)
+    
+    def add_sheet(self, sheet_name, columns, rows):
+        """Write a table on extra sheets of the workbook (no highlighting);
+        returns the number of rows. Sheets are continued as 'NAME 2', ... at
+        Excel's row limit."""
+        count = 0
+        sheet_number = 1
+        ws = self.wb.create_sheet(sheet_name)
+        ws.append(list(columns))
+        for values in rows:
+            if count and count % (EXCEL_MAX_ROWS - 1) == 0:
+                sheet_number += 1
+                ws = self.wb.create_sheet(f"{sheet_name} {sheet_number}")
+                ws.append(list(columns))
+            ws.append([self.clean_value(v) for v in values])
+            count += 1
+        return count
+    
+    def close(self):
+        self.wb.save(self.output_file_path)
+        self.wb.close()
+
+
+def open_result_writer(output_file_path, columns, split=None):
+    """Open the streaming writer for the output file's extension (.xlsx, .csv, .jsonl).
+    
+    split: options of split_output_v1.SplitXlsxResultWriter (max_rows,
+    by_publi_type, mode) to write an xlsx result as several parts.
+    """
+    suffix = Path(output_file_path).suffix.lower()
+    if suffix == '.csv':
+        return CsvResultWriter(output_file_path, columns)
+    if suffix in ('.jsonl', '.ndjson'):
+        return JsonlResultWriter(output_file_path, columns)
+    if split:
+        from split_output_v1 import SplitXlsxResultWriter
+        return SplitXlsxResultWriter(output_file_path, columns, **split)
+    return XlsxResultWriter(output_file_path, columns)
@@ -0,0 +1,157 @@
+import logging
+import os
+import sys
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def strings_bytes(texts):
+    """Size of a list of strings: its pointers and the string objects."""
+    return 8 * len(texts) + sum(sys.getsizeof(text) for text in texts if text is not None)
+
+
+def prefilter_bytes(prefilter):
+    """Size of an NgramPrefilter: trigram keys, position arrays and the dict."""
+    return sys.getsizeof(prefilter.postings) + sum(
+        sys.getsizeof(gram) + positions.nbytes + 112
+        for gram, positions in prefilter.postings.items()
+    )
+
+
+def estimate_home_bytes(home_df, home_index):
+    """Rough memory size of a deduplicated home frame and its HomeIndex.
+
+    The frame is measured by pandas, including its string payloads. The
+    index is measured by its arrays, trigram keys and the strings it makes
+    (titles, upper-cased descriptions); the column lists share the frame's
+    values. The SimilarityIndex is counted once it has been built, so an
+    entry is measured again after that (HomeCache.remeasure).
+    """
+    total = int(home_df.memory_usage(deep=True).sum())
+    for prefilter in (home_index.title_prefilter, home_index.rev_desc_prefilter):
+        total += prefilter_bytes(prefilter)
+    total += strings_bytes(home_index.titles) + strings_bytes(home_index.rev_desc_upper)
+    total += 8 * home_index.size * len(home_index.columns)
+    total += 150 * (len(home_index.doc_number_positions) + len(home_index.doc_key_positions))
+    if home_index.has_similarity_index:
+        similarity = home_index.similarity_index
+        # Its title prefilter is the HomeIndex one, counted above
+        total += strings_bytes(similarity.doc_numbers) + strings_bytes(similarity.call_numbers)
+        total += prefilter_bytes(similarity.doc_prefilter) + similarity.doc_gram_counts.nbytes
+    return total
+
+
+class HomeCache:
+    """Loaded, deduplicated and indexed home files kept for a session.
+
+    The GUI runs several client files against the same home file; with this
+    cache only the first run loads and indexes it. Entries are keyed by the
+    home file's path, modification time and size and by the rule profile, so
+    an edited file or another profile is loaded again. The cache is bounded
+    to max_mb (estimated); the least recently used entries are dropped first.
+    """
+
+    def __init__(self, max_mb=1024):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(home_file, profile):
+        """(path, mtime, size, profile fingerprint) of a home file."""
+        stat = os.stat(home_file)
+        return (os.path.abspath(home_file), stat.st_mtime_ns, stat.st_size, profile.fingerprint())
+
+    def lookup(self, key, audit_file=None):
+        """Return (home_df, home_index) of a cached home file, or None.
+
+        With audit_file the duplicate list made when the entry was loaded is
+        written there again; an entry loaded without a list is a miss then,
+        so the home file is loaded again and the list made.
+        """
+        entry = self.entries.get(key)
+        if entry is None or (audit_file and entry['audit'] is None):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        if audit_file and entry['audit'] is not None:
+            try:
+                with open(audit_file, 'wb') as f:
+                    f.write(entry['audit'])
+                logger.info(f"Removed duplicates listed in: {audit_file}")
+            except OSError as e:
+                logger.warning(f"Warning: could not write the duplicate audit file ({e})")
+        return entry['home_df'], entry['home_index']
+
+    def store(self, key, home_df, home_index, audit_file=None):
+        """Keep a loaded home file (and the duplicate list written to
+        audit_file, if any), then evict to the size limit."""
+        audit = None
+        if audit_file:
+            try:
+                with open(audit_file, 'rb') as f:
+                    audit = f.read()
+            except OSError:
+                pass
+        size = estimate_home_bytes(home_df, home_index) + len(audit or b'')
+        if size > self.max_bytes:
+            logger.info(f"Home data ({size / 1048576:.0f} MB) is larger than the home cache, not cached")
+            return
+        # Older versions of the same file are never used again
+        for old_key in [old_key for old_key in self.entries if old_key[0] == key[0]]:
+            del self.entries[old_key]
+        self.entries[key] = {
+            'home_df': home_df,
+            'home_index': home_index,
+            'audit': audit,
+            'size': size,
+        }
+        self.evict(keep=key)
+
+    def remeasure(self, key):
+        """Estimate an entry's size again (e.g. after its SimilarityIndex was
+        built) and evict to the size limit; a too large entry is dropped."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry['size'] = (estimate_home_bytes(entry['home_df'], entry['home_index'])
+                         + len(entry['audit'] or b''))
+        if entry['size'] > self.max_bytes:
+            del self.entries[key]
+            logger.info(f"Home data ({entry['size'] / 1048576:.0f} MB) is larger than the home cache, "
+                        f"no longer cached")
+            return
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        """Drop least recently used entries until the cache fits max_mb."""
+        for key in list(self.entries):
+            if self.total_bytes() <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            del self.entries[key]
+            logger.info(f"Home cache: evicted {os.path.basename(key[0])}")
+
+    def resize(self, max_mb):
+        """Change the limit (0 empties the cache)."""
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        if not self.max_bytes:
+            self.entries.clear()
+        self.evict()
+
+    def clear(self):
+        """Drop all entries."""
+        self.entries.clear()
+
+    def total_bytes(self):
+        return sum(entry['size'] for entry in self.entries.values())
+
+    def status(self):
+        """One-line description for the status bar."""
+        return (f"Home cache: {len(self.entries)} file(s), "
+                f"{self.total_bytes() / 1048576:.0f} of {self.max_bytes / 1048576:.0f} MB, "
+                f"{self.hits} hit(s), {self.misses} miss(es)")
@@ -0,0 +1,534 @@
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime
+import pandas as pd
+from pub_v1 import DataLoader, InputError, HOME_COLUMNS
+import compare_v2
+
+logger = logging.getLogger(__name__)
+
+# Maps the home file headers to the SQLite column names.
+HOME_DB_COLUMNS = {
+    'Call Number': 'call_number',
+    'Document Number': 'document_number',
+    'Title': 'title',
+    'Revision Description': 'revision_description',
+    'Revision Num': 'revision_num',
+    'Revision Date': 'revision_date',
+}
+
+
+class RevisionState:
+    """SQLite aggregate: the distinct values of a column, sorted and joined with '; '."""
+
+    def __init__(self):
+        self.values = set()
+
+    def step(self, value):
+        self.values.add('' if value is None else value)
+
+    def finalize(self):
+        return '; '.join(sorted(self.values))
+
+
+class HomeStore:
+    """Persistent SQLite store of the home (HAECO) master file.
+
+    Rows are keyed by 'Call Number' + 'Revision Description' (the same key
+    HomeProcessor uses for duplicate removal, first occurrence wins).
+    Document Number (stripped, and as canonical_doc_key) and Call Number
+    have B-tree indexes, Title and
+    Revision Description are covered by an FTS5 trigram index when the
+    SQLite build supports it.
+
+    Every import is a snapshot (imports table). With track_versions the
+    store also keeps the revision history of the home documents: per Call
+    Number + Document Number, the Revision Num and Revision Date values are
+    recorded in home_versions only for the snapshots where they changed.
+    """
+
+    def __init__(self, db_path='home_store.db', cache_mb=None, track_versions=True):
+        self.db_path = db_path
+        # The store may be filled in a worker thread and queried from the main thread
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # Staging data goes to temporary files, not memory
+        self.conn.execute("PRAGMA temp_store = FILE")
+        if cache_mb:
+            # Negative cache_size is in KiB
+            self.conn.execute(f"PRAGMA cache_size = {-int(cache_mb * 1024)}")
+        # Used by the import to fill doc_canon
+        self.conn.create_function('canonical_doc_key', 1, self._canonical_key, deterministic=True)
+        # Used by the import to summarize a document's revision values
+        self.conn.create_aggregate('revision_state', 1, RevisionState)
+        # Used by the scans without FTS: Python's upper case (SQLite's upper()
+        # only folds ASCII)
+        self.conn.create_function('py_upper', 1, self._upper_text, deterministic=True)
+        self.track_versions = track_versions
+        self.has_fts = False
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create tables, indexes and FTS triggers if they do not exist."""
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS home (
+                row_key TEXT PRIMARY KEY,
+                call_number TEXT,
+                document_number TEXT,
+                doc_key TEXT,
+                title TEXT,
+                revision_description TEXT,
+                revision_num TEXT,
+                revision_date TEXT,
+                row_order INTEGER NOT NULL,
+                row_hash TEXT NOT NULL,
+                doc_canon TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_home_doc_key ON home(doc_key);
+            CREATE INDEX IF NOT EXISTS idx_home_call_number ON home(call_number);
+            CREATE TABLE IF NOT EXISTS imports (
+                import_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT,
+                imported_at TEXT,
+                total_rows INTEGER,
+                inserted INTEGER,
+                updated INTEGER,
+                deleted INTEGER
+            );
+            -- Revision history: one row per document (Call Number + stripped
+            -- Document Number, '' when missing) and snapshot where its
+            -- revision values changed; NULL values mean it was removed
+            CREATE TABLE IF NOT EXISTS home_versions (
+                call_number TEXT NOT NULL,
+                doc_key TEXT NOT NULL,
+                import_id INTEGER NOT NULL,
+                revision_nums TEXT,
+                revision_dates TEXT,
+                PRIMARY KEY (call_number, doc_key, import_id)
+            ) WITHOUT ROWID;
+            -- Latest revision values per document, compared on each import
+            CREATE TABLE IF NOT EXISTS home_versions_current (
+                call_number TEXT NOT NULL,
+                doc_key TEXT NOT NULL,
+                revision_nums TEXT,
+                revision_dates TEXT,
+                PRIMARY KEY (call_number, doc_key)
+            ) WITHOUT ROWID;
+        """)
+
+        # Stores created before the canonical key get the column and its values
+        columns = [row['name'] for row in self.conn.execute("PRAGMA table_info(home)")]
+        if 'doc_canon' not in columns:
+            self.conn.execute("ALTER TABLE home ADD COLUMN doc_canon TEXT")
+            self.conn.execute("UPDATE home SET doc_canon = canonical_doc_key(doc_key)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_home_doc_canon ON home(doc_canon)")
+        
+        try:
+            self.conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS home_fts USING fts5(
+                    title, revision_description,
+                    content='home', content_rowid='rowid',
+                    tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS home_fts_ai AFTER INSERT ON home BEGIN
+                    INSERT INTO home_fts(rowid, title, revision_description)
+                    VALUES (new.rowid, new.title, new.revision_description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS home_fts_ad AFTER DELETE ON home BEGIN
+                    INSERT INTO home_fts(home_fts, rowid, title, revision_description)
+                    VALUES ('delete', old.rowid, old.title, old.revision_description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS home_fts_au AFTER UPDATE OF title, revision_description ON home BEGIN
+                    INSERT INTO home_fts(home_fts, rowid, title, revision_description)
+                    VALUES ('delete', old.rowid, old.title, old.revision_description);
+                    INSERT INTO home_fts(rowid, title, revision_description)
+                    VALUES (new.rowid, new.title, new.revision_description);
+                END;
+            """)
+            self.has_fts = True
+        except sqlite3.OperationalError as e:
+            # Older SQLite builds have no FTS5 or no trigram tokenizer,
+            # searches then fall back to a streaming scan.
+            logger.warning(f"Warning: FTS5 trigram index not available ({e}), using scans")
+
+        self.conn.commit()
+
+    @staticmethod
+    def _clean(value):
+        """Convert a pandas value to the stored text (None for missing)."""
+        if pd.isna(value):
+            return None
+        return str(value)
+
+    @staticmethod
+    def _upper_text(value):
+        """Upper-cased text as the comparator sees it: a missing value is 'NAN' (str(nan))."""
+        return 'NAN' if value is None else str(value).upper()
+
+    @staticmethod
+    def _canonical_key(doc_key):
+        """canonical_doc_key for SQL; NULL for missing or empty keys."""
+        if doc_key is None:
+            return None
+        # Looked up on the module so that profiling_v1.CallCounters counts it
+        return compare_v2.canonical_doc_key(doc_key) or None
+    
+    @staticmethod
+    def _row_key(call_number, revision_description):
+        """Build the duplicate key; missing values differ from empty strings."""
+        call_part = '\x00' if call_number is None else call_number
+        desc_part = '\x00' if revision_description is None else revision_description
+        return f"{call_part}\x1f{desc_part}"
+
+    @staticmethod
+    def _row_hash(values):
+        """Hash of the stored values, used to detect changed rows."""
+        joined = '\x1f'.join('\x00' if v is None else v for v in values)
+        return hashlib.sha1(joined.encode('utf-8')).hexdigest()
+
+    def import_csv(self, home_file_path, chunksize=50000, profile=None):
+        """Import a home export as an incremental upsert.
+
+        The file is read in chunks into a staging table, then only new or
+        changed rows are written to 'home' and rows that are no longer in the
+        export are deleted. Memory use depends on the chunk size, not on the
+        size of the home file. Raises FileNotFoundError for a missing file and
+        InputError (a ValueError) for an unreadable one; the store is left
+        unchanged.
+        """
+        logger.info(f"Importing home file into store: {self.db_path}")
+
+        conn = self.conn
+        conn.execute("DROP TABLE IF EXISTS temp.import_stage")
+        conn.execute("""
+            CREATE TEMP TABLE import_stage (
+                row_key TEXT PRIMARY KEY,
+                call_number TEXT,
+                document_number TEXT,
+                doc_key TEXT,
+                title TEXT,
+                revision_description TEXT,
+                revision_num TEXT,
+                revision_date TEXT,
+                row_order INTEGER NOT NULL,
+                row_hash TEXT NOT NULL
+            )
+        """)
+
+        total_rows = 0
+        try:
+            loader = DataLoader(None, home_file_path, profile=profile)
+            for chunk in loader.iter_home_chunks(chunksize):
+                missing_columns = [col for col in HOME_COLUMNS if col not in chunk.columns]
+                if missing_columns:
+                    raise ValueError(f"Missing columns in home file: {missing_columns}")
+
+                records = []
+                for values in chunk[HOME_COLUMNS].itertuples(index=False, name=None):
+                    call_number, document_number, title, rev_desc, rev_num, rev_date = (
+                        self._clean(v) for v in values
+                    )
+                    stored = (call_number, document_number, title, rev_desc, rev_num, rev_date)
+                    doc_key = document_number.strip() if document_number is not None else None
+                    records.append((
+                        self._row_key(call_number, rev_desc),
+                        call_number, document_number, doc_key, title,
+                        rev_desc, rev_num, rev_date,
+                        total_rows, self._row_hash(stored)
+                    ))
+                    total_rows += 1
+
+                # First occurrence of a key wins, as in HomeProcessor.remove_duplicates
+                conn.executemany(
+                    "INSERT OR IGNORE INTO import_stage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    records
+                )
+        except FileNotFoundError:
+            conn.rollback()
+            raise
+        except (ValueError, KeyError, UnicodeDecodeError, pd.errors.ParserError) as e:
+            conn.rollback()
+            raise InputError(f"Could not import the home file: {e}") from e
+        except Exception:
+            conn.rollback()
+            raise
+
+        if self.track_versions:
+            self._stage_version_keys()
+
+        inserted = conn.execute("""
+            SELECT COUNT(*) FROM import_stage s
+            WHERE NOT EXISTS (SELECT 1 FROM home h WHERE h.row_key = s.row_key)
+        """).fetchone()[0]
+        updated = conn.execute("""
+            SELECT COUNT(*) FROM import_stage s JOIN home h ON h.row_key = s.row_key
+            WHERE h.row_hash != s.row_hash
+        """).fetchone()[0]
+
+        conn.execute("""
+            INSERT INTO home (
+                row_key, call_number, document_number, doc_key, title,
+                revision_description, revision_num, revision_date, row_order, row_hash,
+                doc_canon
+            )
+            SELECT row_key, call_number, document_number, doc_key, title,
+                   revision_description, revision_num, revision_date, row_order, row_hash,
+                   canonical_doc_key(doc_key)
+            FROM import_stage WHERE true
+            ON CONFLICT(row_key) DO UPDATE SET
+                call_number = excluded.call_number,
+                document_number = excluded.document_number,
+                doc_key = excluded.doc_key,
+                title = excluded.title,
+                revision_description = excluded.revision_description,
+                revision_num = excluded.revision_num,
+                revision_date = excluded.revision_date,
+                row_order = excluded.row_order,
+                row_hash = excluded.row_hash,
+                doc_canon = excluded.doc_canon
+            WHERE home.row_hash != excluded.row_hash
+        """)
+        # A line added or removed near the top shifts the position of every
+        # later row; only row_order is written then (not a change, and the
+        # FTS index is not touched)
+        conn.execute("""
+            UPDATE home SET row_order = (
+                SELECT s.row_order FROM import_stage s WHERE s.row_key = home.row_key
+            )
+            WHERE EXISTS (
+                SELECT 1 FROM import_stage s
+                WHERE s.row_key = home.row_key AND s.row_order != home.row_order
+            )
+        """)
+        deleted = conn.execute("""
+            DELETE FROM home
+            WHERE row_key NOT IN (SELECT row_key FROM import_stage)
+        """).rowcount
+
+        import_id = conn.execute(
+            "INSERT INTO imports (source, imported_at, total_rows, inserted, updated, deleted) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (str(home_file_path), datetime.now().isoformat(timespec='seconds'),
+             total_rows, inserted, updated, deleted)
+        ).lastrowid
+        changed_documents = self._record_versions(import_id) if self.track_versions else 0
+        conn.commit()
+        conn.execute("DROP TABLE IF EXISTS temp.import_stage")
+        conn.execute("DROP TABLE IF EXISTS temp.version_keys")
+
+        logger.info(f"Home file read: {total_rows} rows")
+        logger.info(f"Store updated: {inserted} inserted, {updated} changed, {deleted} deleted")
+        if self.track_versions:
+            logger.info(f"Snapshot {import_id}: revision changes recorded for {changed_documents} documents")
+        logger.info(f"Home store contains: {self.count()} rows")
+
+        return {'total_rows': total_rows, 'inserted': inserted,
+                'updated': updated, 'deleted': deleted}
+
+    def _stage_version_keys(self):
+        """Collect the documents touched by the staged import (before it is applied).
+
+        These are the keys of new and changed staged rows, plus the old keys
+        of changed and removed rows. On the first import with version
+        tracking every document is taken, to record the baseline.
+        """
+        conn = self.conn
+        conn.execute("DROP TABLE IF EXISTS temp.version_keys")
+        conn.execute("""
+            CREATE TEMP TABLE version_keys (
+                call_number TEXT NOT NULL,
+                doc_key TEXT NOT NULL,
+                PRIMARY KEY (call_number, doc_key)
+            ) WITHOUT ROWID
+        """)
+        self._version_baseline = conn.execute(
+            "SELECT 1 FROM home_versions_current LIMIT 1"
+        ).fetchone() is None
+        if self._version_baseline:
+            return
+        conn.execute("""
+            INSERT OR IGNORE INTO version_keys
+            SELECT COALESCE(s.call_number, ''), COALESCE(s.doc_key, '')
+            FROM import_stage s LEFT JOIN home h ON h.row_key = s.row_key
+            WHERE h.row_key IS NULL OR h.row_hash != s.row_hash
+        """)
+        conn.execute("""
+            INSERT OR IGNORE INTO version_keys
+            SELECT COALESCE(h.call_number, ''), COALESCE(h.doc_key, '')
+            FROM home h LEFT JOIN import_stage s ON s.row_key = h.row_key
+            WHERE s.row_key IS NULL OR h.row_hash != s.row_hash
+        """)
+
+    def _record_versions(self, import_id):
+        """Record the revision values of the touched documents that changed
+        in snapshot import_id; returns the number of documents recorded."""
+        conn = self.conn
+        if self._version_baseline:
+            conn.execute("""
+                INSERT OR IGNORE INTO version_keys
+                SELECT DISTINCT COALESCE(call_number, ''), COALESCE(doc_key, '') FROM home
+            """)
+        # Current revision values of the touched documents (one pass over
+        # home with primary key lookups into version_keys)
+        conn.execute("DROP TABLE IF EXISTS temp.version_stage")
+        conn.execute("""
+            CREATE TEMP TABLE version_stage AS
+            SELECT k.call_number, k.doc_key,
+                   revision_state(h.revision_num) AS revision_nums,
+                   revision_state(h.revision_date) AS revision_dates
+            FROM home h CROSS JOIN version_keys k
+                ON k.call_number = COALESCE(h.call_number, '')
+               AND k.doc_key = COALESCE(h.doc_key, '')
+            GROUP BY k.call_number, k.doc_key
+        """)
+        changed = conn.execute("""
+            INSERT INTO home_versions (call_number, doc_key, import_id, revision_nums, revision_dates)
+            SELECT s.call_number, s.doc_key, ?, s.revision_nums, s.revision_dates
+            FROM version_stage s LEFT JOIN home_versions_current c
+                ON c.call_number = s.call_number AND c.doc_key = s.doc_key
+            WHERE c.call_number IS NULL
+               OR c.revision_nums IS NOT s.revision_nums
+               OR c.revision_dates IS NOT s.revision_dates
+        """, (import_id,)).rowcount
+        # Touched documents without rows left were removed from the export
+        removed = conn.execute("""
+            INSERT INTO home_versions (call_number, doc_key, import_id, revision_nums, revision_dates)
+            SELECT c.call_number, c.doc_key, ?, NULL, NULL
+            FROM version_keys k JOIN home_versions_current c
+                ON c.call_number = k.call_number AND c.doc_key = k.doc_key
+            WHERE NOT EXISTS (
+                SELECT 1 FROM version_stage s
+                WHERE s.call_number = k.call_number AND s.doc_key = k.doc_key
+            )
+        """, (import_id,)).rowcount
+        conn.execute("""
+            DELETE FROM home_versions_current
+            WHERE EXISTS (
+                SELECT 1 FROM version_keys k
+                WHERE k.call_number = home_versions_current.call_number
+                  AND k.doc_key = home_versions_current.doc_key
+            )
+        """)
+        conn.execute("""
+            INSERT INTO home_versions_current (call_number, doc_key, revision_nums, revision_dates)
+            SELECT call_number, doc_key, revision_nums, revision_dates FROM version_stage
+        """)
+        conn.execute("DROP TABLE IF EXISTS temp.version_stage")
+        return changed + removed
+
+    def revision_history(self, call_number, doc_key, limit=None):
+        """Recorded revision values of a document, newest snapshot first.
+
+        Returns dicts with import_id, source, imported_at, revision_nums and
+        revision_dates (None when the document was removed). Uses the
+        home_versions primary key, no historical export is read.
+        """
+        rows = self.conn.execute(
+            "SELECT v.import_id, i.source, i.imported_at, v.revision_nums, v.revision_dates "
+            "FROM home_versions v JOIN imports i ON i.import_id = v.import_id "
+            "WHERE v.call_number = ? AND v.doc_key = ? "
+            "ORDER BY v.import_id DESC" + (" LIMIT ?" if limit else ""),
+            (call_number or '', doc_key or '') + ((limit,) if limit else ())
+        )
+        return [dict(row) for row in rows]
+
+    def count(self):
+        """Number of (deduplicated) home rows in the store."""
+        return self.conn.execute("SELECT COUNT(*) FROM home").fetchone()[0]
+
+    @staticmethod
+    def _to_record(row):
+        """Convert a SQLite row to the dict layout of DataFrame.to_dict('records')."""
+        return {
+            column: (float('nan') if row[db_column] is None else row[db_column])
+            for column, db_column in HOME_DB_COLUMNS.items()
+        }
+
+    @staticmethod
+    def _fts_phrase(text):
+        """Quote a string as an FTS5 phrase."""
+        return '"' + text.replace('"', '""') + '"'
+
+    def _select(self, where='', params=()):
+        """Run a SELECT on home in file order and return (rowid, record) pairs."""
+        rows = self.conn.execute(
+            f"SELECT rowid, * FROM home {where} ORDER BY row_order", params
+        )
+        return [(row['rowid'], self._to_record(row)) for row in rows]
+
+    def _fts_candidates(self, query):
+        """Return rows whose rowid matches an FTS5 query, in file order."""
+        return self._select(
+            "WHERE rowid IN (SELECT rowid FROM home_fts WHERE home_fts MATCH ?)",
+            (query,)
+        )
+
+    def find_by_document_number(self, doc_no_str):
+        """Exact lookup on the stripped Document Number (B-tree index)."""
+        return self._select("WHERE doc_key = ?", (doc_no_str,))
+
+    def find_by_document_key(self, doc_key):
+        """Lookup on the canonical Document Number key (B-tree index)."""
+        return self._select("WHERE doc_canon = ?", (doc_key,))
+    
+    def find_title_candidates(self, doc_no_str, words):
+        """Return a superset of rows whose Title may contain doc_no_str or all words.
+
+        The caller is responsible for the exact check. Trigram phrases need at
+        least three characters; shorter or non-ASCII queries (and stores
+        without FTS5) are filtered by a scan in SQLite instead, so only the
+        matching rows are fetched.
+        """
+        usable_words = [w for w in words if len(w) >= 3]
+        if (not self.has_fts or len(doc_no_str) < 3 or not doc_no_str.isascii()
+                or (words and not usable_words)):
+            # Same test as RevisionComparator.title_contains_doc_no (a
+            # missing Title is compared as 'nan')
+            where = "instr(COALESCE(title, 'nan'), ?) > 0"
+            params = [doc_no_str]
+            if words:
+                where += " OR (" + " AND ".join(["instr(py_upper(title), ?) > 0"] * len(words)) + ")"
+                params.extend(word.upper() for word in words)
+            return self._select(f"WHERE {where}", params)
+
+        query = self._fts_phrase(doc_no_str)
+        if usable_words:
+            words_query = ' AND '.join(self._fts_phrase(w) for w in usable_words)
+            query = f"{query} OR ({words_query})"
+        return self._fts_candidates(f"title : ({query})")
+
+    def find_revision_description_candidates(self, doc_no_str):
+        """Return a superset of rows whose Revision Description may contain doc_no_str."""
+        if not self.has_fts or len(doc_no_str) < 3 or not doc_no_str.isascii():
+            return self._select("WHERE instr(py_upper(revision_description), ?) > 0",
+                                (doc_no_str.upper(),))
+        return self._fts_candidates(f"revision_description : ({self._fts_phrase(doc_no_str)})")
+
+    def iter_rows(self, batch_size=10000):
+        """Yield every (rowid, record) in file order, fetched in batches."""
+        cursor = self.conn.execute("SELECT rowid, * FROM home ORDER BY row_order")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row['rowid'], self._to_record(row)
+
+    def similarity_index(self):
+        """SimilarityIndex (compare_v2) over the stored Document Numbers and Titles."""
+        from compare_v2 import SimilarityIndex
+        
+        rows = self.conn.execute(
+            "SELECT document_number, title, call_number FROM home ORDER BY row_order"
+        ).fetchall()
+        nan = float('nan')
+        return SimilarityIndex(
+            [nan if row['document_number'] is None else row['document_number'] for row in rows],
+            [nan if row['title'] is None else row['title'] for row in rows],
+            [nan if row['call_number'] is None else row['call_number'] for row in rows],
+        )
+    
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
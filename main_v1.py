@@ -1,76 +1,555 @@
-import pandas as pd
-import numpy as np
-from datetime import datetime
-import re
 import sys
-from pathlib import Path
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-from pub_v1 import *
-from compare_v2 import *
-from final_result_v1 import *
+import argparse
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from profiles_v1 import load_profile, available_profiles, RULES_VERSION
+from checkpoint_v1 import Checkpoint, fingerprint_inputs, fingerprint_run
+from result_cache_v1 import DEFAULT_CACHE_DIR
+from adaptive_plan_v1 import DEFAULT_STATS_FILE
+
+# pandas, numpy and openpyxl are imported by the pipeline modules (pub_v1,
+# compare_v2, final_result_v1, home_store_v1). They are imported in the steps
+# that use them, so --help, argument errors and the GUI window start without
+# loading them.
+
+logger = logging.getLogger(__name__)
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB (None if it cannot be measured)."""
+    if sys.platform == 'win32':
+        # Windows has no resource module; psutil reports the peak working set
+        try:
+            import psutil
+        except ImportError:
+            return None
+        peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)
+        return peak / (1024 * 1024) if peak is not None else None
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
 
 
 class DocumentRevisionTool:
     """Main orchestrator class that coordinates all operations."""
     
-    def __init__(self, client_file, home_file, output_file='result_one.xlsx'):
+    def __init__(self, client_file, home_file, output_file='result_one.xlsx', home_db=None,
+                 chunksize=None, profile='default', memory_budget_mb=None, window_size=1000,
+                 resume=False, log=None, suggestions=3, stats_file=None,
+                 cache_dir=None, cache_max_mb=500, force_recompute=False,
+                 formatted_client_file=None, split_rows=None, split_by_publi_type=False,
+                 split_mode='files', duplicates_file=None, coverage=False, history_db=None,
+                 home_cache=None):
         self.client_file = client_file
         self.home_file = home_file
         self.output_file = output_file
-        self.formatted_client_file = 'client_formatted.csv'
+        # Optional CSV of the formatted client rows (not written by default)
+        self.formatted_client_file = formatted_client_file
+        # Optional SQLite home store path; the home file is upserted into it
+        # and searched through its indexes instead of in memory
+        self.home_db = home_db
+        # Rows per chunk when reading the CSV files (None reads each file at once)
+        self.chunksize = chunksize
+        # Operator rule profile (name in profiles/ or JSON path), compiled once
+        self.profile = load_profile(profile)
+        # Out-of-core mode: the home file is imported chunk by chunk into a
+        # SQLite store on disk (home_db, or a temporary spill file) and only
+        # compact indexes and the rows being compared are kept in memory
+        self.memory_budget_mb = memory_budget_mb
+        self.spill_db = None
+        # Home rows cached from the store while comparing (--memory-budget)
+        self.store_cache_rows = None
+        # Client rows compared per window before they are written out
+        self.window_size = window_size
+        # Finished rows are checkpointed next to the output file; with resume
+        # a run interrupted on the same inputs continues after the last
+        # checkpointed row instead of starting again
+        self.resume = resume
+        self.checkpoint_file = f"{output_file}.checkpoint.jsonl"
+        # Home rows removed as duplicates are listed in duplicates_file, if
+        # given (in-memory mode; the home store drops them by its key on import)
+        self.duplicates_file = duplicates_file
+        # Reverse coverage: home rows not found for any client row are added
+        # as an 'Unmatched Home' sheet (OUTPUT.unmatched_home.csv for CSV/JSONL)
+        self.coverage = coverage
+        # Optional SQLite store of home snapshots: each run imports the home
+        # file as a new snapshot (only the changed documents are recorded)
+        # and mismatches get a 'Home Changed' note from that history. It can
+        # be the same file as home_db
+        self.history_db = history_db
+        self.history_store = None
+        # Optional session HomeCache (home_cache_v1): the GUI keeps the loaded,
+        # deduplicated and indexed home file between runs (in-memory mode)
+        self.home_cache = home_cache
+        # Steps 1-3 run in worker threads; run_profiled turns this off for
+        # cProfile, which only sees the calling thread
+        self.concurrent_prepare = True
+        # Near-miss suggestions per 'Not found' row; off in out-of-core mode
+        # because the similarity index holds every home Document Number and Title
+        self.suggestions = 0 if memory_budget_mb else suggestions
+        # Per-profile strategy statistics of earlier runs, used and updated by
+        # the adaptive strategy plan (None, the default: do not store them)
+        self.stats_file = stats_file
+        # Finished results are cached by a fingerprint of both input files,
+        # the rule profile and the rules version; an identical re-run copies
+        # the cached file (cache_dir None, the default, disables the cache;
+        # force_recompute ignores cached results but still stores the new one)
+        self.cache_dir = cache_dir
+        self.cache_max_mb = cache_max_mb
+        self.force_recompute = force_recompute
+        # xlsx results are split into parts of at most split_rows rows and/or
+        # one part per Publi. Type, as part files or sheets with an index
+        # sheet; results beyond Excel's row limit are always split
+        self.split_rows = split_rows
+        self.split_by_publi_type = split_by_publi_type
+        self.split_mode = split_mode
+        # Progress messages: the module logger, or the GUI's console logger
+        self.log = log or logger.info
     
-    def run(self):
-        """Execute the complete comparison workflow."""
-        print("="*50)
-        print("Document Revision Comparison Tool")
-        print("="*50 + "\n")
+    def prepare_client(self, loader, save_formatted=True):
+        """Client branch: load and format the client file."""
+        from pub_v1 import ClientFormatter
         
         # Step 1: Load data
-        print("Step 1: Loading data files...")
-        loader = DataLoader(self.client_file, self.home_file)
-        client_df, home_df = loader.load_files()
+        self.log("Step 1: Loading client file...")
+        client_df = loader.load_client_file()
         
         # Step 2: Format client file
-        print("\nStep 2: Formatting client file...")
-        formatter = ClientFormatter(client_df)
-        # client_df = formatter.create_formatted_column()
+        self.log("\nStep 2: Formatting client file...")
+        formatter = ClientFormatter(client_df, profile=self.profile)
         client_df = formatter.process()
-        formatter.save_formatted_file(self.formatted_client_file)
+        if save_formatted and self.formatted_client_file:
+            formatter.save_formatted_file(self.formatted_client_file)
+        return client_df
+    
+    def prepare_home(self, loader, audit=True):
+        """Home branch: load the home file, remove duplicates and build the indexes.
+        
+        Returns (home_df, home_store, home_index); with a home store the
+        DataFrame and index are None because searches go to SQLite. With
+        audit the removed duplicates are written to duplicates_file, if set. With a
+        home_cache, a home file loaded earlier in the session is reused.
+        """
+        from pub_v1 import DataLoader, HomeProcessor
+        from compare_v2 import HomeIndex
+        from home_store_v1 import HomeStore
+        
+        self.log("Step 1: Loading home file...")
+        if self.home_db or self.memory_budget_mb:
+            db_path = self.home_db
+            if db_path is None:
+                fd, self.spill_db = tempfile.mkstemp(prefix='home_spill_', suffix='.db')
+                os.close(fd)
+                db_path = self.spill_db
+            
+            chunksize = self.chunksize or 50000
+            cache_mb = None
+            if self.memory_budget_mb:
+                # A parsed chunk, the SQLite page cache and the home rows
+                # cached from the store while comparing each get a quarter
+                budget_rows = DataLoader.chunksize_for_budget(self.home_file, self.memory_budget_mb)
+                if not self.chunksize:
+                    chunksize = budget_rows
+                self.store_cache_rows = budget_rows
+                cache_mb = self.memory_budget_mb * 0.25
+                self.log(f"Memory budget: {self.memory_budget_mb} MB "
+                      f"(chunks of {chunksize} rows, {budget_rows} cached store rows, "
+                      f"spill store: {db_path})")
+            
+            # The revision history of a temporary spill store is never read
+            home_store = HomeStore(db_path, cache_mb=cache_mb, track_versions=not self.spill_db)
+            home_store.import_csv(self.home_file, chunksize=chunksize, profile=self.profile)
+            # Duplicates are already removed by the store key
+            self.log(f"\nStep 3: Using home store: {db_path} ({home_store.count()} rows)")
+            return None, home_store, None
+        
+        cache_key = None
+        if self.home_cache is not None:
+            cache_key = self.home_cache.make_key(self.home_file, self.profile)
+            cached = self.home_cache.lookup(cache_key,
+                                            audit_file=self.duplicates_file if audit else None)
+            if cached is not None:
+                self.log("Steps 1-3: Using the home data loaded earlier in this session")
+                home_df, home_index = cached
+                if self.suggestions and not home_index.has_similarity_index:
+                    # Built here rather than lazily while comparing, so the
+                    # entry's size includes it
+                    home_index.similarity_index
+                    self.home_cache.remeasure(cache_key)
+                return home_df, None, home_index
+        
+        home_df = loader.load_home_file()
         
         # Step 3: Process home file
-        print("\nStep 3: Processing home file...")
-        home_processor = HomeProcessor(home_df)
+        self.log("\nStep 3: Processing home file...")
+        home_processor = HomeProcessor(home_df,
+                                       audit_file=self.duplicates_file if audit else None)
         home_df = home_processor.remove_duplicates()
+        home_index = HomeIndex(home_df)
+        # The duplicate list written here is kept with the entry (a hit
+        # writes it again)
+        if cache_key is not None:
+            if self.suggestions:
+                # The suggestion index is part of the cached entry's size
+                home_index.similarity_index
+            self.home_cache.store(cache_key, home_df, home_index,
+                                  audit_file=self.duplicates_file if audit else None)
+        return home_df, None, home_index
+    
+    def prepare_history(self, home_store=None):
+        """Import the home file as a new snapshot into history_db.
         
-        # Step 4: Compare documents
-        print("\nStep 4: Comparing documents...")
-        comparator = RevisionComparator(client_df, home_df)
-        result_df = comparator.process_comparisons()
+        The home store is reused when it is the same database. Sets
+        self.history_store (None without history_db).
+        """
+        from home_store_v1 import HomeStore
         
-        # Step 5: Save results
-        print("\nStep 5: Saving results...")
-        result_gen = ResultGenerator(result_df, self.output_file)
-        result_gen.save_results()
+        if not self.history_db:
+            self.history_store = None
+        elif home_store is not None and self.home_db and \
+                os.path.abspath(self.home_db) == os.path.abspath(self.history_db):
+            self.history_store = home_store
+        else:
+            self.log(f"Importing home snapshot into: {self.history_db}")
+            self.history_store = HomeStore(self.history_db)
+            self.history_store.import_csv(self.home_file, chunksize=self.chunksize or 50000,
+                                          profile=self.profile)
+        return self.history_store
+    
+    def split_options(self, total_rows=0):
+        """Options of the split result writer for this run (None: one sheet)."""
+        from split_output_v1 import EXCEL_MAX_ROWS
+        if (os.path.splitext(self.output_file)[1] or '.xlsx').lower() != '.xlsx':
+            return None
+        if not (self.split_rows or self.split_by_publi_type or total_rows >= EXCEL_MAX_ROWS):
+            return None
+        return {'max_rows': self.split_rows, 'by_publi_type': self.split_by_publi_type,
+                'mode': self.split_mode}
+    
+    def side_output_files(self):
+        """Files a run writes besides the result: the formatted client CSV,
+        the duplicate list and the coverage CSV of non-xlsx results."""
+        files = [path for path in (self.formatted_client_file, self.duplicates_file) if path]
+        suffix = (os.path.splitext(self.output_file)[1] or '.xlsx').lower()
+        if self.coverage and suffix != '.xlsx':
+            files.append(f"{self.output_file}.unmatched_home.csv")
+        return files
+    
+    def cached_result(self, cache, cache_key):
+        """Copy a cached result to the output file; returns its summary or None."""
+        import shutil
+        from final_result_v1 import ResultGenerator
+        
+        suffix = os.path.splitext(self.output_file)[1] or '.xlsx'
+        hit = cache.lookup(cache_key, suffix)
+        if hit is None:
+            return None
         
-        # Step 6: Apply formatting
-        print("\nStep 6: Applying cell colors...")
-        excel_formatter = ExcelFormatter(self.output_file)
-        excel_formatter.apply_colors()
+        cached_path, meta = hit
+        output_dir = os.path.dirname(self.output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        shutil.copyfile(cached_path, self.output_file)
+        self.log(f"Identical inputs and rules were compared before ({meta.get('created', '?')}); "
+                 f"using the cached result")
+        self.log(f"Results saved to: {self.output_file}")
+        ResultGenerator.print_summary(meta['summary'])
+        return meta['summary']
+    
+    def prepare_inputs(self, loader, save_formatted=True, fingerprint=True, audit=True,
+                       history=True):
+        """Steps 1-3 for both files.
+        
+        The client branch (load + format) and the home branch (load + dedup +
+        index) are independent and run concurrently; they are only joined
+        before the comparison. With fingerprint the inputs are hashed at the
+        same time. save_formatted and audit allow writing the formatted client
+        file and the duplicate audit file. With history and history_db the
+        home file is also imported as a snapshot (self.history_store).
+        Without concurrent_prepare the same steps run one after the other.
+        Returns (client_df, home_df, home_store, home_index, input_hash).
+        """
+        separate_history = history and self.history_db and not (
+            self.home_db and os.path.abspath(self.home_db) == os.path.abspath(self.history_db)
+        )
+        if not self.concurrent_prepare:
+            self.log("Steps 1-3: Loading and preparing client and home files...")
+            input_hash = None
+            if fingerprint:
+                input_hash = fingerprint_inputs(self.client_file, self.home_file, self.profile)
+            if separate_history:
+                self.prepare_history()
+            home_df, home_store, home_index = self.prepare_home(loader, audit)
+            client_df = self.prepare_client(loader, save_formatted=save_formatted)
+            if history and not separate_history:
+                self.prepare_history(home_store)
+            return client_df, home_df, home_store, home_index, input_hash
+        
+        self.log("Steps 1-3: Loading and preparing client and home files concurrently...")
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix='prepare') as executor:
+            hash_future = None
+            if fingerprint:
+                hash_future = executor.submit(fingerprint_inputs, self.client_file,
+                                              self.home_file, self.profile)
+            history_future = executor.submit(self.prepare_history) if separate_history else None
+            home_future = executor.submit(self.prepare_home, loader, audit)
+            client_df = self.prepare_client(loader, save_formatted=save_formatted)
+            home_df, home_store, home_index = home_future.result()
+            input_hash = hash_future.result() if hash_future else None
+            if history_future:
+                history_future.result()
+            elif history:
+                self.prepare_history(home_store)
+        return client_df, home_df, home_store, home_index, input_hash
+    
+    def close_home(self, home_store):
+        """Close the home and history stores and remove the spill file, if any."""
+        if home_store is not None:
+            home_store.close()
+        if self.history_store is not None and self.history_store is not home_store:
+            self.history_store.close()
+        self.history_store = None
+        if self.spill_db:
+            os.remove(self.spill_db)
+            self.spill_db = None
+    
+    def dry_run(self, sample_size=500, seed=0):
+        """Estimate runtime and result ratios from a stratified sample (see dry_run_v1)."""
+        from dry_run_v1 import DryRun
+        return DryRun(self, sample_size=sample_size, seed=seed).run()
+    
+    def run_profiled(self, mode='cprofile', output_path=None):
+        """Run the workflow under a profiler (see profiling_v1.profile_call).
+        
+        The profile goes next to the output file unless output_path is given.
+        """
+        from profiling_v1 import profile_call, default_profile_output
+        output_path = output_path or default_profile_output(mode, self.output_file)
+        # cProfile does not follow the prepare worker threads, so the inputs
+        # are prepared serially; the sampling profiler sees all threads
+        concurrent_prepare = self.concurrent_prepare
+        self.concurrent_prepare = mode != 'cprofile'
+        try:
+            return profile_call(self.run, mode=mode, output_path=output_path, log=self.log)
+        finally:
+            self.concurrent_prepare = concurrent_prepare
+    
+    def run(self):
+        """Execute the complete comparison workflow."""
+        from pub_v1 import DataLoader, HOME_COLUMNS
+        from compare_v2 import RevisionComparator
+        from final_result_v1 import ResultGenerator, open_result_writer
+        from adaptive_plan_v1 import StrategyStatsFile
+        from result_cache_v1 import ResultCache
+        
+        self.log("="*50)
+        self.log("Document Revision Comparison Tool")
+        self.log("="*50 + "\n")
+        
+        # A finished result for the same inputs and rules is served from the
+        # cache; split part files are not cached, only single result files,
+        # and neither are runs with a snapshot history (each run is a snapshot)
+        # or runs that write files besides the result (a hit would skip them)
+        cache = cache_key = input_hash = None
+        split = self.split_options()
+        side_files = self.side_output_files()
+        if self.cache_dir and side_files and not self.force_recompute:
+            self.log(f"Result cache not used: the run also writes {', '.join(side_files)}")
+        if (self.cache_dir and not (split and split['mode'] == 'files') and not self.history_db
+                and not side_files):
+            cache = ResultCache(self.cache_dir, self.cache_max_mb)
+            input_hash = fingerprint_inputs(self.client_file, self.home_file, self.profile)
+            suffix = os.path.splitext(self.output_file)[1] or '.xlsx'
+            options = {'suggestions': self.suggestions}
+            if split:
+                options['split'] = split
+            if self.coverage:
+                options['coverage'] = True
+            cache_key = cache.make_key(input_hash, RULES_VERSION, suffix, options)
+            if not self.force_recompute:
+                summary = self.cached_result(cache, cache_key)
+                if summary is not None:
+                    self.log("Process completed successfully!")
+                    return None
+        
+        # Steps 1-3: load and prepare both files; the input hashes identify
+        # the run for the checkpoint
+        loader = DataLoader(self.client_file, self.home_file, chunksize=self.chunksize,
+                            profile=self.profile)
+        client_df, home_df, home_store, home_index, prepared_hash = self.prepare_inputs(
+            loader, fingerprint=input_hash is None
+        )
+        input_hash = input_hash or prepared_hash
+        split = self.split_options(len(client_df))
+        if split and split['mode'] == 'files':
+            cache = None
+        
+        # Steps 4-6: Compare documents and stream finished rows to the output
+        # file while the comparison runs (cell colors are applied while writing)
+        self.log("\nSteps 4-6: Comparing documents and writing results...")
+        stats_store = StrategyStatsFile(self.stats_file) if self.stats_file else None
+        stored_stats = stats_store.load(self.profile.name) if stats_store else None
+        comparator = RevisionComparator(client_df, home_df, home_store=home_store,
+                                        home_index=home_index, profile=self.profile,
+                                        store_cache_rows=self.store_cache_rows,
+                                        suggestions=self.suggestions,
+                                        strategy_stats=stored_stats,
+                                        history_store=self.history_store)
+        # A checkpoint is only resumed by a run writing the same rows
+        checkpoint_options = {
+            'suggestions': self.suggestions,
+            'history_db': os.path.abspath(self.history_db) if self.history_db else None,
+            'coverage': self.coverage,
+        }
+        checkpoint = Checkpoint(self.checkpoint_file,
+                                fingerprint_run(input_hash, comparator.output_columns,
+                                                checkpoint_options))
+        
+        restored_rows = checkpoint.load() if self.resume else {}
+        start = len(restored_rows)
+        if restored_rows:
+            comparator.restore_results(restored_rows)
+            self.log(f"Resuming from checkpoint: {start}/{len(client_df)} rows already compared")
+        elif self.resume:
+            self.log("No usable checkpoint found, comparing all rows")
+        
+        try:
+            checkpoint.start(restored_rows)
+            with open_result_writer(self.output_file, comparator.output_columns,
+                                    split=split) as writer:
+                for idx, values in comparator.iter_output_rows(0, start):
+                    writer.write_row(values)
+                for idx, values in comparator.iter_comparisons(window_size=self.window_size,
+                                                               start=start):
+                    writer.write_row(values)
+                    checkpoint.record(idx, comparator.result_values(idx))
+                if self.coverage:
+                    if start:
+                        self.log("Note: the coverage report only counts the rows compared "
+                                 "since the resume")
+                    unmatched = writer.add_sheet('Unmatched Home', HOME_COLUMNS,
+                                                 comparator.unmatched_home_rows())
+                    self.log(f"Home rows not matched by any client row: {unmatched}")
+            # The run is complete, the checkpoint is no longer needed
+            checkpoint.remove()
+            self.log(f"Results saved to: {self.output_file}")
+        finally:
+            # Keeps the rows finished so far if the run was interrupted
+            checkpoint.close()
+            self.close_home(home_store)
+        if stats_store:
+            stats_store.save(self.profile.name, comparator.plan.stats)
+        result_df = comparator.result_frame()
+        result_gen = ResultGenerator(result_df, self.output_file)
         
         # Step 7: Generate summary
-        print("\nStep 7: Generating summary...")
-        result_gen.generate_summary()
+        self.log("\nStep 7: Generating summary...")
+        summary = result_gen.generate_summary()
+        if cache:
+            cache.store(cache_key, self.output_file, {'summary': summary})
         
-        print("Process completed successfully!")
+        self.log(comparator.plan.report())
+        peak = peak_memory_mb()
+        if peak is not None:
+            self.log(f"Peak memory: {peak:.1f} MB")
+        self.log("Process completed successfully!")
+        return result_df
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Compare client document revisions against the home (HAECO) file."
+    )
+    parser.add_argument('client_file', nargs='?', help="Client CSV file")
+    parser.add_argument('home_file', nargs='?', help="Home CSV file")
+    parser.add_argument('output_file', nargs='?', default='result_one.xlsx',
+                        help="Result Excel file (default: result_one.xlsx)")
+    parser.add_argument('--home-db', metavar='PATH',
+                        help="Import the home file into this SQLite store and search it there")
+    parser.add_argument('--chunksize', type=int, metavar='ROWS',
+                        help="Read the CSV files in chunks of this many rows")
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help="Out-of-core mode for very large home files: read the home file "
+                             "in chunks sized for this budget and spill it to a SQLite store")
+    parser.add_argument('--profile', default='default', metavar='NAME',
+                        help="Operator rule profile: a name from profiles/ or a JSON file "
+                             f"(available: {', '.join(available_profiles())})")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted run from its checkpoint "
+                             "(OUTPUT.checkpoint.jsonl) if the inputs are unchanged")
+    parser.add_argument('--suggestions', type=int, default=3, metavar='K',
+                        help="Closest home documents suggested for each 'Not found' row "
+                             "(default: 3, 0 disables; not used with --memory-budget)")
+    parser.add_argument('--stats-file', default=DEFAULT_STATS_FILE, metavar='PATH',
+                        help="Per-profile strategy statistics used by the adaptive "
+                             f"strategy plan (default: {DEFAULT_STATS_FILE})")
+    parser.add_argument('--profile-run', nargs='?', const='cprofile',
+                        choices=['cprofile', 'sampling'],
+                        help="Profile the run with cProfile (pstats file, default) or the "
+                             "sampling profiler (collapsed stacks); also counts calls of "
+                             "the hot comparison functions")
+    parser.add_argument('--profile-out', metavar='PATH',
+                        help="Profile output file (default: OUTPUT.pstats / OUTPUT.collapsed)")
+    parser.add_argument('--force', action='store_true',
+                        help="Recompute even if the result of identical inputs is cached")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, metavar='DIR',
+                        help=f"Result cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--cache-size', type=float, default=500, metavar='MB',
+                        help="Result cache size limit; least recently used results are "
+                             "removed first (default: 500, 0 disables the cache)")
+    parser.add_argument('--split-rows', type=int, metavar='ROWS',
+                        help="Split an xlsx result into parts of at most this many rows "
+                             "(results beyond Excel's 1,048,576-row limit are always split)")
+    parser.add_argument('--split-by-type', action='store_true',
+                        help="Split an xlsx result into one part per Publi. Type")
+    parser.add_argument('--split-mode', choices=['files', 'sheets'], default='files',
+                        help="Write the parts as OUTPUT_<part>.xlsx files written in "
+                             "parallel (default) or as sheets of the output file; the "
+                             "output file gets an index sheet linking the parts")
+    parser.add_argument('--coverage', action='store_true',
+                        help="Also list the home rows that no client row matched "
+                             "(extra 'Unmatched Home' sheet, or OUTPUT.unmatched_home.csv)")
+    parser.add_argument('--history-db', metavar='PATH',
+                        help="SQLite store of home snapshots: import the home file as a new "
+                             "snapshot and note on mismatches when the home revision last "
+                             "changed (can be the --home-db file)")
+    parser.add_argument('--duplicates-file', metavar='PATH',
+                        help="CSV listing the home rows removed as duplicates "
+                             "(not written by default)")
+    parser.add_argument('--save-formatted', metavar='PATH',
+                        help="Also save the formatted client rows to this CSV file")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Compare a stratified sample of client rows only and estimate "
+                             "the runtime and result ratios of the full run")
+    parser.add_argument('--sample-size', type=int, default=500, metavar='ROWS',
+                        help="Client rows compared in a dry run (default: 500)")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Also print the comparison trace of every client row")
+    return parser.parse_args(argv)
+
+
+def configure_logging(verbose=False):
+    """Show the pipeline's log messages on stdout, as plain lines (DEBUG adds
+    the per-row trace)."""
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO,
+                        format='%(message)s', stream=sys.stdout)
 
 
 def main():
     """Main entry point."""
-    if len(sys.argv) >= 3:
-        client_file = sys.argv[1]
-        home_file = sys.argv[2]
-        output_file = sys.argv[3] if len(sys.argv) >= 4 else 'result_one.xlsx'
+    args = parse_args()
+    configure_logging(args.verbose)
+    if args.client_file and args.home_file:
+        client_file = args.client_file
+        home_file = args.home_file
+        output_file = args.output_file
     else:
         # Use sample files for testing
         client_file = 'client_origin.csv'
@@ -83,9 +562,37 @@ def main():
         print(f"  Home: {home_file}")
         print(f"  Output: {output_file}\n")
     
-    tool = DocumentRevisionTool(client_file, home_file, output_file)
-    tool.run()
-
+    from pub_v1 import InputError
+    try:
+        tool = DocumentRevisionTool(client_file, home_file, output_file, home_db=args.home_db,
+                                    chunksize=args.chunksize, profile=args.profile,
+                                    memory_budget_mb=args.memory_budget, resume=args.resume,
+                                    suggestions=args.suggestions, stats_file=args.stats_file,
+                                    cache_dir=args.cache_dir if args.cache_size > 0 else None,
+                                    cache_max_mb=args.cache_size, force_recompute=args.force,
+                                    formatted_client_file=args.save_formatted,
+                                    split_rows=args.split_rows,
+                                    split_by_publi_type=args.split_by_type,
+                                    split_mode=args.split_mode,
+                                    duplicates_file=args.duplicates_file,
+                                    coverage=args.coverage,
+                                    history_db=args.history_db)
+        if args.dry_run:
+            tool.dry_run(sample_size=args.sample_size)
+        elif args.profile_run:
+            tool.run_profiled(args.profile_run, args.profile_out)
+        else:
+            tool.run()
+    except FileNotFoundError as e:
+        print(f"Error: File not found - {e}")
+        sys.exit(1)
+    except InputError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except OSError as e:
+        # Reading or writing a file failed (disk full, file open in Excel, ...)
+        print(f"Error: {e}")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,193 @@
+import json
+import logging
+import re
+import copy
+from functools import lru_cache
+from pathlib import Path
+
+
+# Version of the matching rules implemented in compare_v2. Bump it when a
+# code change alters results; cached results of older versions are then
+# no longer used (result_cache_v1).
+RULES_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+# Directory with one JSON rule profile per operator (profiles/NAME.json)
+PROFILES_DIR = Path(__file__).resolve().parent / 'profiles'
+
+# Built-in rules; every JSON profile extends these (directly or via "extends").
+DEFAULT_PROFILE = {
+    'name': 'default',
+    # Raw header (stripped) -> header used by the pipeline
+    'client_headers': {},
+    'home_headers': {},
+    'revision': {
+        # A part after the first comma is kept only if it starts with one of these
+        'reference_keywords': ['STATEMENT'],
+        # Value put in Formatted for references, e.g. 'STATEMENT 5214' -> '5214'
+        'reference_pattern': r'STATEMENT\s+([\d\-A-Z]+)',
+        # Revisions containing this keyword (or a marker) are temporary revisions
+        'tr_keyword': 'TR',
+        'tr_markers': ['-'],
+        # Value put in Formatted for a TR after the comma, e.g. '5, TR01' -> 'TR01'
+        'tr_pattern': r'(TR\s*[\d\-]+)',
+        # Rows with more commas than this get no Formatted value
+        'max_commas': 1,
+        'strip_leading_zeros': True,
+        # Revision values that mean revision 0
+        'basic_values': ['BASIC', 'BAS'],
+    },
+    'date_formats': [
+        '%m/%d/%Y', '%d-%b-%y', '%d-%b-%Y', '%m/%d/%y',
+        '%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d-%m-%y'
+    ],
+}
+
+
+def merge_profile(base, override):
+    """Recursively merge a profile override into a base profile."""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_profile(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def available_profiles():
+    """Names of the built-in and JSON profiles."""
+    names = ['default']
+    if PROFILES_DIR.is_dir():
+        names += sorted(path.stem for path in PROFILES_DIR.glob('*.json') if path.stem != 'default')
+    return names
+
+
+def read_profile(name_or_path, _seen=None):
+    """Read a profile definition (dict) by name or JSON path, resolving "extends"."""
+    if name_or_path in (None, '', 'default'):
+        return copy.deepcopy(DEFAULT_PROFILE)
+
+    path = Path(name_or_path)
+    if path.suffix != '.json':
+        path = PROFILES_DIR / f"{name_or_path}.json"
+    if not path.is_file():
+        raise ValueError(f"Rule profile not found: {name_or_path}")
+
+    seen = _seen or set()
+    if str(path) in seen:
+        raise ValueError(f"Rule profile extends itself: {name_or_path}")
+    seen.add(str(path))
+
+    with open(path, encoding='utf-8') as f:
+        definition = json.load(f)
+
+    base = read_profile(definition.pop('extends', 'default'), seen)
+    definition.setdefault('name', path.stem)
+    return merge_profile(base, definition)
+
+
+@lru_cache(maxsize=None)
+def load_profile(name_or_path='default'):
+    """Load and compile a rule profile once; later calls return the cached one."""
+    profile = CompiledProfile(read_profile(name_or_path))
+    logger.info(f"Rule profile loaded: {profile.name}")
+    return profile
+
+
+class CompiledProfile:
+    """A rule profile compiled into regexes and vectorized column transforms."""
+
+    def __init__(self, definition):
+        self.definition = definition
+        self.name = definition.get('name', 'default')
+        self.client_headers = dict(definition.get('client_headers', {}))
+        self.home_headers = dict(definition.get('home_headers', {}))
+
+        revision = definition['revision']
+        self.reference_keywords = [kw.upper() for kw in revision['reference_keywords']]
+        self.tr_keyword = revision['tr_keyword'].upper()
+        self.tr_markers = list(revision['tr_markers'])
+        self.max_commas = int(revision['max_commas'])
+        self.strip_leading_zeros = bool(revision['strip_leading_zeros'])
+        self.basic_values = frozenset(value.upper() for value in revision['basic_values'])
+        self.date_formats = tuple(definition['date_formats'])
+
+        self.reference_regex = re.compile(revision['reference_pattern'], re.IGNORECASE)
+        self.tr_regex = re.compile(revision['tr_pattern'], re.IGNORECASE)
+        keywords = '|'.join(re.escape(kw) for kw in self.reference_keywords) or r'(?!)'
+        self.reference_keyword_regex = re.compile(rf'(?:{keywords})', re.IGNORECASE)
+
+    def fingerprint(self):
+        """Stable text of the compiled rules (used to key cached results)."""
+        return json.dumps(self.definition, sort_keys=True)
+
+    @staticmethod
+    def _text(series):
+        """Series as stripped strings, missing values as ''."""
+        return series.astype(object).where(series.notna(), '').astype(str).str.strip()
+
+    def _strip_zeros(self, series):
+        """Remove leading zeros, keeping at least one digit ('02' -> '2', '0' -> '0')."""
+        if not self.strip_leading_zeros:
+            return series
+        stripped = series.str.lstrip('0')
+        return stripped.where(stripped != '', '0')
+
+    def clean_revision_series(self, series):
+        """Vectorized Revision No. cleaning (see ClientFormatter.clean_revision_no)."""
+        text = self._text(series)
+        empty = text == ''
+        has_comma = text.str.contains(',', regex=False)
+
+        parts = text.str.split(',', n=1)
+        first = parts.str[0].str.strip()
+        second = parts.str[1].fillna('').str.strip()
+        keep = has_comma & second.str.match(self.reference_keyword_regex)
+
+        kept = self._strip_zeros(first) + ', ' + second
+        simple = self._strip_zeros(first.where(has_comma, text))
+
+        cleaned = simple.where(~keep, kept)
+        return cleaned.where(~empty, '')
+
+    def formatted_series(self, series):
+        """Vectorized Formatted column (see ClientFormatter.create_formatted_column)."""
+        # Imported here so that loading a profile (e.g. for --help) stays cheap
+        import numpy as np
+        import pandas as pd
+        
+        text = self._text(series)
+        upper = text.str.upper()
+        commas = text.str.count(',')
+
+        reference = upper.str.contains(self.reference_keyword_regex)
+        reference_value = text.str.extract(self.reference_regex, expand=False).fillna('')
+
+        has_tr = upper.str.contains(self.tr_keyword, regex=False)
+        after_comma = text.str.split(',', n=1).str[1].fillna('').str.strip()
+        tr_value = after_comma.str.extract(self.tr_regex, expand=False).str.strip()
+
+        is_tr = has_tr
+        for marker in self.tr_markers:
+            is_tr = is_tr | text.str.contains(marker, regex=False)
+
+        conditions = [
+            (commas > self.max_commas).to_numpy(),
+            reference.to_numpy(),
+            ((commas == 1) & has_tr & tr_value.notna()).to_numpy(),
+            is_tr.to_numpy(),
+        ]
+        choices = [
+            np.full(len(text), '', dtype=object),
+            reference_value.to_numpy(dtype=object),
+            tr_value.fillna('').to_numpy(dtype=object),
+            np.full(len(text), self.tr_keyword, dtype=object),
+        ]
+        formatted = np.select(conditions, choices, default='')
+        return pd.Series(formatted, index=series.index, dtype=object)
+
+    def is_tr_formatted(self, formatted_str):
+        """Formatted values containing the TR keyword use the TR comparison."""
+        return self.tr_keyword in formatted_str
@@ -0,0 +1,190 @@
+import inspect
+import sys
+import threading
+import time
+from collections import Counter
+
+# Functions of the comparison hot path that get call counters while a run
+# is profiled: (module, class or None, function name)
+HOT_FUNCTIONS = [
+    ('compare_v2', 'RevisionComparator', 'compare_row'),
+    ('compare_v2', 'RevisionComparator', 'find_by_document_number'),
+    ('compare_v2', 'RevisionComparator', 'fallbacks_hopeless'),
+    ('compare_v2', 'RevisionComparator', 'find_by_title_keywords'),
+    ('compare_v2', 'RevisionComparator', 'find_by_revision_description'),
+    ('compare_v2', 'RevisionComparator', 'queue_formatted'),
+    ('compare_v2', 'RevisionComparator', 'evaluate_formatted'),
+    ('compare_v2', 'RevisionComparator', 'compare_revision_and_date'),
+    ('compare_v2', 'RevisionComparator', 'compare_revisions'),
+    ('compare_v2', 'RevisionComparator', 'compare_dates'),
+    ('compare_v2', 'RevisionComparator', 'parse_date'),
+    ('compare_v2', 'RevisionComparator', 'normalize_basic_revision'),
+    ('compare_v2', 'RevisionComparator', 'title_contains_doc_no'),
+    ('compare_v2', 'RevisionComparator', 'mark_not_found'),
+    ('compare_v2', 'HomeIndex', 'title_candidate_positions'),
+    ('compare_v2', 'HomeIndex', 'revision_description_positions'),
+    ('compare_v2', 'SimilarityIndex', 'suggest'),
+    ('compare_v2', None, 'canonical_doc_key'),
+]
+
+PROFILE_MODES = ['cprofile', 'sampling']
+
+
+class CallCounters:
+    """Counts calls of the HOT_FUNCTIONS while active (context manager).
+
+    The functions are wrapped on entry and restored on exit, so normal runs
+    carry no counting code.
+    """
+
+    def __init__(self, functions=HOT_FUNCTIONS):
+        self.functions = functions
+        self.counts = Counter()
+        self.originals = []
+
+    def _counting(self, label, func):
+        counts = self.counts
+
+        def counted(*args, **kwargs):
+            counts[label] += 1
+            return func(*args, **kwargs)
+
+        counted.__name__ = getattr(func, '__name__', label)
+        counted.__wrapped__ = func
+        return counted
+
+    def __enter__(self):
+        for module_name, class_name, name in self.functions:
+            module = sys.modules.get(module_name) or __import__(module_name)
+            owner = getattr(module, class_name) if class_name else module
+            original = inspect.getattr_static(owner, name, None)
+            if original is None:
+                continue
+            label = f"{class_name}.{name}" if class_name else name
+            if isinstance(original, staticmethod):
+                wrapped = staticmethod(self._counting(label, original.__func__))
+            else:
+                wrapped = self._counting(label, original)
+            self.originals.append((owner, name, original))
+            setattr(owner, name, wrapped)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for owner, name, original in reversed(self.originals):
+            setattr(owner, name, original)
+        self.originals = []
+
+    def write(self, path):
+        """Write the counters as 'calls function' lines, most called first."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for label, count in self.counts.most_common():
+                f.write(f"{count}\t{label}\n")
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of the profiled threads at a fixed interval.
+
+    Threads that existed before start() (other than the calling thread, e.g.
+    the GUI main loop) are not sampled. The result is written in the
+    collapsed-stack format ('frame;frame;frame count' per line) read by
+    flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._ignored = set()
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        module = frame.f_globals.get('__name__', '?')
+        return f"{module}:{code.co_name}:{code.co_firstlineno}"
+
+    def _sample(self):
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident in self._ignored:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            stack.append(thread_names.get(ident, 'thread'))
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        current = threading.get_ident()
+        self._ignored = {thread.ident for thread in threading.enumerate()} - {current}
+        self._thread = threading.Thread(target=self._loop, name='sampler', daemon=True)
+        self._thread.start()
+        self._ignored.add(self._thread.ident)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        """Write the collapsed stacks, most sampled first."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def default_profile_output(mode, output_file):
+    """Profile file next to the result file: OUTPUT.pstats or OUTPUT.collapsed."""
+    return f"{output_file}.{'pstats' if mode == 'cprofile' else 'collapsed'}"
+
+
+def profile_call(func, mode='cprofile', output_path='profile.pstats', log=print):
+    """Call func under the deterministic (cProfile) or the sampling profiler.
+
+    Writes the profile to output_path (pstats or collapsed stacks) and the
+    hot-function call counters to output_path + '.counts.txt'. The files
+    contain function names and timings only, no input data. cProfile only
+    instruments the calling thread, so func should not hand work to other
+    threads in that mode; the sampling profiler samples every thread
+    started during the call.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode} (use {', '.join(PROFILE_MODES)})")
+
+    counters = CallCounters()
+    start = time.perf_counter()
+    if mode == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+        with counters:
+            profiler.enable()
+            try:
+                result = func()
+            finally:
+                profiler.disable()
+                profiler.dump_stats(output_path)
+    else:
+        profiler = SamplingProfiler()
+        with counters:
+            profiler.start()
+            try:
+                result = func()
+            finally:
+                profiler.stop()
+                profiler.write(output_path)
+    elapsed = time.perf_counter() - start
+
+    counts_path = f"{output_path}.counts.txt"
+    counters.write(counts_path)
+
+    log(f"\nProfile ({mode}, {elapsed:.1f}s) saved to: {output_path}")
+    log(f"Call counters saved to: {counts_path}")
+    for label, count in counters.counts.most_common(5):
+        log(f"  {label}: {count} calls")
+    return result
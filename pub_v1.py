@@ -1,50 +1,325 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import io
+import logging
 import re
 import sys
 from pathlib import Path
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+from profiles_v1 import load_profile
+
+logger = logging.getLogger(__name__)
+
+
+class InputError(ValueError):
+    """An input file or frame that cannot be loaded (missing columns, bad CSV, ...)."""
+
+# Columns of the home file read by the pipeline; other columns are skipped at load
+HOME_COLUMNS = [
+    'Call Number', 'Document Number', 'Title',
+    'Revision Description', 'Revision Num', 'Revision Date'
+]
+
+# Client columns that are compared as text (e.g. Revision No. '02' must stay '02').
+# Other client columns are loaded as-is because they are written to the result file.
+CLIENT_TEXT_COLUMNS = ['Doc. No.', 'Rev. Date', 'Revision No.', 'Publi. Type', 'Formatted']
+
+# Heavily repeated columns stored as categoricals: each distinct string is kept
+# once and rows hold small integer codes into that shared dictionary
+COMPACT_HOME_COLUMNS = ['Call Number', 'Document Number', 'Revision Num', 'Revision Date']
+COMPACT_CLIENT_COLUMNS = ['Doc. No.', 'Rev. Date', 'Publi. Type']
+
+# Magic bytes of compressed exports, checked so a compressed file is read
+# correctly even when its extension is just '.csv'
+COMPRESSION_MAGIC = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+    (b'BZh', 'bz2'),
+    (b'PK\x03\x04', 'zip'),
+    (b'\xfd7zXZ\x00', 'xz'),
+]
+
+
+def detect_compression(file_path):
+    """Return the pandas compression name for a file or a seekable file-like
+    object based on its first bytes (the object is rewound)."""
+    if hasattr(file_path, 'read'):
+        if not (hasattr(file_path, 'seekable') and file_path.seekable()):
+            return 'infer'
+        start = file_path.tell()
+        head = file_path.read(6)
+        file_path.seek(start)
+        if isinstance(head, str):
+            # Text streams are never compressed
+            return None
+    else:
+        try:
+            with open(file_path, 'rb') as f:
+                head = f.read(6)
+        except (TypeError, OSError):
+            # Unreadable paths: let pandas decide (and report the error)
+            return 'infer'
+    
+    for magic, compression in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def compact_columns(df, columns):
+    """Convert the given columns (if present) to categoricals in place and return df."""
+    for column in columns:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    return df
+
+
+def csv_engine():
+    """Use the multithreaded pyarrow parser when it is installed."""
+    try:
+        import pyarrow  # noqa: F401
+        return 'pyarrow'
+    except ImportError:
+        return 'c'
 
 
 class DataLoader:
-    """Handles loading and initial processing of CSV files."""
+    """Handles loading and initial processing of CSV files.
     
-    def __init__(self, client_file_path, home_file_path):
+    The client and home sources can be file paths, file-like objects or
+    DataFrames (see api_v1); DataFrames are typed and projected like files.
+    """
+    
+    def __init__(self, client_file_path, home_file_path, chunksize=None, profile=None,
+                 compact=True):
         self.client_file_path = client_file_path
         self.home_file_path = home_file_path
+        # Rows per chunk; when set, files are parsed chunk by chunk
+        self.chunksize = chunksize
+        # Rule profile (profiles_v1); its header mappings rename the columns
+        self.profile = profile or load_profile()
+        # Store repeated key columns as categoricals (see COMPACT_HOME_COLUMNS)
+        self.compact = compact
         self.client_df = None
         self.home_df = None
     
+    @staticmethod
+    def read_csv_typed(file_path, columns=None, text_columns=None, chunksize=None,
+                       header_map=None):
+        """Read a CSV file with projected columns and explicit string dtypes.
+        
+        columns: only these columns are read (None reads all columns).
+        text_columns: columns read as strings (None means all read columns).
+        chunksize: if set, return an iterator of DataFrames instead of one DataFrame.
+        header_map: renames stripped headers to the names used by the pipeline.
+        Header names are matched after stripping whitespace and renaming, and
+        the returned frames use these names.
+        """
+        header_map = header_map or {}
+        if hasattr(file_path, 'read'):
+            # The header is read first, so the file object must be rewindable
+            if not (hasattr(file_path, 'seekable') and file_path.seekable()):
+                file_path = io.BytesIO(DataLoader._as_bytes(file_path.read()))
+            compression = detect_compression(file_path)
+            start = file_path.tell()
+            header = pd.read_csv(file_path, nrows=0, encoding='utf-8', compression=compression)
+            file_path.seek(start)
+        else:
+            compression = detect_compression(file_path)
+            header = pd.read_csv(file_path, nrows=0, encoding='utf-8', compression=compression)
+        stripped = {}
+        for col in header.columns:
+            name = str(col).strip()
+            stripped[header_map.get(name, name)] = col
+        rename = {raw: name for name, raw in stripped.items()}
+        
+        usecols = None
+        if columns is not None:
+            missing_columns = [col for col in columns if col not in stripped]
+            if missing_columns:
+                logger.warning(f"Warning: Missing columns in {file_path}: {missing_columns}")
+            usecols = [stripped[col] for col in columns if col in stripped]
+        
+        if text_columns is None:
+            dtype = str
+        else:
+            dtype = {stripped[col]: str for col in text_columns if col in stripped}
+        
+        options = dict(
+            encoding='utf-8', usecols=usecols, dtype=dtype, compression=compression
+        )
+        
+        if chunksize:
+            # The pyarrow engine has no chunked reading
+            reader = pd.read_csv(file_path, chunksize=chunksize, engine='c', **options)
+            return DataLoader._rename_chunk_columns(reader, rename)
+        
+        engine = csv_engine()
+        try:
+            df = pd.read_csv(file_path, engine=engine, **options)
+        except ValueError:
+            if engine == 'c':
+                raise
+            df = pd.read_csv(file_path, engine='c', **options)
+        return df.rename(columns=rename)
+    
+    @staticmethod
+    def _as_bytes(data):
+        """Content of a text or binary stream as bytes."""
+        return data.encode('utf-8') if isinstance(data, str) else data
+    
+    @staticmethod
+    def frame_typed(df, columns=None, text_columns=None, header_map=None):
+        """Apply the read_csv_typed rules to a DataFrame that is already in memory.
+        
+        Headers are stripped and renamed, columns projected and the text
+        columns converted to strings (missing values stay missing). The
+        caller's frame is not modified; unchanged columns are not copied.
+        """
+        header_map = header_map or {}
+        rename = {}
+        for col in df.columns:
+            name = str(col).strip()
+            rename[col] = header_map.get(name, name)
+        df = df.rename(columns=rename)
+        
+        if columns is not None:
+            missing_columns = [col for col in columns if col not in df.columns]
+            if missing_columns:
+                logger.warning(f"Warning: Missing columns in DataFrame: {missing_columns}")
+            df = df[[col for col in columns if col in df.columns]]
+        
+        names = df.columns if text_columns is None else [c for c in text_columns if c in df.columns]
+        for column in names:
+            values = df[column]
+            if not pd.api.types.is_string_dtype(values):
+                df[column] = values.astype(str).where(values.notna())
+        return df
+    
+    @staticmethod
+    def _rename_chunk_columns(reader, rename):
+        """Yield chunks from a pandas reader with stripped/renamed column names."""
+        with reader:
+            for chunk in reader:
+                yield chunk.rename(columns=rename)
+    
+    def _read(self, file_path, columns=None, text_columns=None, header_map=None):
+        """Read a whole file, chunk by chunk if a chunksize is configured."""
+        if isinstance(file_path, pd.DataFrame):
+            return self.frame_typed(file_path, columns, text_columns, header_map=header_map)
+        if not self.chunksize:
+            return self.read_csv_typed(file_path, columns, text_columns, header_map=header_map)
+        
+        chunks = list(self.read_csv_typed(file_path, columns, text_columns, self.chunksize,
+                                          header_map=header_map))
+        if not chunks:
+            return self.read_csv_typed(file_path, columns, text_columns, header_map=header_map)
+        return pd.concat(chunks, ignore_index=True)
+    
+    def _load(self, file_path, label, **options):
+        """_read with the errors a caller can handle: FileNotFoundError for a
+        missing file, InputError (a ValueError) for an unreadable or malformed input."""
+        try:
+            return self._read(file_path, **options)
+        except FileNotFoundError:
+            raise
+        except (ValueError, TypeError, KeyError, UnicodeDecodeError, OSError,
+                pd.errors.ParserError) as e:
+            raise InputError(f"Could not load the {label} file: {e}") from e
+    
     def load_files(self):
         """Load CSV files into pandas DataFrames."""
-        try:
-            self.client_df = pd.read_csv(self.client_file_path, encoding='utf-8')
-            self.home_df = pd.read_csv(self.home_file_path, encoding='utf-8')
-            
-            # Strip whitespace from column names
-            self.client_df.columns = self.client_df.columns.str.strip()
-            self.home_df.columns = self.home_df.columns.str.strip()
-            
-            print(f"Client file loaded: {len(self.client_df)} rows")
-            print(f"Home file loaded: {len(self.home_df)} rows")
-            
-            return self.client_df, self.home_df
-            
-        except FileNotFoundError as e:
-            print(f"Error: File not found - {e}")
-            sys.exit(1)
-        except Exception as e:
-            print(f"Error loading files: {e}")
-            sys.exit(1)
+        self.load_client_file()
+        self.load_home_file()
+        return self.client_df, self.home_df
+    
+    def load_client_file(self):
+        """Load only the client CSV file (used when the home file comes from a HomeStore).
+        
+        Raises FileNotFoundError for a missing file and ValueError for an
+        unreadable one or one without a Doc. No. column.
+        """
+        self.client_df = self._load(self.client_file_path, 'client',
+                                    text_columns=CLIENT_TEXT_COLUMNS,
+                                    header_map=self.profile.client_headers)
+        if 'Doc. No.' not in self.client_df.columns:
+            raise InputError("The client file has no 'Doc. No.' column "
+                             f"(columns: {list(self.client_df.columns)})")
+        if self.compact:
+            compact_columns(self.client_df, COMPACT_CLIENT_COLUMNS)
+        logger.info(f"Client file loaded: {len(self.client_df)} rows")
+        return self.client_df
+    
+    def load_home_file(self):
+        """Load only the home CSV file (only the columns in HOME_COLUMNS, as strings).
+        
+        Raises FileNotFoundError for a missing file and ValueError for an
+        unreadable one or one without any of the HOME_COLUMNS.
+        """
+        self.home_df = self._load(self.home_file_path, 'home', columns=HOME_COLUMNS,
+                                  header_map=self.profile.home_headers)
+        if len(self.home_df.columns) == 0:
+            raise InputError(f"The home file has none of the columns {HOME_COLUMNS}")
+        if self.compact:
+            compact_columns(self.home_df, COMPACT_HOME_COLUMNS)
+        logger.info(f"Home file loaded: {len(self.home_df)} rows")
+        return self.home_df
+    
+    @staticmethod
+    def chunksize_for_budget(file_path, memory_budget_mb, share=0.25, sample_rows=1000):
+        """Rows per chunk so that one parsed chunk uses about share of the memory budget.
+        
+        The row size is estimated from the first sample_rows rows of the file.
+        """
+        sample = pd.read_csv(file_path, nrows=sample_rows, encoding='utf-8', dtype=str,
+                             compression=detect_compression(file_path))
+        if len(sample) == 0:
+            return sample_rows
+        bytes_per_row = max(1, sample.memory_usage(deep=True).sum() / len(sample))
+        return max(sample_rows, int(memory_budget_mb * 1024 * 1024 * share / bytes_per_row))
+    
+    def iter_home_chunks(self, chunksize=50000):
+        """Iterate over the home file in chunks of typed, projected rows."""
+        return self.read_csv_typed(self.home_file_path, HOME_COLUMNS, chunksize=chunksize,
+                                   header_map=self.profile.home_headers)
 
 class ExcelFormatter:
     """Handles Excel file formatting including cell colors."""
     
+    RED = 'FFCCCC'
+    YELLOW = 'FFFF99'
+    
     def __init__(self, output_file_path):
         self.output_file_path = output_file_path
     
+    @staticmethod
+    def result_color(value):
+        """Fill color for a Result cell: red for 'Not found', yellow for mismatches."""
+        result_value = str(value) if value else ''
+        
+        # Red for 'Not found'
+        if 'Not found' in result_value:
+            return ExcelFormatter.RED
+        
+        # Yellow for mismatches
+        if '/' in result_value and result_value != 'Verified':
+            return ExcelFormatter.YELLOW
+        return None
+    
+    @staticmethod
+    def note_color(value):
+        """Fill color for a Note cell: yellow for 'No Revision Date is given'."""
+        note_value = str(value) if value else ''
+        if 'No Revision Date is given' in note_value:
+            return ExcelFormatter.YELLOW
+        return None
+    
+    @staticmethod
+    def fill(color):
+        """Solid PatternFill for a color."""
+        from openpyxl.styles import PatternFill
+        return PatternFill(start_color=color, end_color=color, fill_type='solid')
+    
     def apply_colors(self):
         """
         Apply colors to cells:
@@ -52,12 +327,12 @@ class ExcelFormatter:
         - Yellow: Revision mismatches (contains '/') and 'No Revision Date is given' in Note
         """
         try:
+            from openpyxl import load_workbook
             wb = load_workbook(self.output_file_path)
             ws = wb.active
             
             # Define colors
-            red_fill = PatternFill(start_color='FFCCCC', end_color='FFCCCC', fill_type='solid')
-            yellow_fill = PatternFill(start_color='FFFF99', end_color='FFFF99', fill_type='solid')
+            fills = {self.RED: self.fill(self.RED), self.YELLOW: self.fill(self.YELLOW)}
             
             # Find column indices
             headers = [cell.value for cell in ws[1]]
@@ -76,36 +351,33 @@ class ExcelFormatter:
             for row_idx in range(2, ws.max_row + 1):
                 if result_col_idx:
                     result_cell = ws.cell(row=row_idx, column=result_col_idx)
-                    result_value = str(result_cell.value) if result_cell.value else ''
-                    
-                    # Red for 'Not found'
-                    if 'Not found' in result_value:
-                        result_cell.fill = red_fill
-                    
-                    # Yellow for mismatches
-                    elif '/' in result_value and result_value != 'Verified':
-                        result_cell.fill = yellow_fill
+                    color = self.result_color(result_cell.value)
+                    if color:
+                        result_cell.fill = fills[color]
                 
                 # Yellow for Note column with 'No Revision Date is given'
                 if note_col_idx:
                     note_cell = ws.cell(row=row_idx, column=note_col_idx)
-                    note_value = str(note_cell.value) if note_cell.value else ''
-                    
-                    if 'No Revision Date is given' in note_value:
-                        note_cell.fill = yellow_fill
+                    color = self.note_color(note_cell.value)
+                    if color:
+                        note_cell.fill = fills[color]
             
             wb.save(self.output_file_path)
             wb.close()
-            print("Cell colors applied successfully!")
+            logger.info("Cell colors applied successfully!")
             
         except Exception as e:
-            print(f"Warning: Could not apply cell colors: {e}")
+            logger.warning(f"Warning: Could not apply cell colors: {e}")
 
 class ClientFormatter:
     """Handles formatting of client file based on business rules."""
     
-    def __init__(self, client_df):
-        self.client_df = client_df.copy()
+    def __init__(self, client_df, profile=None):
+        # Shallow copy: the formatted columns are replaced, never edited in
+        # place, so the caller's frame is unchanged without copying its data
+        self.client_df = client_df.copy(deep=False)
+        # Rule profile (profiles_v1) with the compiled revision rules
+        self.profile = profile or load_profile()
     
     def clean_revision_no(self):
         """Clean Revision No. column by:
@@ -118,58 +390,24 @@ class ClientFormatter:
         '3, STATEMENT 5214' -> '3, STATEMENT 5214'
         '25, TR 25-16' -> '25'
         '02' -> '2'
+        
+        The keywords kept after the comma come from the rule profile.
         """
-        print("===== THIS IS CLEANING REVISION NO COLUMN =====")
+        logger.info("===== THIS IS CLEANING REVISION NO COLUMN =====")
         
         if 'Revision No.' not in self.client_df.columns:
-            print("Warning: 'Revision No.' column not found in client file")
+            logger.warning("Warning: 'Revision No.' column not found in client file")
             return self
         
-        def process_single_value(rev_str):
-            if pd.isna(rev_str) or str(rev_str).strip() == '':
-                return ''
-            
-            rev_str = str(rev_str).strip()
-            original = rev_str
-            
-            # Step 1: Remove characters after first comma, except if followed by 'STATEMENT'
-            if ',' in rev_str:
-                parts = rev_str.split(',', 1)  # Split only on first comma
-                first_part = parts[0].strip()
-                second_part = parts[1].strip() if len(parts) > 1 else ''
-                
-                # Check if second part starts with STATEMENT (case insensitive)
-                if second_part.upper().startswith('STATEMENT'):
-                    rev_str = f"{first_part}, {second_part}"
-                else:
-                    rev_str = first_part
-            
-            # Step 2: Remove leading zeros from numeric parts
-            # Handle cases with STATEMENT separately
-            if 'STATEMENT' in rev_str.upper():
-                # Split by comma to process the numeric part
-                parts = rev_str.split(',', 1)
-                if len(parts) >= 1:
-                    numeric_part = parts[0].strip()
-                    # Remove leading zeros
-                    numeric_part = numeric_part.lstrip('0') or '0'
-                    # Reconstruct with STATEMENT part
-                    rev_str = f"{numeric_part}, {parts[1].strip()}"
-            else:
-                # Simple case: just remove leading zeros
-                rev_str = rev_str.lstrip('0') or '0'
-            
-            print(f"  Cleaned: '{original}' -> '{rev_str}'")
-            return rev_str
-        
         # Apply cleaning to the entire column
-        print("\nCleaning Revision No. column...")
-        for idx in self.client_df.index:
-            original = self.client_df.at[idx, 'Revision No.']
-            cleaned = process_single_value(original)
-            self.client_df.at[idx, 'Revision No.'] = cleaned
-        
-        print("===== REVISION NO. CLEANING COMPLETE =====\n")
+        logger.info("\nCleaning Revision No. column...")
+        original = self.client_df['Revision No.']
+        cleaned = self.profile.clean_revision_series(original)
+        changed = (original.astype(object).where(original.notna(), '').astype(str) != cleaned).sum()
+        self.client_df['Revision No.'] = cleaned
+        logger.info(f"  Cleaned {changed} of {len(cleaned)} values")
+        
+        logger.info("===== REVISION NO. CLEANING COMPLETE =====\n")
         return self
     
     def create_formatted_column(self):
@@ -179,57 +417,24 @@ class ClientFormatter:
         2. If contains STATEMENT, extract the number after it
         3. Ignore rows with more than 1 comma
         4. If contains 'TR' after comma, extract TR value
-        """
-        print("===== THIS IS CREATING FORMAT COLUMN =====")
         
-        self.client_df['Formatted'] = ''
+        Keywords, patterns and the comma limit come from the rule profile.
+        """
+        logger.info("===== THIS IS CREATING FORMAT COLUMN =====")
         
-        for idx, row in self.client_df.iterrows():
-            rev_no = row.get('Revision No.')
-            
-            if pd.isna(rev_no):
-                continue
-            
-            rev_str = str(rev_no).strip()
-            
-            # Count commas
-            comma_count = rev_str.count(',')
-            
-            # Rule 3: Ignore if more than 1 comma
-            if comma_count > 1:
-                continue
-            
-            # Rule 2: Handle STATEMENT
-            if 'STATEMENT' in rev_str.upper():
-                match = re.search(r'STATEMENT\s+([\d\-A-Z]+)', rev_str, re.IGNORECASE)
-                if match:
-                    self.client_df.at[idx, 'Formatted'] = match.group(1)
-                continue
-            
-            # Rule 4: Handle TR after comma
-            if comma_count == 1 and 'TR' in rev_str.upper():
-                # Extract everything after comma
-                parts = rev_str.split(',')
-                if len(parts) == 2:
-                    after_comma = parts[1].strip()
-                    # Extract TR and following pattern
-                    tr_match = re.search(r'(TR\s*[\d\-]+)', after_comma, re.IGNORECASE)
-                    if tr_match:
-                        self.client_df.at[idx, 'Formatted'] = tr_match.group(1).strip()
-                        continue
-            
-            # Rule 1: If contains TR or '-', set to 'TR'
-            if 'TR' in rev_str.upper() or '-' in rev_str:
-                self.client_df.at[idx, 'Formatted'] = 'TR'
+        if 'Revision No.' in self.client_df.columns:
+            self.client_df['Formatted'] = self.profile.formatted_series(self.client_df['Revision No.'])
+        else:
+            self.client_df['Formatted'] = ''
         
-        print("===== FORMAT COLUMN CREATION COMPLETE =====\n")
+        logger.info("===== FORMAT COLUMN CREATION COMPLETE =====\n")
         return self.client_df
     
     def process(self):
         """Process client file: preprocess columns first, then create formatted column."""
-        print("\n" + "="*60)
-        print("STARTING CLIENT FILE PROCESSING")
-        print("="*60)
+        logger.info("\n" + "="*60)
+        logger.info("STARTING CLIENT FILE PROCESSING")
+        logger.info("="*60)
         
         # Step 1: Clean the Revision No. column
         self.clean_revision_no()
@@ -237,9 +442,9 @@ class ClientFormatter:
         # Step 2: Create the Formatted column
         self.create_formatted_column()
         
-        print("="*60)
-        print("CLIENT FILE PROCESSING COMPLETE")
-        print("="*60 + "\n")
+        logger.info("="*60)
+        logger.info("CLIENT FILE PROCESSING COMPLETE")
+        logger.info("="*60 + "\n")
         
         return self.client_df
     
@@ -247,15 +452,28 @@ class ClientFormatter:
         """Save the formatted client file."""
         try:
             self.client_df.to_csv(output_path, index=False)
-            print(f"Formatted client file saved to: {output_path}")
+            logger.info(f"Formatted client file saved to: {output_path}")
         except Exception as e:
-            print(f"Error saving formatted file: {e}")
+            logger.error(f"Error saving formatted file: {e}")
 
 class HomeProcessor:
     """Handles home file processing including duplicate removal."""
     
-    def __init__(self, home_df):
-        self.home_df = home_df.copy()
+    # Rows with the same key are duplicates; the first occurrence is kept
+    DUPLICATE_KEY = ['Call Number', 'Revision Description']
+    
+    # Columns of the duplicate audit file (Home Row / Kept Home Row are
+    # 1-based file rows, the header being row 1)
+    AUDIT_COLUMNS = ['Home Row', 'Kept Home Row', 'Call Number', 'Revision Description',
+                     'Document Number', 'Revision Num', 'Revision Date']
+    
+    def __init__(self, home_df, audit_file=None):
+        # Shallow copy: columns are replaced and rows selected, never edited
+        # in place, so the caller's frame is unchanged without copying its data
+        self.home_df = home_df.copy(deep=False)
+        # Optional CSV of the removed duplicate rows
+        self.audit_file = audit_file
+        self.removed_count = 0
     
     @staticmethod
     def remove_leading_zeros(value_str):
@@ -277,68 +495,105 @@ class HomeProcessor:
         
         return result
     
+    @staticmethod
+    def normalized_revision_nums(values):
+        """remove_leading_zeros for a whole column at once (returns an object Series)."""
+        stripped = values.astype(object).where(values.notna(), '').astype(str).str.strip()
+        cleaned = stripped.str.lstrip('0')
+        return cleaned.mask((cleaned == '') & (stripped != ''), '0').astype(object)
+    
     def preprocess_revision_num(self):
         """Preprocess Revision Num column by removing leading zeros."""
         if 'Revision Num' not in self.home_df.columns:
-            print("Warning: 'Revision Num' column not found in home file")
+            logger.warning("Warning: 'Revision Num' column not found in home file")
             return self
         
-        print("\n=== Preprocessing Home Revision Num ===")
+        logger.info("\n=== Preprocessing Home Revision Num ===")
         
-        for idx in self.home_df.index:
-            original = self.home_df.at[idx, 'Revision Num']
-            cleaned = self.remove_leading_zeros(original)
-            if str(original) != str(cleaned):
-                print(f"  Row {idx}: '{original}' -> '{cleaned}'")
-            self.home_df.at[idx, 'Revision Num'] = cleaned
+        original = self.home_df['Revision Num']
+        cleaned = self.normalized_revision_nums(original)
+        changed = original.astype(object).astype(str) != cleaned
+        for idx in changed[changed].index[:10]:
+            logger.debug(f"  Row {idx}: '{original.at[idx]}' -> '{cleaned.at[idx]}'")
+        if changed.sum() > 10:
+            logger.debug(f"  ... {changed.sum() - 10} more")
+        # Cleaned values may not be categories of a compact column
+        self.home_df['Revision Num'] = cleaned
         
-        print("=== Home Revision Num Preprocessing Complete ===\n")
+        logger.info("=== Home Revision Num Preprocessing Complete ===\n")
         return self
     
+    def duplicate_positions(self):
+        """Positions of duplicate key rows and of the row each one duplicates.
+        
+        Each key column is factorized through a hash table into integer
+        codes (missing values get a code of their own, so they are equal as
+        in duplicated()), and the codes are combined into one int64 key per
+        row; duplicates are found on that single column, exactly, and the
+        first row of each key is the row that is kept.
+        """
+        row_keys = np.zeros(len(self.home_df), dtype=np.int64)
+        for column in self.DUPLICATE_KEY:
+            codes, uniques = pd.factorize(self.home_df[column])
+            row_keys = row_keys * (len(uniques) + 1) + (codes + 1)
+        _, first_of_key, row_groups = np.unique(row_keys, return_index=True, return_inverse=True)
+        kept = first_of_key[row_groups]
+        positions = np.flatnonzero(kept != np.arange(len(kept)))
+        return positions, kept[positions]
+    
+    def write_audit(self, positions, kept):
+        """Write the removed rows (file row, row kept instead, key and revision) to audit_file."""
+        audit = pd.DataFrame({
+            'Home Row': positions + 2,
+            'Kept Home Row': kept + 2,
+        })
+        for column in self.AUDIT_COLUMNS[2:]:
+            if column in self.home_df.columns:
+                audit[column] = self.home_df[column].to_numpy()[positions]
+        try:
+            output_path = Path(self.audit_file)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            audit.to_csv(output_path, index=False)
+            logger.info(f"Removed duplicates listed in: {output_path}")
+        except OSError as e:
+            logger.warning(f"Warning: could not write the duplicate audit file ({e})")
+    
     def remove_duplicates(self):
         """
         Remove duplicate rows based on 'Call Number' and 'Revision Description'.
-        Keeps the first occurrence.
+        Keeps the first occurrence. With audit_file the removed rows are
+        listed there (an empty list when there are none).
         """
-        print("\n" + "="*70)
-        print("DUPLICATE REMOVAL FROM HOME FILE")
-        print("="*70)
+        logger.info("\n" + "="*70)
+        logger.info("DUPLICATE REMOVAL FROM HOME FILE")
+        logger.info("="*70)
         
-        required_columns = ['Call Number', 'Revision Description']
-        missing_columns = [col for col in required_columns if col not in self.home_df.columns]
+        missing_columns = [col for col in self.DUPLICATE_KEY if col not in self.home_df.columns]
         
         if missing_columns:
-            print(f"Warning: Missing columns: {missing_columns}")
-            print("Skipping duplicate removal.")
-            print("="*70 + "\n")
+            logger.warning(f"Warning: Missing columns: {missing_columns}")
+            logger.info("Skipping duplicate removal.")
+            logger.info("="*70 + "\n")
             return self.home_df
         
-        original_count = len(self.home_df)
-        
-        # Create index for tracking
-        self.home_df['original_index'] = range(len(self.home_df))
-        
-        # Identify duplicates
-        duplicates_mask = self.home_df.duplicated(
-            subset=['Call Number', 'Revision Description'], 
-            keep='first'
-        )
-        
-        duplicate_rows = self.home_df[duplicates_mask].copy()
+        positions, kept = self.duplicate_positions()
+        self.removed_count = len(positions)
+        if self.audit_file:
+            self.write_audit(positions, kept)
         
-        if len(duplicate_rows) > 0:
-            self.home_df = self.home_df[~duplicates_mask].copy()
-            self.home_df = self.home_df.drop(columns=['original_index'])
-            self.home_df = self.home_df.reset_index(drop=True)
+        if self.removed_count:
+            keep_mask = np.ones(len(self.home_df), dtype=bool)
+            keep_mask[positions] = False
+            # The row selection is the only copy of the data
+            self.home_df = self.home_df[keep_mask].reset_index(drop=True)
             
-            print(f"Summary: Removed {original_count - len(self.home_df)} duplicate(s)")
-            print(f"Home file now contains: {len(self.home_df)} rows")
+            logger.info(f"Summary: Removed {self.removed_count} duplicate(s)")
+            logger.info(f"Home file now contains: {len(self.home_df)} rows")
         else:
-            print("No duplicates found")
-            print(f"Home file contains: {len(self.home_df)} rows")
-            self.home_df = self.home_df.drop(columns=['original_index'])
+            logger.info("No duplicates found")
+            logger.info(f"Home file contains: {len(self.home_df)} rows")
         
-        print("="*70 + "\n")
+        logger.info("="*70 + "\n")
         return self.home_df
     
     def process(self):
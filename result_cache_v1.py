@@ -0,0 +1,98 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Cache directory of the command line tool and the GUI; the library and
+# api_v1 only cache when given a directory
+DEFAULT_CACHE_DIR = 'result_cache'
+
+
+class ResultCache:
+    """Local cache of finished result files, keyed by a run fingerprint.
+
+    An entry is the result file (KEY.xlsx / .csv / .jsonl) and KEY.json with
+    its summary. The cache is bounded to max_mb; the least recently used
+    entries are removed first (a hit refreshes the entry's access time).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_mb=500):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    @staticmethod
+    def make_key(input_hash, rules_version, suffix, options=None):
+        """Fingerprint of a run: inputs + rule profile (input_hash), code rules version,
+        output format and the options that change the results."""
+        digest = hashlib.sha256()
+        digest.update(input_hash.encode())
+        digest.update(f"rules={rules_version}".encode())
+        digest.update(f"format={suffix.lower()}".encode())
+        digest.update(json.dumps(options or {}, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _paths(self, key, suffix):
+        return self.cache_dir / f"{key}{suffix.lower()}", self.cache_dir / f"{key}.json"
+
+    def lookup(self, key, suffix):
+        """Return (result path, metadata) of a cached run, or None."""
+        result_path, meta_path = self._paths(key, suffix)
+        if not result_path.exists() or not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        now = time.time()
+        os.utime(result_path, (now, now))
+        return result_path, meta
+
+    def store(self, key, output_file, meta):
+        """Copy a finished result file into the cache, then evict to the size limit."""
+        suffix = Path(output_file).suffix
+        result_path, meta_path = self._paths(key, suffix)
+        if Path(output_file).stat().st_size > self.max_bytes:
+            logger.info("Result is larger than the result cache, not cached")
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Copy under a temporary name so a partial file is never served
+            partial_path = result_path.with_name(result_path.name + '.partial')
+            shutil.copyfile(output_file, partial_path)
+            os.replace(partial_path, result_path)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(meta, created=time.strftime('%Y-%m-%dT%H:%M:%S')), f, indent=2)
+        except OSError as e:
+            logger.warning(f"Warning: could not store result in cache ({e})")
+            return
+        self.evict(keep=result_path)
+
+    def entries(self):
+        """Cached result files with their metadata file, least recently used first."""
+        if not self.cache_dir.is_dir():
+            return []
+        results = [
+            path for path in self.cache_dir.iterdir()
+            if path.suffix != '.json' and not path.name.endswith('.partial')
+        ]
+        return sorted(results, key=lambda path: path.stat().st_mtime)
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits max_mb."""
+        entries = self.entries()
+        total = sum(path.stat().st_size for path in entries)
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= path.stat().st_size
+            path.unlink()
+            path.with_suffix('.json').unlink(missing_ok=True)
+            logger.info(f"Result cache: evicted {path.name}")
@@ -0,0 +1,113 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from compare_v2 import NgramPrefilter
+from pub_v1 import ExcelFormatter
+
+# Result categories of the GUI filter; 'Duplicated' rows (Note 'duplicated')
+# are also counted in their Result category
+RESULT_CATEGORIES = ['All', 'Verified', 'Mismatch', 'Not found', 'Duplicated']
+
+# Columns searched by the search box
+SEARCH_COLUMNS = ['Doc. No.', 'Revision No.', 'Doc Call Number', 'Result', 'Note']
+
+
+class ResultView:
+    """Filtered and searchable view of a result frame, for the GUI result grid.
+
+    The frame's columns are kept as lists and turned into display strings
+    only for the rows shown, so a view over 200k rows is cheap to build. The
+    categories follow ResultGenerator.summary ('Not found' in Result is Not
+    found, anything else but Verified needs checking). Searches go through a
+    trigram index (NgramPrefilter) over the SEARCH_COLUMNS once
+    build_search_index() has run, and scan the rows until then.
+    """
+
+    def __init__(self, result_df):
+        self.columns = [str(column) for column in result_df.columns]
+        self.column_values = [result_df[column].tolist() for column in result_df.columns]
+        self.size = len(result_df)
+
+        results = self._text(result_df, 'Result')
+        notes = self._text(result_df, 'Note')
+        verified = (results == 'Verified').to_numpy()
+        not_found = results.str.contains('Not found', regex=False).to_numpy()
+        self.masks = {
+            'All': np.ones(self.size, dtype=bool),
+            'Verified': verified,
+            'Mismatch': ~verified & ~not_found,
+            'Not found': not_found,
+            'Duplicated': (notes == 'duplicated').to_numpy(),
+        }
+        self.results = results.tolist()
+        self.notes = notes.tolist()
+
+        # Lower-case search text per row (fields separated so a query cannot
+        # match across two columns)
+        search_text = None
+        for column in SEARCH_COLUMNS:
+            if column in result_df.columns:
+                text = self._text(result_df, column).str.lower()
+                search_text = text if search_text is None else search_text + '\x1f' + text
+        self.search_texts = search_text.tolist() if search_text is not None else [''] * self.size
+        self.search_index = None
+
+    @staticmethod
+    def _text(result_df, column):
+        """A column as strings ('' for missing values and missing columns)."""
+        if column not in result_df.columns:
+            return pd.Series([''] * len(result_df), index=result_df.index, dtype=object)
+        return result_df[column].fillna('').astype(str).str.strip()
+
+    @classmethod
+    def from_file(cls, path):
+        """View of a written result file (.xlsx, .csv or .jsonl), e.g. a cached result."""
+        suffix = Path(path).suffix.lower()
+        if suffix == '.csv':
+            result_df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        elif suffix == '.jsonl':
+            result_df = pd.read_json(path, lines=True, dtype=False)
+        else:
+            result_df = pd.read_excel(path, dtype=str, keep_default_na=False)
+        return cls(result_df)
+
+    def build_search_index(self):
+        """Build the trigram search index (seconds for large results; run it
+        in a background thread)."""
+        self.search_index = NgramPrefilter(self.search_texts)
+
+    def category_counts(self):
+        """Rows per category."""
+        return {category: int(mask.sum()) for category, mask in self.masks.items()}
+
+    def filter(self, category='All', query=''):
+        """Positions of the rows in category whose search text contains query."""
+        mask = self.masks.get(category, self.masks['All'])
+        query = query.strip().lower()
+        if not query:
+            return np.flatnonzero(mask)
+
+        candidates = None
+        if self.search_index is not None:
+            candidates = self.search_index.candidates(query)
+        if candidates is None:
+            # Too short for the index (or not built yet): scan the category
+            candidates = np.flatnonzero(mask)
+        else:
+            candidates = candidates[mask[candidates]]
+        texts = self.search_texts
+        return np.array([pos for pos in candidates.tolist() if query in texts[pos]], dtype=np.int64)
+
+    def row(self, pos):
+        """Display strings of one row, in self.columns order."""
+        values = []
+        for column in self.column_values:
+            value = column[pos]
+            values.append('' if value is None or (isinstance(value, float) and np.isnan(value))
+                          else str(value))
+        return values
+
+    def row_color(self, pos):
+        """Highlight color of a row, as in the Excel result (None: no color)."""
+        return (ExcelFormatter.result_color(self.results[pos])
+                or ExcelFormatter.note_color(self.notes[pos]))
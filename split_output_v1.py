@@ -0,0 +1,200 @@
+import logging
+import os
+import pickle
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from final_result_v1 import ResultGenerator, StreamingResultWriter, XlsxResultWriter, EXCEL_MAX_ROWS
+
+logger = logging.getLogger(__name__)
+
+SPLIT_MODES = ['files', 'sheets']
+
+INDEX_COLUMNS = ['Part', 'Publi. Type', 'Rows', 'Verified', 'Needs checking', 'Not found', 'Link']
+
+
+def sheet_title(label, used):
+    """Valid, unique Excel sheet name for a part label (max 31 characters)."""
+    title = re.sub(r'[\[\]:*?/\\]', '_', label).strip("'") or 'Part'
+    title = title[:31]
+    candidate, number = title, 2
+    while candidate.lower() in used:
+        suffix = f" ({number})"
+        candidate = title[:31 - len(suffix)] + suffix
+        number += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def file_label(label):
+    """Part label as a file name fragment."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', label).strip('_') or 'part'
+
+
+def write_part(output_file_path, columns, spill_path):
+    """Write one part file from its spill file (worker process); returns
+    (path, rows written)."""
+    with XlsxResultWriter(output_file_path, columns) as writer, open(spill_path, 'rb') as spill:
+        while True:
+            try:
+                batch = pickle.load(spill)
+            except EOFError:
+                break
+            for values in batch:
+                writer.write_row(values)
+    return output_file_path, writer.rows_written
+
+
+class SplitXlsxResultWriter(StreamingResultWriter):
+    """Writes the results as several parts, with an index sheet linking them.
+
+    Rows are split into parts of at most max_rows rows (Excel's sheet limit
+    by default) and, with by_publi_type, one part per Publi. Type first; a
+    part is started when a row does not fit the open part of its type, so
+    parts are numbered in the order the rows arrive. Rows are written as
+    they come, so memory does not grow with the result:
+    - 'files': OUTPUT_<part>.xlsx part files. Rows are spilled to one
+      temporary file per part and the spills are turned into xlsx files
+      concurrently in worker processes on close(); the output file holds
+      the index sheet with links to the parts.
+    - 'sheets': one write-only sheet per part in the output file, after the
+      index sheet, in the order the parts were started (a workbook is
+      written by one process).
+    Each part gets the same red/yellow highlighting as ExcelFormatter.apply_colors.
+    """
+
+    def __init__(self, output_file_path, columns, max_rows=None, by_publi_type=False,
+                 mode='files', workers=None, flush_every=1000):
+        super().__init__(output_file_path, columns, flush_every)
+        if mode not in SPLIT_MODES:
+            raise ValueError(f"Unknown split mode: {mode} (use {', '.join(SPLIT_MODES)})")
+        self.max_rows = min(max_rows or EXCEL_MAX_ROWS - 1, EXCEL_MAX_ROWS - 1)
+        self.by_publi_type = by_publi_type
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.publi_pos = self.columns.index('Publi. Type') if 'Publi. Type' in self.columns else None
+        self.result_pos = self.columns.index('Result') if 'Result' in self.columns else None
+        self.parts = []
+        self.open_parts = {}
+        self.part_files = []
+        self.used_names = {'index'} if mode == 'sheets' else set()
+        # The output workbook: the index sheet first, then (sheets mode) the
+        # parts and any extra sheets
+        self.book = XlsxResultWriter(self.output_file_path, self.columns, sheet_name=None)
+        self.index_ws = self.book.wb.create_sheet('Index')
+
+    def part_key(self, values):
+        """Publi. Type of a row ('' for none), or None when not splitting by type."""
+        if not (self.by_publi_type and self.publi_pos is not None):
+            return None
+        publi_type = values[self.publi_pos]
+        return '' if publi_type is None else str(publi_type).strip()
+
+    def start_part(self, publi_type):
+        """Open the next part for a Publi. Type (None: split by rows only)."""
+        number = sum(1 for part in self.parts if part['publi_type'] == publi_type) + 1
+        if publi_type is None:
+            label = f"Part {number}"
+        else:
+            label = publi_type or '(no Publi. Type)'
+            if number > 1:
+                label = f"{label} {number}"
+        part = {'label': label, 'publi_type': publi_type, 'rows': 0,
+                'verified': 0, 'not_found': 0, 'batch': []}
+        if self.mode == 'sheets':
+            part['title'] = sheet_title(label, self.used_names)
+            self.book.start_sheet(part['title'])
+            part['ws'] = self.book.ws
+        else:
+            output_path = Path(self.output_file_path)
+            name = f"{output_path.stem}_{file_label(label)}"
+            while name.lower() in self.used_names:
+                name += '_'
+            self.used_names.add(name.lower())
+            part['path'] = str(output_path.with_name(name + output_path.suffix))
+            fd, part['spill'] = tempfile.mkstemp(suffix='.rows', prefix='split_')
+            part['spill_file'] = os.fdopen(fd, 'wb')
+        self.parts.append(part)
+        self.open_parts[publi_type] = part
+        return part
+
+    def _write(self, values):
+        publi_type = self.part_key(values)
+        part = self.open_parts.get(publi_type)
+        if part is None or part['rows'] >= self.max_rows:
+            part = self.start_part(publi_type)
+        part['rows'] += 1
+        if self.result_pos is not None:
+            category = ResultGenerator.result_category(values[self.result_pos])
+            if category != 'needs_check':
+                part[category] += 1
+        if self.mode == 'sheets':
+            self.book.ws = part['ws']
+            self.book.write_row(values)
+        else:
+            part['batch'].append(values)
+            if len(part['batch']) >= self.flush_every:
+                self.spill(part)
+
+    @staticmethod
+    def spill(part):
+        """Append a files-mode part's buffered rows to its spill file."""
+        if part['batch']:
+            pickle.dump(part['batch'], part['spill_file'], protocol=pickle.HIGHEST_PROTOCOL)
+            part['batch'] = []
+
+    def add_sheet(self, sheet_name, columns, rows):
+        """Extra sheet, written after the parts (files mode: into the index workbook)."""
+        return self.book.add_sheet(sheet_name, columns, rows)
+
+    def index_entries(self):
+        """Index rows: part, type, counts and a hyperlink to the part, ordered
+        by Publi. Type."""
+        from openpyxl.worksheet.hyperlink import Hyperlink
+        entries = []
+        for part in sorted(self.parts, key=lambda part: part['publi_type'] or ''):
+            if self.mode == 'sheets':
+                link_text = part['title']
+                link = Hyperlink(ref='', location=f"'{part['title']}'!A1")
+            else:
+                link_text = link = Path(part['path']).name
+            cell = self.book.cell_class(self.index_ws, value=link_text)
+            cell.hyperlink = link
+            cell.style = 'Hyperlink'
+            needs_checking = part['rows'] - part['verified'] - part['not_found']
+            entries.append([part['label'], part['publi_type'] or '', part['rows'],
+                            part['verified'], needs_checking, part['not_found'], cell])
+        return entries
+
+    def close(self):
+        if not self.parts:
+            self.start_part(None if not self.by_publi_type or self.publi_pos is None else '')
+        self.index_ws.append(INDEX_COLUMNS)
+        for entry in self.index_entries():
+            self.index_ws.append(entry)
+        self.book.close()
+        output_path = Path(self.output_file_path)
+
+        if self.mode == 'sheets':
+            logger.info(f"Results split into {len(self.parts)} sheets of {output_path.name}")
+            return
+
+        for part in self.parts:
+            self.spill(part)
+            part['spill_file'].close()
+        jobs = [(part['path'], self.columns, part['spill']) for part in self.parts]
+        try:
+            if len(jobs) == 1 or self.workers == 1:
+                results = [write_part(*job) for job in jobs]
+            else:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as executor:
+                    futures = [executor.submit(write_part, *job) for job in jobs]
+                    results = [future.result() for future in futures]
+        finally:
+            for part in self.parts:
+                os.remove(part['spill'])
+        self.part_files = [path for path, _ in results]
+        for path, rows in results:
+            logger.info(f"  {Path(path).name}: {rows} rows")
+        logger.info(f"Results split into {len(self.parts)} files, index: {output_path.name}")
@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+HOME_COLUMNS = ['Call Number', 'Document Number', 'Title', 'Revision Description',
+                'Revision Num', 'Revision Date']
+CLIENT_COLUMNS = ['Doc. No.', 'Rev. Date', 'Revision No.', 'Publi. Type']
+
+REVISIONS = ['BASIC', '02', '3', '10', 'TR5']
+DATES = ['12/31/2018', '01/15/2020', '2019-07-01', '3-Mar-21']
+
+
+def make_home_rows(count=60):
+    """Home export rows: one AMM and one CMM document per call number, plus
+    exact repeats of a few rows (duplicates by Call Number + Revision
+    Description)."""
+    rows = []
+    for i in range(count):
+        rows.append([f"CN{i}", f"AMM-{i:04d}", f"Manual AMM-{i:04d} for part",
+                     f"TR {i:03d}", REVISIONS[i % len(REVISIONS)], DATES[i % len(DATES)]])
+        if i % 3 == 0:
+            rows.append([f"CN{i}", f"CMM {i} A", f"Component maintenance CMM {i} A",
+                         f"STATEMENT {i}", REVISIONS[(i + 1) % len(REVISIONS)], ''])
+    rows.extend(list(row) for row in rows[:12:4])
+    return rows
+
+
+def make_client_rows(count=70):
+    """Client rows with matching, mismatching, respelled and unknown documents."""
+    rows = []
+    for i in range(count):
+        revision = REVISIONS[i % len(REVISIONS)]
+        if i % 4 == 1:
+            revision = REVISIONS[(i + 2) % len(REVISIONS)]
+        doc_no = f"AMM-{i:04d}" if i % 5 else f"amm {i}"
+        rows.append([doc_no, DATES[i % len(DATES)], revision, 'AMM' if i % 2 else 'SB'])
+    return rows
+
+
+def write_csv(path, columns, rows):
+    pd.DataFrame(rows, columns=columns).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def home_csv(tmp_path):
+    return str(write_csv(tmp_path / 'home.csv', HOME_COLUMNS, make_home_rows()))
+
+
+@pytest.fixture
+def client_csv(tmp_path):
+    return str(write_csv(tmp_path / 'client.csv', CLIENT_COLUMNS, make_client_rows()))
+
+
+def read_result(path):
+    """A written CSV result as strings."""
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
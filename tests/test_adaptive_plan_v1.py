@@ -0,0 +1,69 @@
+import json
+
+from adaptive_plan_v1 import AdaptivePlan, StrategyStatsFile
+from conftest import read_result
+from main_v1 import DocumentRevisionTool
+
+
+def stored(prefilter_hits, prefilter_seconds, title_seconds):
+    return {
+        'prefilter': {'calls': 100, 'hits': prefilter_hits, 'seconds': prefilter_seconds},
+        'title': {'calls': 100, 'hits': 90, 'seconds': title_seconds},
+        'revision_description': {'calls': 10, 'hits': 0, 'seconds': 0.0},
+    }
+
+
+def test_prefilter_runs_while_its_value_is_unknown():
+    plan = AdaptivePlan()
+    assert plan.prefilter_value() is None
+    assert plan.run_prefilter()
+
+
+def test_prefilter_runs_when_it_saves_time():
+    plan = AdaptivePlan(stored(prefilter_hits=80, prefilter_seconds=0.01, title_seconds=1.0))
+    assert plan.prefilter_value() > 0
+    assert plan.use_prefilter
+
+
+def test_useless_prefilter_is_skipped_but_probed():
+    plan = AdaptivePlan(stored(prefilter_hits=0, prefilter_seconds=1.0, title_seconds=0.1),
+                        probe_every=10)
+    assert not plan.use_prefilter
+    runs = []
+    for _ in range(20):
+        plan.start_row()
+        runs.append(plan.run_prefilter())
+    assert runs.count(True) == 2
+    assert plan.skipped_prefilter == 18
+    assert plan.saved_seconds() > 0
+
+
+def test_stats_file_merges_runs_with_decay(tmp_path):
+    stats_file = StrategyStatsFile(tmp_path / 'stats.json')
+    assert stats_file.load('default') == {}
+    stats_file.save('default', {'title': {'calls': 10, 'hits': 4, 'seconds': 2.0}})
+    stats_file.save('default', {'title': {'calls': 10, 'hits': 2, 'seconds': 1.0}})
+    assert stats_file.load('default')['title'] == {'calls': 15.0, 'hits': 4.0, 'seconds': 2.0}
+    assert stats_file.load('other') == {}
+
+
+def test_unreadable_stats_file_starts_fresh(tmp_path):
+    path = tmp_path / 'stats.json'
+    path.write_text('{not json')
+    assert StrategyStatsFile(path).load('default') == {}
+
+
+def test_stored_statistics_do_not_change_the_result(client_csv, home_csv, tmp_path):
+    stats_path = tmp_path / 'stats.json'
+    for name in ('first.csv', 'second.csv'):
+        DocumentRevisionTool(client_csv, home_csv, str(tmp_path / name), stats_file=str(stats_path),
+                             log=lambda *args: None).run()
+    assert set(json.loads(stats_path.read_text())) == {'default'}
+    assert read_result(tmp_path / 'second.csv').equals(read_result(tmp_path / 'first.csv'))
+
+
+def test_library_default_keeps_no_statistics(client_csv, home_csv, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    DocumentRevisionTool(client_csv, home_csv, str(tmp_path / 'result.csv'),
+                         log=lambda *args: None).run()
+    assert not (tmp_path / 'strategy_stats.json').exists()
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from api_v1 import compare_documents
+from conftest import read_result
+
+MAIN = str(Path(__file__).resolve().parent.parent / 'main_v1.py')
+
+
+def test_compare_documents_matches_the_cli(client_csv, home_csv, tmp_path):
+    subprocess.run(
+        [sys.executable, MAIN, client_csv, home_csv, 'cli.csv', '--force',
+         '--cache-size', '0', '--stats-file', ''],
+        cwd=tmp_path, check=True, capture_output=True,
+    )
+    cli_result = read_result(tmp_path / 'cli.csv')
+
+    result_df, summary = compare_documents(client_csv, home_csv,
+                                           output_file=str(tmp_path / 'api.csv'))
+    assert read_result(tmp_path / 'api.csv').equals(cli_result)
+    assert list(result_df.columns) == list(cli_result.columns)
+    assert result_df['Result'].fillna('').astype(str).tolist() == cli_result['Result'].tolist()
+    assert summary['total'] == len(cli_result)
+    assert summary['verified'] == int((cli_result['Result'] == 'Verified').sum())
+
+
+def test_compare_documents_accepts_frames_and_writes_nothing(client_csv, home_csv, tmp_path):
+    client_df = pd.read_csv(client_csv, dtype=str)
+    home_df = pd.read_csv(home_csv, dtype=str)
+    from_files, _ = compare_documents(client_csv, home_csv)
+    from_frames, _ = compare_documents(client_df, home_df)
+    assert from_frames.fillna('').astype(str).equals(from_files.fillna('').astype(str))
+    assert client_df.columns.tolist() == ['Doc. No.', 'Rev. Date', 'Revision No.', 'Publi. Type']
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['client.csv', 'home.csv']
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+import final_result_v1
+from checkpoint_v1 import fingerprint_run
+from conftest import read_result
+from main_v1 import DocumentRevisionTool
+
+
+def make_tool(client_csv, home_csv, output_file, **options):
+    options.setdefault('log', lambda *args: None)
+    return DocumentRevisionTool(client_csv, home_csv, output_file, stats_file=None,
+                                cache_dir=None, window_size=10, **options)
+
+
+def interrupt_after(monkeypatch, rows):
+    """Make the CSV result writer fail after rows rows, as an interrupted run."""
+    write = final_result_v1.CsvResultWriter._write
+
+    def interrupted(self, values):
+        if self.rows_written == rows:
+            raise KeyboardInterrupt
+        write(self, values)
+
+    monkeypatch.setattr(final_result_v1.CsvResultWriter, '_write', interrupted)
+
+
+def test_resumed_run_writes_the_same_result(client_csv, home_csv, tmp_path, monkeypatch):
+    expected_file = str(tmp_path / 'expected.csv')
+    make_tool(client_csv, home_csv, expected_file).run()
+
+    output_file = str(tmp_path / 'result.csv')
+    checkpoint_file = output_file + '.checkpoint.jsonl'
+    interrupt_after(monkeypatch, 25)
+    with pytest.raises(KeyboardInterrupt):
+        make_tool(client_csv, home_csv, output_file).run()
+    monkeypatch.undo()
+    with open(checkpoint_file, encoding='utf-8') as f:
+        assert len(f.readlines()) == 1 + 25
+
+    logs = []
+    make_tool(client_csv, home_csv, output_file, resume=True, log=logs.append).run()
+    assert 'Resuming from checkpoint: 25/70 rows already compared' in logs
+    assert read_result(output_file).equals(read_result(expected_file))
+    assert not os.path.exists(checkpoint_file)
+
+
+def test_checkpoint_of_other_options_is_not_resumed(client_csv, home_csv, tmp_path, monkeypatch):
+    output_file = str(tmp_path / 'result.csv')
+    interrupt_after(monkeypatch, 25)
+    with pytest.raises(KeyboardInterrupt):
+        make_tool(client_csv, home_csv, output_file).run()
+    monkeypatch.undo()
+
+    logs = []
+    make_tool(client_csv, home_csv, output_file, resume=True, suggestions=0,
+              log=logs.append).run()
+    assert 'No usable checkpoint found, comparing all rows' in logs
+    assert len(read_result(output_file)) == 70
+
+
+def test_fingerprint_run_depends_on_columns_and_options():
+    columns = ['Doc. No.', 'Result']
+    base = fingerprint_run('abc', columns, {'suggestions': 3})
+    assert base == fingerprint_run('abc', list(columns), {'suggestions': 3})
+    assert base != fingerprint_run('abc', columns + ['Suggestions'], {'suggestions': 3})
+    assert base != fingerprint_run('abc', columns, {'suggestions': 0})
+    assert base != fingerprint_run('abd', columns, {'suggestions': 3})
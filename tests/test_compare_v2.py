@@ -0,0 +1,90 @@
+import pandas as pd
+
+from api_v1 import compare_documents
+from compare_v2 import SimilarityIndex, canonical_doc_key
+from conftest import CLIENT_COLUMNS, HOME_COLUMNS
+from main_v1 import DocumentRevisionTool
+
+HOME = [
+    ['CN1', 'AMM-0001', 'Manual AMM-0001', 'TR 5 incorporated', '3', '12/31/2018'],
+    ['CN1-2', 'AMM-0001', 'Manual AMM-0001 copy', 'TR5', '3', '12/31/2018'],
+    ['CN2', 'AMM-0002', 'Manual AMM-0002', 'TR5', '3', '12/31/2018'],
+    ['CN3', 'AMM-0003', 'Manual AMM-0003', 'STATEMENT 5004 issued', '4', '2019-07-01'],
+    ['CN4', 'AMM-0004', 'Manual AMM-0004', 'STATEMENT 12', '4', '2019-07-01'],
+]
+
+
+def compare(client_rows, home_rows=HOME, **options):
+    """Result rows of compare_documents as {column: value} dicts."""
+    result_df, _ = compare_documents(pd.DataFrame(client_rows, columns=CLIENT_COLUMNS),
+                                     pd.DataFrame(home_rows, columns=HOME_COLUMNS), **options)
+    return result_df.fillna('').astype(str).to_dict('records')
+
+
+def test_canonical_doc_key_ignores_case_punctuation_and_leading_zeros():
+    for spelling in ['AMM-0413', 'amm 413', 'AMM413', ' Amm_00413 ', 'AMM.413']:
+        assert canonical_doc_key(spelling) == 'AMM.413'
+
+
+def test_canonical_doc_key_keeps_segments_apart():
+    assert canonical_doc_key('CMM 1143 A') == 'CMM.1143.A'
+    assert canonical_doc_key('CMM 114 3A') == 'CMM.114.3.A'
+    assert canonical_doc_key('SB 0') == 'SB.0'
+    assert canonical_doc_key('SB 000') == 'SB.0'
+
+
+def test_canonical_doc_key_of_nothing_is_empty():
+    assert canonical_doc_key('') == ''
+    assert canonical_doc_key(' -/- ') == ''
+    assert canonical_doc_key(413) == '413'
+
+
+def test_tr_is_verified_by_revision_description_and_date():
+    verified, mismatch = compare([
+        ['AMM-0001', '12/31/2018', 'TR5', 'AMM'],
+        ['AMM-0002', '01/15/2020', 'TR 5', 'AMM'],
+    ])
+    assert (verified['Formatted'], verified['Result'], verified['Note']) == ('TR', 'Verified', 'duplicated')
+    assert verified['Doc Call Number'] == 'CN1, CN1-2'
+    assert mismatch['Result'] == 'Rev. Num: 3/ Rev. Date: 12/31/2018'
+    assert mismatch['Note'] == ''
+
+
+def test_statement_number_is_looked_up_in_revision_description():
+    found, missing = compare([
+        ['AMM-0003', '2019-07-01', '3, STATEMENT 5004', 'AMM'],
+        ['AMM-0004', '2019-07-01', '3, STATEMENT 5004', 'AMM'],
+    ])
+    assert (found['Formatted'], found['Result']) == ('5004', 'Verified')
+    assert missing['Result'] == '5004 not found in Revision Description'
+    assert missing['Doc Call Number'] == 'CN4'
+
+
+def test_formatted_rows_are_decided_the_same_in_any_window(client_csv, home_csv, tmp_path):
+    for window_size in (1, 1000):
+        DocumentRevisionTool(client_csv, home_csv, str(tmp_path / f"{window_size}.csv"),
+                             window_size=window_size, log=lambda *args: None).run()
+    assert (tmp_path / '1.csv').read_text() == (tmp_path / '1000.csv').read_text()
+
+
+def test_similarity_index_ranks_respellings_first():
+    index = SimilarityIndex(['AMM-1234', 'AMM-1243', 'CMM-7777', 'AMM-1234'],
+                            ['Manual', 'Manual', 'Manual', 'Other'], ['CN1', 'CN2', '', 'CN4'])
+    suggestions = index.suggest('amm 1234', k=2)
+    assert [pos for pos, _ in suggestions] == [0, 3]
+    assert suggestions[0][1] == 1.0
+    assert SimilarityIndex(['SB-100'], [''], ['']).suggest('sb 1OO', k=1) == [(0, 1.0)]
+    assert index.suggestion_text('AMM-12345', k=1) == 'AMM-1234 (CN1) 91%'
+    assert index.suggestion_text('XYZ', k=3) == ''
+
+
+def test_not_found_rows_get_suggestions():
+    home = HOME + [['CN6', 'AMM-1234', 'Manual AMM-1234', 'Rev 3', '3', '01/15/2020']]
+    rows = [['AMM-1243', '2020-01-15', '3', 'AMM'], ['XYZ-9', '2020-01-15', '3', 'AMM'],
+            ['AMM-0003', '2019-07-01', '4', 'AMM']]
+    respelled, unknown, found = compare(rows, home)
+    assert respelled['Result'] == 'Not found'
+    assert respelled['Suggestions'] == 'AMM-1234 (CN6) 60%'
+    assert unknown['Suggestions'] == ''
+    assert found['Suggestions'] == ''
+    assert all(row['Suggestions'] == '' for row in compare(rows, home, suggestions=0))
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from dry_run_v1 import result_category, stratified_sample, wilson_interval
+from final_result_v1 import ResultGenerator
+
+
+def test_wilson_interval_contains_the_observed_share():
+    low, high = wilson_interval(0.25, 200)
+    assert low < 0.25 < high
+    assert low == pytest.approx(0.1951, abs=1e-4)
+    assert high == pytest.approx(0.3143, abs=1e-4)
+
+
+def test_wilson_interval_stays_within_zero_and_one():
+    assert wilson_interval(0.0, 50)[0] == 0.0
+    assert wilson_interval(1.0, 50)[1] == pytest.approx(1.0)
+    assert wilson_interval(0.5, 0) == (0.0, 1.0)
+
+
+def test_wilson_interval_narrows_with_more_rows():
+    small = wilson_interval(0.4, 50)
+    large = wilson_interval(0.4, 5000)
+    assert large[1] - large[0] < small[1] - small[0]
+
+
+def test_stratified_sample_allocates_proportionally():
+    strata = ['AMM'] * 600 + ['SB'] * 300 + ['CMM'] * 100
+    positions, sizes = stratified_sample(strata, 100, seed=1)
+    assert sizes == {'AMM': (600, 60), 'SB': (300, 30), 'CMM': (100, 10)}
+    assert positions == sorted(positions)
+    assert len(set(positions)) == 100
+    assert sum(strata[pos] == 'CMM' for pos in positions) == 10
+
+
+def test_stratified_sample_keeps_every_stratum_and_is_repeatable():
+    strata = ['AMM'] * 995 + ['rare'] * 5
+    positions, sizes = stratified_sample(strata, 50, seed=3)
+    assert sizes['rare'] == (5, 1)
+    assert positions == stratified_sample(strata, 50, seed=3)[0]
+
+
+def test_stratified_sample_larger_than_the_rows_takes_all():
+    strata = ['a', 'b', 'a']
+    positions, sizes = stratified_sample(strata, 10)
+    assert positions == [0, 1, 2]
+    assert sizes == {'a': (2, 2), 'b': (1, 1)}
+
+
+def test_result_categories_match_the_summary():
+    results = ['Verified', 'Not found', '', None, 'TR not found', '3/01/15/2020',
+               '5004 not found in Revision Description']
+    assert [result_category(result) for result in results] == [
+        'Verified', 'Not found', 'Mismatch', 'Mismatch', 'Mismatch', 'Mismatch', 'Mismatch']
+    summary = ResultGenerator(pd.DataFrame({'Result': results}), None).summary()
+    assert summary == {'total': 7, 'verified': 1, 'needs_check': 5, 'not_found': 1}
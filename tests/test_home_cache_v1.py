@@ -0,0 +1,56 @@
+import os
+
+import home_cache_v1
+from conftest import HOME_COLUMNS, make_home_rows, read_result, write_csv
+from home_cache_v1 import HomeCache
+from main_v1 import DocumentRevisionTool
+
+
+def run(client_csv, home_csv, output_file, home_cache, **options):
+    DocumentRevisionTool(client_csv, home_csv, str(output_file), home_cache=home_cache,
+                         log=lambda *args: None, **options).run()
+    return read_result(output_file)
+
+
+def test_second_run_reuses_the_home_data(client_csv, home_csv, tmp_path):
+    home_cache = HomeCache()
+    first = run(client_csv, home_csv, tmp_path / 'first.csv', home_cache)
+    second = run(client_csv, home_csv, tmp_path / 'second.csv', home_cache)
+    assert (home_cache.hits, home_cache.misses) == (1, 1)
+    assert second.equals(first)
+    assert first.equals(run(client_csv, home_csv, tmp_path / 'uncached.csv', None))
+
+
+def test_hit_writes_the_duplicate_list_again(client_csv, home_csv, tmp_path):
+    home_cache = HomeCache()
+    run(client_csv, home_csv, tmp_path / 'first.csv', home_cache)
+    duplicates_file = tmp_path / 'duplicates.csv'
+    # The first entry has no duplicate list, so this run loads the file again
+    run(client_csv, home_csv, tmp_path / 'second.csv', home_cache, duplicates_file=str(duplicates_file))
+    listed = duplicates_file.read_bytes()
+    os.remove(duplicates_file)
+    run(client_csv, home_csv, tmp_path / 'third.csv', home_cache, duplicates_file=str(duplicates_file))
+    assert (home_cache.hits, home_cache.misses) == (1, 2)
+    assert duplicates_file.read_bytes() == listed
+
+
+def test_edited_home_file_is_loaded_again(client_csv, home_csv, tmp_path):
+    home_cache = HomeCache()
+    run(client_csv, home_csv, tmp_path / 'first.csv', home_cache)
+    write_csv(home_csv, HOME_COLUMNS, make_home_rows(30))
+    edited = run(client_csv, home_csv, tmp_path / 'second.csv', home_cache)
+    assert home_cache.misses == 2
+    assert len(home_cache.entries) == 1
+    assert edited.equals(run(client_csv, home_csv, tmp_path / 'uncached.csv', None))
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    monkeypatch.setattr(home_cache_v1, 'estimate_home_bytes', lambda home_df, home_index: 400 * 1024)
+    home_cache = HomeCache(max_mb=1)
+    for name in ('a', 'b'):
+        home_cache.store((name, 0, 0, 'default'), None, None)
+    home_cache.lookup(('a', 0, 0, 'default'))
+    home_cache.store(('c', 0, 0, 'default'), None, None)
+    assert [key[0] for key in home_cache.entries] == ['a', 'c']
+    home_cache.resize(0)
+    assert not home_cache.entries
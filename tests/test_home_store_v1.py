@@ -0,0 +1,136 @@
+from conftest import HOME_COLUMNS, make_home_rows, write_csv
+from home_store_v1 import HomeStore
+
+
+def revision_of(store, doc_no):
+    return [record['Revision Num'] for _, record in store.find_by_document_number(doc_no)]
+
+
+def test_import_csv_drops_duplicates_by_key(tmp_path):
+    rows = make_home_rows()
+    snapshot = write_csv(tmp_path / 'snap1.csv', HOME_COLUMNS, rows)
+    store = HomeStore(str(tmp_path / 'home.db'))
+    try:
+        stats = store.import_csv(str(snapshot))
+        distinct = len({(row[0], row[3]) for row in rows})
+        assert distinct < len(rows)
+        assert stats == {'total_rows': len(rows), 'inserted': distinct, 'updated': 0, 'deleted': 0}
+        assert store.count() == distinct
+    finally:
+        store.close()
+
+
+def test_import_csv_upserts_only_the_changes(tmp_path):
+    rows = make_home_rows()
+    store = HomeStore(str(tmp_path / 'home.db'))
+    try:
+        store.import_csv(str(write_csv(tmp_path / 'snap1.csv', HOME_COLUMNS, rows)))
+        unchanged = store.import_csv(str(tmp_path / 'snap1.csv'))
+        assert (unchanged['inserted'], unchanged['updated'], unchanged['deleted']) == (0, 0, 0)
+
+        # AMM-0001 gets a new revision, AMM-0002 is dropped, AMM-0999 is new
+        changed = [list(row) for row in rows if row[1] != 'AMM-0002']
+        for row in changed:
+            if row[1] == 'AMM-0001':
+                row[4] = '11'
+        changed.append(['CN999', 'AMM-0999', 'Manual AMM-0999', 'TR 999', 'BASIC', '01/15/2020'])
+        count = store.count()
+        stats = store.import_csv(str(write_csv(tmp_path / 'snap2.csv', HOME_COLUMNS, changed)))
+        assert (stats['inserted'], stats['updated'], stats['deleted']) == (1, 1, 1)
+        assert store.count() == count
+        assert revision_of(store, 'AMM-0001') == ['11']
+        assert revision_of(store, 'AMM-0002') == []
+        assert revision_of(store, 'AMM-0999') == ['BASIC']
+    finally:
+        store.close()
+
+
+def test_import_csv_records_the_revision_history(tmp_path):
+    rows = make_home_rows()
+    store = HomeStore(str(tmp_path / 'home.db'))
+    try:
+        store.import_csv(str(write_csv(tmp_path / 'snap1.csv', HOME_COLUMNS, rows)))
+        changed = [list(row) for row in rows if row[1] != 'AMM-0002']
+        for row in changed:
+            if row[1] == 'AMM-0001':
+                row[4] = '11'
+        store.import_csv(str(write_csv(tmp_path / 'snap2.csv', HOME_COLUMNS, changed)))
+
+        history = store.revision_history('CN1', 'AMM-0001')
+        assert [entry['import_id'] for entry in history] == [2, 1]
+        assert history[0]['revision_nums'] == '11'
+        assert history[1]['revision_nums'] == '02'
+        assert history[0]['source'].endswith('snap2.csv')
+
+        # Removed documents get an entry without revision values
+        removed = store.revision_history('CN2', 'AMM-0002')
+        assert removed[0]['import_id'] == 2
+        assert removed[0]['revision_nums'] is None
+
+        # Unchanged documents only have their first snapshot
+        assert [entry['import_id'] for entry in store.revision_history('CN3', 'AMM-0003')] == [1]
+        assert len(store.revision_history('CN1', 'AMM-0001', limit=1)) == 1
+    finally:
+        store.close()
+
+
+def test_history_keeps_the_call_number_as_imported(tmp_path):
+    rows = make_home_rows()
+    for row in rows:
+        if row[1] == 'AMM-0001':
+            row[0] = 'CN1 '
+    store = HomeStore(str(tmp_path / 'home.db'))
+    try:
+        store.import_csv(str(write_csv(tmp_path / 'snap1.csv', HOME_COLUMNS, rows)))
+        assert store.revision_history('CN1 ', 'AMM-0001')
+        assert store.revision_history('CN1', 'AMM-0001') == []
+    finally:
+        store.close()
+
+
+def test_fallback_scans_only_return_matching_rows(tmp_path):
+    from compare_v2 import RevisionComparator
+
+    store = HomeStore(str(tmp_path / 'home.db'))
+    try:
+        store.import_csv(str(write_csv(tmp_path / 'snap1.csv', HOME_COLUMNS, make_home_rows())))
+        all_rows = list(store.iter_rows())
+        for has_fts in (True, False):
+            store.has_fts = has_fts
+            for doc_no in ['AMM-0001', 'CMM 3 A', 'M 1', '3', 'tr 00']:
+                words = RevisionComparator.title_keywords(doc_no)
+                expected = [rowid for rowid, record in all_rows
+                            if RevisionComparator.title_contains_doc_no(doc_no, str(record['Title']))]
+                found = [rowid for rowid, _ in store.find_title_candidates(doc_no, words)]
+                if has_fts and len(doc_no) >= 3:
+                    assert set(expected) <= set(found)
+                else:
+                    assert found == expected
+
+                expected = [rowid for rowid, record in all_rows
+                            if doc_no.upper() in str(record['Revision Description']).upper()]
+                found = [rowid for rowid, _ in store.find_revision_description_candidates(doc_no)]
+                if has_fts and len(doc_no) >= 3:
+                    assert set(expected) <= set(found)
+                else:
+                    assert found == expected
+        assert len(store.find_title_candidates('3', [])) < len(all_rows)
+    finally:
+        store.close()
+
+
+def test_a_row_added_at_the_top_is_not_a_change_of_the_others(tmp_path):
+    rows = make_home_rows()
+    store = HomeStore(str(tmp_path / 'home.db'))
+    try:
+        store.import_csv(str(write_csv(tmp_path / 'snap1.csv', HOME_COLUMNS, rows)))
+        added = [['CN999', 'AMM-0999', 'Manual AMM-0999', 'TR 999', 'BASIC', '01/15/2020']] + rows
+        stats = store.import_csv(str(write_csv(tmp_path / 'snap2.csv', HOME_COLUMNS, added)))
+        assert (stats['inserted'], stats['updated'], stats['deleted']) == (1, 0, 0)
+        # The stored order follows the new file
+        assert next(store.iter_rows())[1]['Document Number'] == 'AMM-0999'
+        # Only the new document gets a version record
+        assert [entry['import_id'] for entry in store.revision_history('CN999', 'AMM-0999')] == [2]
+        assert [entry['import_id'] for entry in store.revision_history('CN1', 'AMM-0001')] == [1]
+    finally:
+        store.close()
@@ -0,0 +1,56 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import CLIENT_COLUMNS, HOME_COLUMNS, read_result, write_csv
+from main_v1 import DocumentRevisionTool
+
+MAIN = str(Path(__file__).resolve().parent.parent / 'main_v1.py')
+
+
+def test_write_errors_are_raised_to_the_caller(client_csv, home_csv, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output_file = tmp_path / 'result.csv'
+    output_file.mkdir()
+    tool = DocumentRevisionTool(client_csv, home_csv, str(output_file), log=lambda *args: None)
+    with pytest.raises(OSError):
+        tool.run()
+
+
+def test_cli_exits_with_an_error_message(client_csv, home_csv, tmp_path):
+    (tmp_path / 'result.csv').mkdir()
+    cli = subprocess.run([sys.executable, MAIN, client_csv, home_csv, 'result.csv', '--force'],
+                         cwd=tmp_path, capture_output=True, text=True)
+    assert cli.returncode == 1
+    assert 'Error: ' in cli.stdout
+    assert 'Traceback' not in cli.stderr
+
+
+def run_with_history(client_csv, home_csv, output_file, history_db):
+    DocumentRevisionTool(client_csv, home_csv, str(output_file), history_db=str(history_db),
+                         log=lambda *args: None).run()
+    return read_result(output_file)
+
+
+def test_mismatches_name_the_last_home_change(tmp_path):
+    home = [['CN1', 'AMM-0001', 'Manual AMM-0001', 'Rev', '3', '12/31/2018'],
+            ['CN2', 'AMM-0002', 'Manual AMM-0002', 'Rev', '3', '12/31/2018']]
+    client_csv = write_csv(tmp_path / 'client.csv', CLIENT_COLUMNS,
+                           [['AMM-0001', '12/31/2018', '3', 'AMM'],
+                            ['AMM-0002', '12/31/2018', '3', 'AMM'],
+                            ['XYZ-9', '12/31/2018', '3', 'AMM']])
+    history_db = tmp_path / 'history.db'
+    first = run_with_history(client_csv, write_csv(tmp_path / 'home1.csv', HOME_COLUMNS, home),
+                             tmp_path / 'first.csv', history_db)
+    assert first['Home Changed'].tolist() == ['', '', '']
+
+    home[1][4:] = ['4', '01/15/2020']
+    second = run_with_history(client_csv, write_csv(tmp_path / 'home2.csv', HOME_COLUMNS, home),
+                              tmp_path / 'second.csv', history_db)
+    assert second['Result'].tolist()[:2] == ['Verified', '4/01/15/2020']
+    note = second['Home Changed'][1]
+    assert note.startswith('CN2 AMM-0002: changed in snapshot 2 (home2.csv, ')
+    assert note.endswith('): Rev. Num 3 -> 4, Rev. Date 12/31/2018 -> 01/15/2020')
+    assert second['Home Changed'][0] == '' and second['Home Changed'][2] == ''
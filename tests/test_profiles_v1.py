@@ -0,0 +1,55 @@
+import json
+
+import pandas as pd
+import pytest
+
+from api_v1 import compare_documents
+from conftest import HOME_COLUMNS
+from profiles_v1 import available_profiles, load_profile, read_profile
+
+
+def write_profile(path, definition):
+    path.write_text(json.dumps(definition))
+    return str(path)
+
+
+def test_only_the_default_profile_is_shipped():
+    assert available_profiles() == ['default']
+    assert load_profile('default').name == 'default'
+
+
+def test_profile_overrides_only_what_it_names(tmp_path):
+    base = write_profile(tmp_path / 'base.json', {'revision': {'basic_values': ['ORIG']}})
+    child = write_profile(tmp_path / 'child.json', {'extends': base, 'date_formats': ['%d.%m.%Y']})
+    definition = read_profile(child)
+    assert definition['name'] == 'child'
+    assert definition['revision']['basic_values'] == ['ORIG']
+    assert definition['revision']['tr_keyword'] == 'TR'
+    assert definition['date_formats'] == ['%d.%m.%Y']
+
+
+def test_unknown_or_circular_profiles_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match='not found'):
+        read_profile('no_such_operator')
+    loop = tmp_path / 'loop.json'
+    write_profile(loop, {'extends': str(loop)})
+    with pytest.raises(ValueError, match='extends itself'):
+        read_profile(str(loop))
+
+
+def test_profile_rules_are_used_by_the_comparison(tmp_path):
+    profile = write_profile(tmp_path / 'operator.json', {
+        'client_headers': {'Document No': 'Doc. No.', 'Rev No': 'Revision No.', 'Rev Date': 'Rev. Date'},
+        'revision': {'reference_keywords': ['LEP'], 'reference_pattern': r'LEP\s+(\d+)'},
+        'date_formats': ['%d.%m.%Y'],
+    })
+    client = pd.DataFrame([['AMM-0001', '31.12.2018', '3', 'AMM'],
+                           ['AMM-0002', '31.12.2018', '3, LEP 77', 'AMM']],
+                          columns=['Document No', 'Rev Date', 'Rev No', 'Publi. Type'])
+    home = pd.DataFrame([['CN1', 'AMM-0001', 'Manual AMM-0001', 'Rev', '3', '31.12.2018'],
+                         ['CN2', 'AMM-0002', 'Manual AMM-0002', 'LEP 77', '3', '31.12.2018']],
+                        columns=HOME_COLUMNS)
+    result_df, summary = compare_documents(client, home, profile=profile)
+    assert result_df['Formatted'].tolist() == ['', '77']
+    assert result_df['Result'].tolist() == ['Verified', 'Verified']
+    assert summary['verified'] == 2
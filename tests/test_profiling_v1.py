@@ -0,0 +1,18 @@
+import compare_v2
+from conftest import HOME_COLUMNS, make_home_rows, write_csv
+from home_store_v1 import HomeStore
+from profiling_v1 import CallCounters
+
+
+def test_counters_count_the_store_calls_and_restore_the_functions(tmp_path):
+    original = compare_v2.canonical_doc_key
+    snapshot = write_csv(tmp_path / 'home.csv', HOME_COLUMNS, make_home_rows())
+    store = HomeStore(str(tmp_path / 'home.db'))
+    try:
+        with CallCounters() as counters:
+            stats = store.import_csv(str(snapshot))
+            assert compare_v2.canonical_doc_key is not original
+        assert counters.counts['canonical_doc_key'] == stats['inserted']
+    finally:
+        store.close()
+    assert compare_v2.canonical_doc_key is original
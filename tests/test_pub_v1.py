@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from pub_v1 import HomeProcessor
+
+
+def home_frame(rows):
+    return pd.DataFrame(rows, columns=['Call Number', 'Revision Description', 'Document Number'])
+
+
+def test_duplicate_positions_point_at_the_first_occurrence():
+    home_df = home_frame([
+        ['CN1', 'TR 001', 'AMM-1'],
+        ['CN2', 'TR 001', 'AMM-2'],
+        ['CN1', 'TR 001', 'AMM-1 copy'],
+        ['CN1', 'TR 002', 'AMM-1'],
+        ['CN2', 'TR 001', 'AMM-2 copy'],
+        ['CN1', 'TR 001', 'AMM-1 again'],
+    ])
+    positions, kept = HomeProcessor(home_df).duplicate_positions()
+    assert positions.tolist() == [2, 4, 5]
+    assert kept.tolist() == [0, 1, 0]
+
+
+def test_duplicate_positions_match_pandas_duplicated():
+    rng = np.random.default_rng(7)
+    home_df = home_frame([
+        [f"CN{rng.integers(20)}", f"TR {rng.integers(5)}", 'AMM'] for _ in range(500)
+    ])
+    home_df.loc[rng.choice(500, 40, replace=False), 'Call Number'] = None
+    home_df.loc[rng.choice(500, 40, replace=False), 'Revision Description'] = None
+    positions, _ = HomeProcessor(home_df).duplicate_positions()
+    expected = np.flatnonzero(home_df.duplicated(subset=HomeProcessor.DUPLICATE_KEY))
+    assert positions.tolist() == expected.tolist()
+
+
+def test_missing_values_are_equal_to_each_other_only():
+    home_df = home_frame([
+        [None, 'TR 001', 'a'],
+        ['', 'TR 001', 'b'],
+        [None, 'TR 001', 'c'],
+    ])
+    positions, kept = HomeProcessor(home_df).duplicate_positions()
+    assert positions.tolist() == [2]
+    assert kept.tolist() == [0]
+
+
+def test_remove_duplicates_writes_the_audit(tmp_path):
+    home_df = home_frame([
+        ['CN1', 'TR 001', 'AMM-1'],
+        ['CN1', 'TR 001', 'AMM-1 copy'],
+    ])
+    audit_file = tmp_path / 'duplicates.csv'
+    result = HomeProcessor(home_df, audit_file=str(audit_file)).remove_duplicates()
+    assert result['Document Number'].tolist() == ['AMM-1']
+    audit = pd.read_csv(audit_file)
+    assert audit[['Home Row', 'Kept Home Row']].values.tolist() == [[3, 2]]
@@ -0,0 +1,72 @@
+import os
+
+from conftest import read_result
+from main_v1 import DocumentRevisionTool
+from result_cache_v1 import ResultCache
+
+
+def make_tool(client_csv, home_csv, output_file, cache_dir, logs, **options):
+    return DocumentRevisionTool(client_csv, home_csv, output_file, cache_dir=str(cache_dir),
+                                stats_file=None, log=logs.append, **options)
+
+
+def test_second_run_is_served_from_the_cache(client_csv, home_csv, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    logs = []
+    first = make_tool(client_csv, home_csv, str(tmp_path / 'first.csv'), cache_dir, logs).run()
+    assert first is not None
+    assert not any('cached result' in message for message in logs)
+
+    logs = []
+    second = make_tool(client_csv, home_csv, str(tmp_path / 'second.csv'), cache_dir, logs).run()
+    assert second is None
+    assert any('using the cached result' in message for message in logs)
+    assert read_result(tmp_path / 'second.csv').equals(read_result(tmp_path / 'first.csv'))
+
+
+def test_other_options_are_not_served_from_the_cache(client_csv, home_csv, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    make_tool(client_csv, home_csv, str(tmp_path / 'first.csv'), cache_dir, []).run()
+    logs = []
+    make_tool(client_csv, home_csv, str(tmp_path / 'second.csv'), cache_dir, logs,
+              suggestions=0).run()
+    assert not any('cached result' in message for message in logs)
+
+
+def test_side_files_are_written_again_by_a_second_run(client_csv, home_csv, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    output_file = str(tmp_path / 'result.csv')
+    side_files = [str(tmp_path / 'formatted.csv'), str(tmp_path / 'duplicates.csv'),
+                  output_file + '.unmatched_home.csv']
+    options = {'formatted_client_file': side_files[0], 'duplicates_file': side_files[1],
+               'coverage': True}
+
+    make_tool(client_csv, home_csv, output_file, cache_dir, [], **options).run()
+    first = {path: read_result(path) for path in side_files}
+    for path in side_files:
+        os.remove(path)
+
+    logs = []
+    make_tool(client_csv, home_csv, output_file, cache_dir, logs, **options).run()
+    assert any('Result cache not used' in message for message in logs)
+    for path in side_files:
+        assert read_result(path).equals(first[path])
+
+
+def test_cache_evicts_the_least_recently_used_result(tmp_path):
+    cache = ResultCache(tmp_path / 'cache', max_mb=0.002)
+    for number in range(3):
+        result_file = tmp_path / f"result{number}.csv"
+        result_file.write_text('x' * 900)
+        cache.store(f"key{number}", str(result_file), {'summary': {}})
+        os.utime(cache.cache_dir / f"key{number}.csv", (number, number))
+    assert [path.name for path in cache.entries()] == ['key1.csv', 'key2.csv']
+    assert cache.lookup('key0', '.csv') is None
+    assert cache.lookup('key2', '.csv')[1]['summary'] == {}
+
+
+def test_library_default_does_not_cache(client_csv, home_csv, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    DocumentRevisionTool(client_csv, home_csv, str(tmp_path / 'result.csv'), stats_file=None,
+                         log=lambda *args: None).run()
+    assert not (tmp_path / 'result_cache').exists()
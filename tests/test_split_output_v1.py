@@ -0,0 +1,62 @@
+from openpyxl import load_workbook
+
+from conftest import read_result
+from main_v1 import DocumentRevisionTool
+from split_output_v1 import INDEX_COLUMNS, SplitXlsxResultWriter, sheet_title
+
+COLUMNS = ['Doc. No.', 'Publi. Type', 'Result']
+ROWS = [[f"AMM-{i}", 'SB' if i % 3 else 'AMM', 'Verified' if i % 2 else 'Not found'] for i in range(7)]
+
+
+def sheet_rows(ws):
+    return [list(row) for row in ws.iter_rows(values_only=True)]
+
+
+def test_sheet_titles_are_valid_and_unique():
+    used = {'index'}
+    assert sheet_title('Index', used) == 'Index (2)'
+    assert sheet_title('A/B: [x]', used) == 'A_B_ _x_'
+    assert sheet_title('x' * 40, used) == 'x' * 31
+    assert sheet_title('x' * 40, used) == 'x' * 27 + ' (2)'
+
+
+def test_files_mode_writes_part_files_and_an_index(tmp_path):
+    output_file = tmp_path / 'result.xlsx'
+    with SplitXlsxResultWriter(str(output_file), COLUMNS, max_rows=3, workers=2) as writer:
+        for values in ROWS:
+            writer.write_row(values)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        'result.xlsx', 'result_Part_1.xlsx', 'result_Part_2.xlsx', 'result_Part_3.xlsx']
+    parts = [sheet_rows(load_workbook(tmp_path / f"result_Part_{n}.xlsx").active) for n in (1, 2, 3)]
+    assert all(part[0] == COLUMNS for part in parts)
+    assert [row for part in parts for row in part[1:]] == ROWS
+
+    index = sheet_rows(load_workbook(output_file)['Index'])
+    assert index[0] == INDEX_COLUMNS
+    assert index[1] == ['Part 1', None, 3, 1, 0, 2, 'result_Part_1.xlsx']
+    assert [row[2] for row in index[1:]] == [3, 3, 1]
+
+
+def test_sheets_mode_splits_by_publi_type(tmp_path):
+    output_file = tmp_path / 'result.xlsx'
+    with SplitXlsxResultWriter(str(output_file), COLUMNS, by_publi_type=True,
+                               mode='sheets') as writer:
+        for values in ROWS:
+            writer.write_row(values)
+    workbook = load_workbook(output_file)
+    assert workbook.sheetnames == ['Index', 'AMM', 'SB']
+    assert sheet_rows(workbook['AMM'])[1:] == [row for row in ROWS if row[1] == 'AMM']
+    assert sheet_rows(workbook['SB'])[1:] == [row for row in ROWS if row[1] == 'SB']
+    assert [row[0] for row in sheet_rows(workbook['Index'])[1:]] == ['AMM', 'SB']
+
+
+def test_split_run_holds_the_same_rows(client_csv, home_csv, tmp_path):
+    DocumentRevisionTool(client_csv, home_csv, str(tmp_path / 'whole.csv'),
+                         log=lambda *args: None).run()
+    DocumentRevisionTool(client_csv, home_csv, str(tmp_path / 'split.xlsx'), split_rows=30,
+                         log=lambda *args: None).run()
+    rows = []
+    for number in (1, 2, 3):
+        part = sheet_rows(load_workbook(tmp_path / f"split_Part_{number}.xlsx").active)
+        rows.extend(['' if value is None else str(value) for value in row] for row in part[1:])
+    assert rows == read_result(tmp_path / 'whole.csv').values.tolist()